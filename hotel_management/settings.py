@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,11 +42,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'website.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'website.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -54,7 +57,7 @@ ROOT_URLCONF = 'hotel_management.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'website.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR/'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,9 +81,59 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {'timeout': 20},
     }
 }
 
+# Views marked with website.routers.replica_reads (catalog pages, dashboards,
+# reports) read from this database when it is configured. Locally the replica
+# is a second SQLite file, refreshed from the primary by `manage.py sync_replica`.
+REPLICA_DATABASE = 'replica'
+if os.environ.get('DATABASE_REPLICA_PATH'):
+    DATABASES[REPLICA_DATABASE] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['DATABASE_REPLICA_PATH'],
+        'OPTIONS': {'timeout': 20},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['website.routers.ReplicaRouter']
+
+# How long a client that wrote reads from the primary, to see its own writes despite replica lag.
+REPLICA_PIN_SECONDS = 30
+
+# Applied to every new SQLite connection (website.signals.tune_sqlite). WAL lets
+# readers run alongside the writer instead of waiting on its lock.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'temp_store': 'memory',
+    'cache_size': -16000,
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hotel-management',
+    }
+}
+
+# Sessions are read from the cache and written through to the database, which they fall back to on a miss.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# How long anonymous visitors are served cached copies of the public pages.
+PUBLIC_PAGE_CACHE_SECONDS = 600
+
+# Longest a process serves a cached room, food or service catalog without
+# checking the database. LocMemCache is per process, so changes made by another
+# process (a worker, import_data, seed_hotel) only show up once this runs out.
+CATALOG_MAX_AGE = 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -100,6 +153,21 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The first hasher hashes new passwords; a stored hash made by another hasher, or at
+# another cost, is rewritten with it on the next successful login.
+PASSWORD_HASHERS = [
+    'website.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = 720000
+
+# Token buckets in front of authenticate(), as (burst size, tokens refilled per minute).
+LOGIN_THROTTLE_PER_IP = (20, 10)
+LOGIN_THROTTLE_PER_USERNAME = (5, 1)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -127,3 +195,22 @@ LOGIN_REDIRECT_URL = "/"
 AUTH_USER_MODEL = 'website.Person'
 LOGIN_URL = '/login/'
 
+# Views over their declared query budget raise instead of only logging a warning.
+# Off in the app, where the response would fail after its writes committed;
+# the test runner turns it on so tests catch query regressions.
+QUERY_BUDGET_RAISE = False
+TEST_RUNNER = 'website.testing.BudgetEnforcingRunner'
+
+
+
+# Background tasks (website.tasks, run by `manage.py run_tasks`)
+
+TASK_MAX_ATTEMPTS = 5
+# Retry delay in seconds, as (first delay, longest delay); it doubles after every failed attempt.
+TASK_RETRY_BACKOFF = (10, 3600)
+# How long a worker holds a claimed task before another worker may take it over.
+TASK_LEASE_SECONDS = 300
+
+# Confirmation emails are printed until a mail server is configured.
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'reservations@hotel.example'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Person, Employee, Room, RoomBooking, Food, FoodOrder, Service, ServiceOrder, Payment, InventoryItem
+from .models import Person, Employee, Room, RoomBooking, Food, FoodOrder, Service, ServiceOrder, Payment, InventoryItem, DailyRevenue, RoomRate, FoodIngredient, ServiceSupply, GuestBalance, Task
 
 # Register your models here.
 admin.site.register(Person)
@@ -12,3 +12,9 @@ admin.site.register(Service)
 admin.site.register(ServiceOrder)
 admin.site.register(Payment)
 admin.site.register(InventoryItem)
+admin.site.register(DailyRevenue)
+admin.site.register(RoomRate)
+admin.site.register(FoodIngredient)
+admin.site.register(ServiceSupply)
+admin.site.register(GuestBalance)
+admin.site.register(Task)
@@ -0,0 +1,90 @@
+import datetime
+
+from .models import Room, RoomBooking
+
+# Longest range the analytics view and command accept, in nights.
+MAX_NIGHTS = 4 * 366
+
+
+def _rates(sold, available, revenue):
+    return {
+        'occupancy': round(sold / available, 4) if available else 0.0,
+        'adr': round(revenue / sold, 2) if sold else 0.0,
+        'revpar': round(revenue / available, 2) if available else 0.0,
+    }
+
+
+def room_type_performance(start, end):
+    """
+    Occupancy rate, ADR (revenue per sold night) and RevPAR (revenue per
+    available night) per room type for the nights ``start`` through ``end``
+    inclusive, plus a per-night occupancy series for each type.
+
+    Bookings are read in one columnar query and laid out as a rooms x nights
+    matrix with NumPy; a stay's revenue is spread evenly over its nights.
+    Requires NumPy.
+    """
+    import numpy as np
+
+    nights = (end - start).days + 1
+    if nights < 1:
+        raise ValueError('end must not be before start.')
+    type_codes = [code for code, _ in Room.ROOM_TYPES]
+
+    rooms = list(Room.objects.order_by('pk').values_list('pk', 'room_type')) # SELECT id, room_type FROM website_room ORDER BY id;
+    room_ids = np.array([pk for pk, _ in rooms], dtype=np.int64)
+    room_types = np.array([type_codes.index(room_type) for _, room_type in rooms], dtype=np.int64)
+
+    # SELECT room_id, booking_date, check_out, total_price, num_nights FROM website_roombooking WHERE booking_date <= [end] AND check_out > [start];
+    bookings = RoomBooking.objects.filter(booking_date__lte=end, check_out__gt=start).values_list(
+        'room_id', 'booking_date', 'check_out', 'total_price', 'num_nights'
+    )
+    columns = list(zip(*bookings)) or [(), (), (), (), ()]
+    booked_rooms = np.searchsorted(room_ids, np.array(columns[0], dtype=np.int64))
+    origin = np.datetime64(start, 'D')
+    first = np.clip((np.array(columns[1], dtype='datetime64[D]') - origin).astype(np.int64), 0, nights)
+    last = np.clip((np.array(columns[2], dtype='datetime64[D]') - origin).astype(np.int64), 0, nights)
+    nightly_rate = np.array(columns[3], dtype=np.float64) / np.maximum(np.array(columns[4], dtype=np.float64), 1)
+
+    # Each stay adds +1 (and its nightly rate) on its first night in range and
+    # -1 the night after its last; a running sum along each row fills the stay in.
+    occupied = np.zeros((len(rooms), nights + 1), dtype=np.int32)
+    np.add.at(occupied, (booked_rooms, first), 1)
+    np.add.at(occupied, (booked_rooms, last), -1)
+    occupied = np.cumsum(occupied, axis=1)[:, :nights]
+    revenue = np.zeros((len(rooms), nights + 1), dtype=np.float64)
+    np.add.at(revenue, (booked_rooms, first), nightly_rate)
+    np.add.at(revenue, (booked_rooms, last), -nightly_rate)
+    revenue = np.cumsum(revenue, axis=1)[:, :nights]
+
+    # rooms x types indicator, so per-type totals are one matrix product.
+    membership = np.zeros((len(rooms), len(type_codes)), dtype=np.int32)
+    membership[np.arange(len(rooms)), room_types] = 1
+    rooms_per_type = membership.sum(axis=0)
+    sold_per_night = membership.T @ occupied
+    revenue_per_type = membership.T.astype(np.float64) @ revenue.sum(axis=1)
+
+    rows = []
+    for i, (code, label) in enumerate(Room.ROOM_TYPES):
+        available = int(rooms_per_type[i]) * nights
+        sold = int(sold_per_night[i].sum())
+        rows.append({
+            'room_type': code, 'label': label, 'rooms': int(rooms_per_type[i]),
+            'available_nights': available, 'sold_nights': sold, 'revenue': round(float(revenue_per_type[i]), 2),
+            **_rates(sold, available, float(revenue_per_type[i])),
+            'daily_occupancy': [round(float(n) / rooms_per_type[i], 4) if rooms_per_type[i] else 0.0 for n in sold_per_night[i]],
+        })
+    available = len(rooms) * nights
+    sold = int(occupied.sum())
+    total_revenue = float(revenue.sum())
+    return {
+        'start': start,
+        'end': end,
+        'nights': nights,
+        'dates': [start + datetime.timedelta(days=i) for i in range(nights)],
+        'room_types': rows,
+        'total': {
+            'rooms': len(rooms), 'available_nights': available, 'sold_nights': sold,
+            'revenue': round(total_revenue, 2), **_rates(sold, available, total_revenue),
+        },
+    }
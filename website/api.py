@@ -0,0 +1,52 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import FoodOrder, Payment, Room, RoomBooking, ServiceOrder
+from .pagination import keyset_page
+
+MAX_LIMIT = 100
+
+# resource -> (model, lookup of the guest who owns a row or None for shared rows, fields a client may select)
+RESOURCES = {
+    'rooms': (Room, None, (
+        'id', 'room_number', 'num_beds', 'room_type', 'price', 'is_available',
+    )),
+    'bookings': (RoomBooking, 'booked_by', (
+        'id', 'room_id', 'room__room_number', 'booked_by_id', 'booking_date', 'check_out', 'num_nights', 'total_price', 'checked_out_at',
+    )),
+    'food_orders': (FoodOrder, 'ordered_by', (
+        'id', 'food_id', 'food__food_item_number', 'ordered_by_id', 'order_date', 'quantity', 'total_price', 'payment_status',
+    )),
+    'service_orders': (ServiceOrder, 'ordered_by', (
+        'id', 'service_id', 'service__service_id', 'ordered_by_id', 'order_date', 'quantity', 'total_price', 'payment_status',
+    )),
+    'payments': (Payment, 'user', (
+        'id', 'user_id', 'payment_date', 'amount', 'payment_method', 'food_order_id', 'service_order_id',
+    )),
+}
+
+
+def page(resource, user, see_all, fields=None, after=None, limit=None):
+    """
+    Return one page of a resource as (rows, next cursor), oldest first.
+
+    Rows are dicts of the selected ``fields`` (every field by default; 'id'
+    always comes along as the cursor). Guests only see their own rows unless
+    ``see_all``. Each page is a single query, whatever the fields or depth.
+    """
+    model, owner, columns = RESOURCES[resource]
+    fields = ('id',) + tuple(field for field in fields or columns if field != 'id')
+    queryset = model.objects.values(*fields)
+    if owner and not see_all:
+        queryset = queryset.filter(**{owner: user})
+    # SELECT [fields] FROM [table] [JOIN ...] WHERE [owner_id] = [user_id] AND id > [after] ORDER BY id LIMIT [limit + 1];
+    result = keyset_page(queryset, after, size=limit or MAX_LIMIT, key='id')
+    return result.items, result.next_cursor
+
+
+def render(payload):
+    """Serialize a payload and return (body, strong ETag of the body)."""
+    body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
@@ -0,0 +1,57 @@
+from django.db import IntegrityError
+
+from . import catalog
+from .models import Room, RoomNight
+
+
+class RoomUnavailable(Exception):
+    pass
+
+
+def occupied_room_ids(check_in, check_out):
+    # SELECT room_id FROM website_roomnight WHERE night >= [check_in] AND night < [check_out];
+    return RoomNight.objects.filter(night__gte=check_in, night__lt=check_out).values('room_id')
+
+
+def available_rooms(check_in, check_out, room_type=None):
+    """
+    Rooms in service that are free for every night in [check_in, check_out).
+
+    Evaluates as a single query; the occupied-room subquery is answered from
+    the (night, room) index on website_roomnight.
+    """
+    rooms = Room.objects.filter(is_available=True).exclude(pk__in=occupied_room_ids(check_in, check_out))
+    if room_type:
+        rooms = rooms.filter(room_type=room_type)
+    # SELECT * FROM website_room WHERE is_available = True [AND room_type = [room_type]]
+    #   AND NOT (id IN (SELECT room_id FROM website_roomnight WHERE night >= [check_in] AND night < [check_out]));
+    return rooms.order_by('room_number')
+
+
+def reserve(booking):
+    """
+    Save a new booking, claiming its room for every night of the stay.
+
+    The booking and its RoomNight rows are inserted in one short transaction;
+    the (room, night) unique constraint makes the database the arbiter when
+    concurrent requests race for the same room, so the loser gets
+    RoomUnavailable instead of a double booking.
+    """
+    try:
+        booking.save()
+    except IntegrityError:
+        raise RoomUnavailable(f"Room {booking.room.room_number} is already booked for some of those nights.")
+    return booking
+
+
+def free_rooms(check_in, check_out, room_type=None):
+    """
+    Like available_rooms(), but returns a list built from the cached room
+    catalog, so the only query is the occupancy lookup on website_roomnight.
+    """
+    # SELECT DISTINCT room_id FROM website_roomnight WHERE night >= [check_in] AND night < [check_out];
+    occupied = set(occupied_room_ids(check_in, check_out).values_list('room_id', flat=True).distinct())
+    return [
+        room for room in catalog.get('rooms')
+        if room.is_available and room.pk not in occupied and (not room_type or room.room_type == room_type)
+    ]
@@ -0,0 +1,272 @@
+import datetime
+import math
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from django.db import connection, transaction
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import urls
+from .analytics import room_type_performance
+from .availability import available_rooms
+from .billing import outstanding_balance
+from .models import Employee, Food, FoodOrder, Person, Room, RoomBooking, Service
+from .pagination import keyset_page
+from .seeding import DEFAULT_PASSWORD
+
+
+class Scenario:
+    """How to exercise one URL: who asks, with which method and payload."""
+
+    def __init__(self, role='guest', method='get', data=None, kwargs=None, mutates=False, label=None, requires=()):
+        self.role = role
+        self.method = method
+        self.data = data or (lambda ctx: {})
+        self.kwargs = kwargs or (lambda ctx: {})
+        self.mutates = mutates
+        self.label = label
+        self.requires = tuple(requires) + ((role,) if role != 'anonymous' else ())
+
+
+# URLs not listed here are fetched with a plain GET as a signed-in guest.
+SCENARIOS = {
+    'index': [Scenario(role='anonymous')],
+    'room': [Scenario(role='anonymous')],
+    'food': [Scenario(role='anonymous')],
+    'service': [Scenario(role='anonymous')],
+    'about': [Scenario(role='anonymous')],
+    'signup': [
+        Scenario(role='anonymous'),
+        Scenario(role='anonymous', method='post', mutates=True, data=lambda ctx: {
+            'username': 'bench-signup', 'email': 'bench-signup@example.com', 'first_name': 'Bench',
+            'last_name': 'Signup', 'phone_number': '+8801700000000',
+            'password1': 'a-long-bench-password', 'password2': 'a-long-bench-password',
+        }),
+    ],
+    'login': [
+        Scenario(role='anonymous'),
+        Scenario(role='anonymous', method='post', mutates=True, requires=['guest'], data=lambda ctx: {
+            'username': ctx['guest'].username, 'password': ctx['password'],
+        }),
+    ],
+    'logout': [Scenario(mutates=True)],
+    'room_booking': [
+        Scenario(data=lambda ctx: {'booking_date': ctx['far_future'], 'num_nights': 3}),
+        Scenario(method='post', mutates=True, requires=['free_room'], data=lambda ctx: {
+            'room': ctx['free_room'].pk, 'booking_date': ctx['far_future'], 'num_nights': 3,
+        }),
+    ],
+    'dashboard': [Scenario(role='guest', label='guest'), Scenario(role='employee', label='employee')],
+    'dashboard_async': [Scenario(role='guest', label='guest'), Scenario(role='employee', label='employee')],
+    'checkout': [Scenario(method='post', mutates=True, requires=['booking'], kwargs=lambda ctx: {'booking_id': ctx['booking'].pk})],
+    'service_booking': [
+        Scenario(),
+        Scenario(method='post', mutates=True, requires=['service'], data=lambda ctx: {'service': ctx['service'].pk, 'quantity': 1}),
+    ],
+    'payment': [
+        Scenario(),
+        Scenario(method='post', mutates=True, data=lambda ctx: {'payment_method': 'card'}),
+    ],
+    'payment_async': [
+        Scenario(),
+        Scenario(method='post', mutates=True, data=lambda ctx: {'payment_method': 'card'}),
+    ],
+    'analytics': [Scenario(role='employee')],
+    'export': [
+        Scenario(role='employee', label='csv', kwargs=lambda ctx: {'dataset': 'food_orders'}),
+        Scenario(role='employee', label='json', kwargs=lambda ctx: {'dataset': 'food_orders'}, data=lambda ctx: {'format': 'json'}),
+    ],
+    'api': [
+        Scenario(label='bookings', kwargs=lambda ctx: {'resource': 'bookings'}),
+        Scenario(role='employee', label='food_orders', kwargs=lambda ctx: {'resource': 'food_orders'}, data=lambda ctx: {
+            'fields': 'food__food_item_number,total_price,payment_status', 'limit': 100,
+        }),
+    ],
+    'food_order': [
+        Scenario(),
+        Scenario(method='post', mutates=True, requires=['food'], data=lambda ctx: {'food': ctx['food'].pk, 'quantity': 2}),
+    ],
+}
+
+# Hot ORM paths timed directly, outside the request cycle.
+ORM_PATHS = {
+    'available_rooms': lambda ctx: list(available_rooms(ctx['today'], ctx['today'] + datetime.timedelta(days=3), Room.STANDARD_DOUBLE)),
+    'outstanding_balance': lambda ctx: outstanding_balance(ctx['guest']),
+    'dashboard_food_orders_page': lambda ctx: keyset_page(FoodOrder.objects.select_related('food', 'ordered_by')),
+    'room_type_performance_3y': lambda ctx: room_type_performance(ctx['today'] - datetime.timedelta(days=3 * 365), ctx['today']),
+    'guest_room_bookings': lambda ctx: list(RoomBooking.objects.filter(booked_by=ctx['guest']).select_related('room')),
+}
+
+# Sync views and their async twins, timed through the WSGI and ASGI handlers respectively.
+ASGI_PAIRS = {
+    'dashboard [guest]': ('dashboard', 'dashboard_async', 'guest'),
+    'dashboard [employee]': ('dashboard', 'dashboard_async', 'employee'),
+    'payment': ('payment', 'payment_async', 'guest'),
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(samples, queries):
+    return {
+        'iterations': len(samples),
+        'queries': queries,
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def build_context(password=DEFAULT_PASSWORD):
+    """Pick representative rows from the current database to drive the scenarios."""
+    today = timezone.localdate()
+    employee = Employee.objects.select_related('person').first()
+    booking = RoomBooking.objects.select_related('booked_by').order_by('-pk').first()
+    guest = booking.booked_by if booking else Person.objects.filter(employee__isnull=True).first()
+    far_future = today + datetime.timedelta(days=3650)
+    return {
+        'today': today,
+        'password': password,
+        'guest': guest,
+        'employee': employee.person if employee else None,
+        'booking': booking,
+        'far_future': far_future,
+        'free_room': available_rooms(far_future, far_future + datetime.timedelta(days=3)).first(),
+        'food': Food.objects.first(),
+        'service': Service.objects.first(),
+    }
+
+
+def _client(scenario, ctx):
+    # A fresh address per client, so repeated logins measure authentication rather than the login throttle.
+    ctx['clients'] = ctx.get('clients', 0) + 1
+    client = Client(REMOTE_ADDR=f"10.{ctx['clients'] >> 16 & 255}.{ctx['clients'] >> 8 & 255}.{ctx['clients'] & 255}")
+    if scenario.role != 'anonymous':
+        client.force_login(ctx[scenario.role])
+    return client
+
+
+def _request(client, name, scenario, ctx):
+    path = reverse(name, kwargs=scenario.kwargs(ctx))
+    response = getattr(client, scenario.method)(path, scenario.data(ctx))
+    if response.streaming:
+        # Time the whole body, not just the headers.
+        b''.join(response.streaming_content)
+    return response
+
+
+def time_scenario(name, scenario, ctx, iterations):
+    client = None if scenario.mutates else _client(scenario, ctx)
+    samples = []
+    for i in range(iterations + 1):
+        if scenario.mutates:
+            client = _client(scenario, ctx)
+        with transaction.atomic():
+            # Writes are rolled back so every iteration sees the same data.
+            if i == 0:
+                with CaptureQueriesContext(connection) as captured:
+                    response = _request(client, name, scenario, ctx)
+                queries = len(captured)
+            else:
+                started = time.perf_counter()
+                response = _request(client, name, scenario, ctx)
+                samples.append((time.perf_counter() - started) * 1000)
+            transaction.set_rollback(True)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{name} returned HTTP {response.status_code}')
+    return summarize(samples, queries)
+
+
+def time_callable(fn, ctx, iterations):
+    with CaptureQueriesContext(connection) as captured:
+        fn(ctx)
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(ctx)
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples, len(captured))
+
+
+def _time_wsgi(user, path, iterations):
+    client = Client()
+    client.force_login(user)
+    samples = []
+    for i in range(iterations + 1):
+        started = time.perf_counter()
+        response = client.get(path)
+        if i:
+            samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{path} returned HTTP {response.status_code}')
+    return samples
+
+
+async def _time_asgi(user, path, iterations):
+    client = AsyncClient()
+    await client.aforce_login(user)
+    samples = []
+    for i in range(iterations + 1):
+        started = time.perf_counter()
+        response = await client.get(path)
+        if i:
+            samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{path} returned HTTP {response.status_code}')
+    return samples
+
+
+def compare_asgi(ctx, iterations):
+    """
+    Time each sync view under WSGI against its async twin under ASGI. Unlike
+    time_scenario this runs outside a transaction, so the async views load
+    their sections concurrently as they would in production.
+    """
+    report = {}
+    for key, (sync_name, async_name, role) in ASGI_PAIRS.items():
+        user = ctx[role]
+        if user is None:
+            continue
+        wsgi = _time_wsgi(user, reverse(sync_name), iterations)
+        asgi = async_to_sync(_time_asgi)(user, reverse(async_name), iterations)
+        report[key] = {
+            'wsgi_p50_ms': round(percentile(wsgi, 50), 3),
+            'wsgi_p95_ms': round(percentile(wsgi, 95), 3),
+            'asgi_p50_ms': round(percentile(asgi, 50), 3),
+            'asgi_p95_ms': round(percentile(asgi, 95), 3),
+        }
+    return report
+
+
+def run(iterations=20, password=DEFAULT_PASSWORD):
+    """Time every named URL in website.urls, the hot ORM paths and WSGI against ASGI, and return a report dict."""
+    ctx = build_context(password)
+    report = {'urls': {}, 'orm': {}, 'asgi': {}, 'skipped': {}}
+    for pattern in urls.urlpatterns:
+        name = pattern.name
+        scenarios = SCENARIOS.get(name)
+        if scenarios is None:
+            if pattern.pattern.converters:
+                report['skipped'][name] = 'URL takes arguments and has no scenario'
+                continue
+            scenarios = [Scenario()]
+        for scenario in scenarios:
+            key = f'{scenario.method.upper()} {name}' + (f' [{scenario.label}]' if scenario.label else '')
+            missing = [needed for needed in scenario.requires if ctx[needed] is None]
+            if missing:
+                report['skipped'][key] = f"no {', '.join(missing)} in the database"
+                continue
+            report['urls'][key] = time_scenario(name, scenario, ctx, iterations)
+    for name, fn in ORM_PATHS.items():
+        report['orm'][name] = time_callable(fn, ctx, iterations)
+    report['asgi'] = compare_asgi(ctx, iterations)
+    return report
+
@@ -0,0 +1,104 @@
+import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import ledger, revenue
+from .models import Billing, FoodOrder, Payment, Person, RoomBooking, RoomNight, RoomRate, ServiceOrder
+
+
+def _unpaid(model, field):
+    # SELECT [field] FROM [model table] WHERE ordered_by_id = website_person.id AND payment_status = 'unpaid' GROUP BY ordered_by_id
+    return Subquery(
+        model.objects.filter(ordered_by=OuterRef('pk'), payment_status=model.UNPAID)
+        .values('ordered_by').annotate(value=field).values('value')[:1]
+    )
+
+
+def outstanding_balance(user):
+    """
+    Return the guest's unpaid food and service totals in one aggregate query.
+
+    The result also carries the highest unpaid order id of each kind, so a
+    settlement only marks the orders this balance was computed from.
+    """
+    # SELECT (SELECT SUM(total_price) ...), (SELECT MAX(id) ...), ... FROM website_person WHERE id = [user_id];
+    return Person.objects.filter(pk=user.pk).annotate(
+        food_total=Coalesce(_unpaid(FoodOrder, Sum('total_price')), Value(0), output_field=IntegerField()),
+        food_last_id=_unpaid(FoodOrder, Max('pk')),
+        service_total=Coalesce(_unpaid(ServiceOrder, Sum('total_price')), Value(0), output_field=IntegerField()),
+        service_last_id=_unpaid(ServiceOrder, Max('pk')),
+    ).values('food_total', 'food_last_id', 'service_total', 'service_last_id').get()
+
+
+def _mark_paid(user, balance):
+    # Bulk updates skip the model signals, so the ledger is adjusted here.
+    ledger.adjust(user.pk, food_due=-balance['food_total'], service_due=-balance['service_total'])
+    if balance['food_last_id'] is not None:
+        FoodOrder.objects.filter(
+            ordered_by=user, payment_status=FoodOrder.UNPAID, pk__lte=balance['food_last_id']
+        ).update(payment_status=FoodOrder.PAID, updated_at=timezone.now()) # UPDATE website_foodorder SET payment_status = 'paid', updated_at = [now] WHERE ordered_by_id = [user_id] AND payment_status = 'unpaid' AND id <= [food_last_id];
+    if balance['service_last_id'] is not None:
+        ServiceOrder.objects.filter(
+            ordered_by=user, payment_status=ServiceOrder.UNPAID, pk__lte=balance['service_last_id']
+        ).update(payment_status=ServiceOrder.PAID, updated_at=timezone.now()) # UPDATE website_serviceorder SET payment_status = 'paid', updated_at = [now] WHERE ordered_by_id = [user_id] AND payment_status = 'unpaid' AND id <= [service_last_id];
+
+
+def settle(user, payment_method):
+    """
+    Pay off the guest's outstanding balance.
+
+    Marks their unpaid orders as paid and records the Payment and Billing rows
+    in a single transaction. Returns the Payment, or None if nothing was owed.
+    """
+    with transaction.atomic():
+        balance = outstanding_balance(user)
+        amount = Decimal(balance['food_total'] + balance['service_total'])
+        if not amount:
+            return None
+        _mark_paid(user, balance)
+        payment = Payment.objects.create(user=user, amount=amount, payment_method=payment_method) # INSERT INTO website_payment (user_id, amount, payment_method) VALUES (...);
+        Billing.objects.create(user=user, amount=amount, status=Billing.PAID) # INSERT INTO website_billing (user_id, amount, status) VALUES (...);
+    return payment
+
+
+def close_folio(booking):
+    """
+    Check a guest out of ``booking``.
+
+    Bills the nights the guest stayed together with their unpaid food and
+    service orders, marks those orders paid, shortens the stay to the nights
+    kept and puts the rest back on sale, all in one transaction and a fixed
+    number of queries. Tonight counts as released: checking out today means
+    not sleeping here tonight. Returns the Billing, or None if the stay was
+    already closed.
+    """
+    guest = booking.booked_by
+    now = timezone.now()
+    kept = min(booking.num_nights, max((timezone.localdate(now) - booking.check_in).days, 0))
+    before = revenue.contribution(booking)
+    if kept < booking.num_nights:
+        room_price = RoomRate.stay_price(booking.room, booking.check_in, kept)
+    else:
+        room_price = booking.total_price
+    check_out = booking.check_in + datetime.timedelta(days=kept)
+    with transaction.atomic():
+        # Claiming the stay first makes a repeated or concurrent checkout bill nothing.
+        closed = RoomBooking.objects.filter(pk=booking.pk, checked_out_at__isnull=True).update(
+            checked_out_at=now, updated_at=now, num_nights=kept, check_out=check_out, total_price=room_price,
+        ) # UPDATE website_roombooking SET checked_out_at = [now], num_nights = [kept], check_out = ..., total_price = ... WHERE id = [booking_id] AND checked_out_at IS NULL;
+        if not closed:
+            return None
+        # Bulk updates skip the model signals, so the rollups are adjusted here.
+        ledger.adjust(guest.pk, room_due=-booking.total_price)
+        booking.checked_out_at, booking.num_nights, booking.check_out, booking.total_price = now, kept, check_out, room_price
+        revenue.record(before, revenue.contribution(booking))
+        balance = outstanding_balance(guest)
+        _mark_paid(guest, balance)
+        RoomNight.objects.filter(booking=booking, night__gte=check_out).delete() # DELETE FROM website_roomnight WHERE booking_id = [booking_id] AND night >= [check_out];
+        amount = room_price + balance['food_total'] + balance['service_total']
+        billing = Billing.objects.create(user=guest, booking=booking, amount=amount, status=Billing.PAID) # INSERT INTO website_billing (user_id, booking_id, amount, status) VALUES (...);
+    return billing
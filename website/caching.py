@@ -0,0 +1,38 @@
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+
+def _page_key(request):
+    query = hashlib.md5(request.META.get('QUERY_STRING', '').encode()).hexdigest()
+    return f'page:{request.path}:{query}'
+
+
+def anonymous_page_cache(view_func):
+    """
+    Serve a public page from the cache to anonymous visitors.
+
+    Anonymous GET/HEAD responses are cached per URL, whatever cookies the
+    visitor sends, for PUBLIC_PAGE_CACHE_SECONDS. Signed-in users always get a
+    fresh render, so the navbar reflects their session. Every response varies
+    on Cookie so shared caches never hand an anonymous page to a signed-in user.
+    """
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        cacheable = request.method in ('GET', 'HEAD') and not request.user.is_authenticated
+        if cacheable:
+            key = _page_key(request)
+            response = cache.get(key)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code == 200 and not response.cookies:
+                    cache.set(key, response, settings.PUBLIC_PAGE_CACHE_SECONDS)
+        else:
+            response = view_func(request, *args, **kwargs)
+            patch_cache_control(response, private=True)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return wrapper
@@ -0,0 +1,107 @@
+import collections
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Food, Room, Service
+
+CATALOGS = {
+    'rooms': lambda: Room.objects.order_by('room_number'),
+    'foods': lambda: Food.objects.order_by('food_item_number'),
+    'services': lambda: Service.objects.order_by('service_id'),
+}
+CATALOG_MODELS = {Room: 'rooms', Food: 'foods', Service: 'services'}
+CACHE_TIMEOUT = 24 * 60 * 60
+LOCAL_SIZE = 32
+
+
+class LocalLRU:
+    def __init__(self, maxsize=LOCAL_SIZE):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.items = collections.OrderedDict()  # key -> (expires at, value)
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.items:
+                return None
+            expires, value = self.items[key]
+            if expires <= time.monotonic():
+                del self.items[key]
+                return None
+            self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.items[key] = (time.monotonic() + timeout, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+local_cache = LocalLRU()
+
+
+def _version_key(name):
+    return f'catalog:{name}:version'
+
+
+def version(name):
+    # A fresh version is time-based so an expired or lost version key never reuses an old number.
+    return cache.get_or_set(_version_key(name), time.time_ns(), timeout=settings.CATALOG_MAX_AGE)
+
+
+def get(name):
+    """
+    Return every row of a catalog ('rooms', 'foods' or 'services') as a tuple.
+
+    Lookups go process-local LRU -> Django cache -> database, keyed by the
+    catalog's current version, so a bumped version makes every process that
+    shares the cache reload on its next read. The version and the local copy
+    expire after CATALOG_MAX_AGE seconds, which bounds how stale a catalog can
+    be where the cache is not shared, as with the per-process LocMemCache.
+    Callers must not modify the returned objects.
+    """
+    current = version(name)
+    key = f'catalog:{name}:{current}'
+    items = local_cache.get(key)
+    if items is None:
+        items = cache.get(key)
+        if items is None:
+            items = tuple(CATALOGS[name]()) # SELECT * FROM website_[room|food|service] ORDER BY ...;
+            cache.set(key, items, CACHE_TIMEOUT)
+        local_cache.set(key, items, settings.CATALOG_MAX_AGE)
+    return items
+
+
+def _bump(name):
+    try:
+        cache.incr(_version_key(name))
+    except ValueError:
+        cache.set(_version_key(name), time.time_ns(), timeout=settings.CATALOG_MAX_AGE)
+
+
+def invalidate(name):
+    _bump(name)
+    # Bump again once the write is visible to other connections, in case one of
+    # them re-cached the old rows while the transaction was still open.
+    transaction.on_commit(lambda: _bump(name))
+
+
+def invalidate_all():
+    for name in CATALOGS:
+        invalidate(name)
+
+
+def clear():
+    local_cache.clear()
+    for name in CATALOGS:
+        cache.delete(_version_key(name))
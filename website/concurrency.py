@@ -0,0 +1,57 @@
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections, connection, connections
+
+
+def async_login_required(view_func):
+    """login_required for async views."""
+    @functools.wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        # Templates read request.user; give them the user already loaded instead of a lazy sync lookup.
+        request.user = user
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def _in_transaction():
+    return connection.in_atomic_block
+
+
+def _in_worker_thread(load):
+    # Worker threads outlive the request, and so would their connections: treat
+    # each call like a request, honouring CONN_MAX_AGE on the way in and closing on the way out.
+    @functools.wraps(load)
+    def wrapper():
+        close_old_connections()
+        try:
+            return load()
+        finally:
+            for conn in connections.all(initialized_only=True):
+                conn.close()
+    return wrapper
+
+
+async def load_concurrently(loaders):
+    """
+    Call each loader in ``loaders`` (a dict of name -> callable returning
+    evaluated rows) and return a dict of name -> result.
+
+    Django's async ORM still funnels every query through one shared thread,
+    so awaiting several querysets at once would run them back to back. Each
+    loader here runs in its own worker thread instead, on that thread's own
+    database connection, closed again when the loader returns, so the slowest
+    section bounds the total time.
+    Inside a transaction other connections cannot see its writes, so then
+    the loaders run one after another on the request's connection.
+    """
+    if await sync_to_async(_in_transaction)():
+        results = [await sync_to_async(load)() for load in loaders.values()]
+    else:
+        results = await asyncio.gather(*(sync_to_async(_in_worker_thread(load), thread_sensitive=False)() for load in loaders.values()))
+    return dict(zip(loaders, results))
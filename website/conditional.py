@@ -0,0 +1,82 @@
+import hashlib
+import os
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.template.loader import get_template
+
+from . import catalog, images, roles
+from .models import FoodOrder, Person, RoomBooking, ServiceOrder
+
+# model -> the field naming the guest a row belongs to, for the guest dashboard's fingerprint.
+DASHBOARD_SOURCES = {
+    'bookings': (RoomBooking, 'booked_by'),
+    'food_orders': (FoodOrder, 'ordered_by'),
+    'service_orders': (ServiceOrder, 'ordered_by'),
+}
+
+_template_paths = {}
+
+
+def _etag(*parts):
+    return hashlib.sha256('\x1f'.join(str(part) for part in parts).encode()).hexdigest()[:32]
+
+
+def _template_mtime(name):
+    if name not in _template_paths:
+        _template_paths[name] = get_template(name).origin.name
+    return os.stat(_template_paths[name]).st_mtime_ns
+
+
+def _manifest_mtime():
+    try:
+        return os.stat(images.manifest_path()).st_mtime_ns
+    except OSError:
+        return None
+
+
+def page_etag(*template_names):
+    """
+    Build an etag_func for django.views.decorators.http.condition on a page
+    that shows no rows: it changes with the templates, the image manifest and
+    whether the visitor is signed in (the navbar), and costs a few stat calls.
+    """
+    def etag(request, *args, **kwargs):
+        mtimes = [_template_mtime(name) for name in template_names]
+        return _etag(request.path, request.user.is_authenticated, _manifest_mtime(), *mtimes)
+    return etag
+
+
+def _latest(model, owner, aggregate):
+    # SELECT MAX(updated_at) / COUNT(*) FROM [table] WHERE [owner]_id = website_person.id
+    return Subquery(
+        model.objects.filter(**{owner: OuterRef('pk')}).order_by().values(owner).annotate(value=aggregate).values('value')[:1]
+    )
+
+
+def dashboard_fingerprint(user):
+    """
+    The newest change and row count of each of the guest's dashboard sections,
+    in one aggregate query over the owner indexes. Counts catch deletions,
+    which leave no newer timestamp behind.
+    """
+    annotations = {}
+    for name, (model, owner) in DASHBOARD_SOURCES.items():
+        annotations[f'{name}_changed'] = _latest(model, owner, Max('updated_at'))
+        annotations[f'{name}_count'] = _latest(model, owner, Count('pk'))
+    # SELECT (SELECT MAX(updated_at) ...), (SELECT COUNT(*) ...), ... FROM website_person WHERE id = [user_id];
+    return Person.objects.filter(pk=user.pk).annotate(**annotations).values(*annotations).get()
+
+
+def dashboard_etag(request, *args, **kwargs):
+    """ETag of a guest's dashboard; None for staff, whose dashboard shows everyone's rows."""
+    if not request.user.is_authenticated or roles.is_employee(request):
+        return None
+    fingerprint = dashboard_fingerprint(request.user)
+    return _etag(
+        request.user.pk, request.user.first_name, request.GET.urlencode(),
+        *(fingerprint[key] for key in sorted(fingerprint)),
+        *(catalog.version(name) for name in catalog.CATALOGS),
+        # The page carries a CSRF token; a new CSRF secret must not be answered with the old page.
+        request.META.get('CSRF_COOKIE'),
+        _template_mtime('website/dashboard.html'), _template_mtime('base.html'), _manifest_mtime(),
+    )
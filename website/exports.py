@@ -0,0 +1,89 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+from .models import Billing, FoodOrder, Payment, RoomBooking, ServiceOrder
+
+CHUNK_SIZE = 2000
+FORMATS = {'csv': 'text/csv', 'json': 'application/json'}
+
+# dataset -> (model, date field for range filters, exported columns)
+DATASETS = {
+    'bookings': (RoomBooking, 'booking_date', (
+        'id', 'room__room_number', 'room__room_type', 'booked_by__username', 'booking_date', 'check_out', 'num_nights', 'total_price',
+    )),
+    'food_orders': (FoodOrder, 'order_date', (
+        'id', 'food__food_item_number', 'food__food_type', 'ordered_by__username', 'order_date', 'quantity', 'total_price', 'payment_status',
+    )),
+    'service_orders': (ServiceOrder, 'order_date', (
+        'id', 'service__service_id', 'service__service_type', 'ordered_by__username', 'order_date', 'quantity', 'total_price', 'payment_status',
+    )),
+    'payments': (Payment, 'payment_date', (
+        'id', 'user__username', 'payment_date', 'amount', 'payment_method', 'food_order_id', 'service_order_id',
+    )),
+    'billings': (Billing, 'payment_date', (
+        'id', 'user__username', 'booking_id', 'payment_date', 'amount', 'status',
+    )),
+}
+
+
+def rows(dataset, start=None, end=None):
+    """
+    Iterate over a dataset's rows as tuples, oldest first, for days in
+    [start, end] (either bound may be None). Rows are fetched CHUNK_SIZE at
+    a time (a server-side cursor where the database has one), so memory use
+    does not grow with the export.
+    """
+    model, date_field, columns = DATASETS[dataset]
+    if isinstance(model._meta.get_field(date_field), models.DateTimeField):
+        date_field = f'{date_field}__date'
+    queryset = model.objects.order_by('pk')
+    if start:
+        queryset = queryset.filter(**{f'{date_field}__gte': start})
+    if end:
+        queryset = queryset.filter(**{f'{date_field}__lte': end})
+    # SELECT [columns] FROM [table] ... WHERE [date] BETWEEN [start] AND [end] ORDER BY id;
+    return queryset.values_list(*columns).iterator(chunk_size=CHUNK_SIZE)
+
+
+class _Echo:
+    """A file-like object whose write() returns the line, for csv.writer in a generator."""
+
+    def write(self, value):
+        return value
+
+
+def _batched(lines):
+    # Hand the server a few hundred rows per write rather than one.
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == 500:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def _csv(dataset, records):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(DATASETS[dataset][2])
+    yield from _batched(writer.writerow(record) for record in records)
+
+
+def _json(dataset, records):
+    columns = DATASETS[dataset][2]
+    encoder = DjangoJSONEncoder()
+    yield '['
+    yield from _batched(
+        (',\n' if i else '\n') + encoder.encode(dict(zip(columns, record)))
+        for i, record in enumerate(records)
+    )
+    yield '\n]\n'
+
+
+def stream(dataset, fmt='csv', start=None, end=None):
+    """Yield a dataset export as text chunks in ``fmt`` ('csv' or 'json'); the first chunk is ready before any query runs."""
+    records = rows(dataset, start, end)
+    return _csv(dataset, records) if fmt == 'csv' else _json(dataset, records)
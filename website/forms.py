@@ -1,6 +1,14 @@
+import datetime
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
-from .models import Person, Room, RoomBooking, Food, FoodOrder, Service, ServiceOrder
+from django.utils import timezone
+from . import catalog
+from .analytics import MAX_NIGHTS
+from .api import MAX_LIMIT
+from .availability import free_rooms
+from .exports import FORMATS
+from .models import Person, Room, RoomBooking, RoomRate, FoodOrder, ServiceOrder
 
 class SignUpForm(UserCreationForm):
     email = forms.EmailField(max_length=254, help_text='Required. Enter a valid email address.')
@@ -16,31 +24,187 @@ class LoginForm(forms.Form):
     username = forms.CharField(max_length=150)
     password = forms.CharField(widget=forms.PasswordInput)
 
-class RoomBookingForm(forms.ModelForm):
-    room_type = forms.ChoiceField(choices=Room.ROOM_TYPES, required=False)
+class CatalogChoiceField(forms.ModelChoiceField):
+    """A ModelChoiceField that offers and validates against a list of cached objects instead of querying."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.catalog = []
+
+    def set_catalog(self, objects):
+        self.catalog = list(objects)
+        self.choices = [('', self.empty_label)] + [(obj.pk, self.label_from_instance(obj)) for obj in self.catalog]
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        for obj in self.catalog:
+            if str(obj.pk) == str(value):
+                return obj
+        raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+
+
+class CatalogModelForm(forms.ModelForm):
+    def _get_validation_exclusions(self):
+        # The catalog field already picked a row that exists; skip the model's per-FK existence query.
+        exclude = super()._get_validation_exclusions()
+        exclude.update(name for name, field in self.fields.items() if isinstance(field, CatalogChoiceField))
+        return exclude
+
+
+class RoomBookingForm(CatalogModelForm):
+    room_type = forms.ChoiceField(choices=[('', 'Any')] + Room.ROOM_TYPES, required=False)
 
     def __init__(self, *args, **kwargs):
         super(RoomBookingForm, self).__init__(*args, **kwargs)
-        self.fields['room'].queryset = Room.objects.filter(is_available=True)
+        check_in, check_out = self.requested_stay()
+        room_type = self.data.get('room_type') if self.is_bound else self.initial.get('room_type')
+        # Only rooms free for every requested night are offered or accepted.
+        self.fields['room'].set_catalog(free_rooms(check_in, check_out, room_type))
+
+    def requested_stay(self):
+        values = self.data if self.is_bound else self.initial
+        check_in = timezone.localdate()
+        num_nights = 1
+        try:
+            check_in = self.fields['booking_date'].clean(values.get('booking_date')) or check_in
+        except forms.ValidationError:
+            pass
+        try:
+            num_nights = min(max(int(values.get('num_nights')), 1), RoomBooking.MAX_NIGHTS)
+        except (TypeError, ValueError):
+            pass
+        try:
+            return check_in, check_in + datetime.timedelta(days=num_nights)
+        except OverflowError:
+            # A check-in near date.max; clean() reports it, so offer tonight's rooms meanwhile.
+            check_in = timezone.localdate()
+            return check_in, check_in + datetime.timedelta(days=1)
+
+    def quotes(self):
+        """(room, price) for each offered room, priced for the requested stay from the rate table as booking charges it."""
+        rooms = self.fields['room'].catalog
+        if not rooms:
+            return []
+        check_in, check_out = self.requested_stay()
+        prices = RoomRate.stay_prices(rooms, check_in, (check_out - check_in).days)
+        return [(room, prices[room.pk]) for room in rooms]
+
+    def clean_num_nights(self):
+        num_nights = self.cleaned_data['num_nights']
+        if num_nights < 1:
+            raise forms.ValidationError('Book at least one night.')
+        return num_nights
 
     class Meta:
         model = RoomBooking
         fields = ['room', 'num_nights', 'booking_date']
+        field_classes = {'room': CatalogChoiceField}
 
-class ServiceBookingForm(forms.ModelForm):
+class ServiceBookingForm(CatalogModelForm):
     class Meta:
         model = ServiceOrder
         fields = ['service', 'quantity']
+        field_classes = {'service': CatalogChoiceField}
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['service'].queryset = Service.objects.all()
+        self.fields['service'].set_catalog(catalog.get('services'))
+
+    def clean_quantity(self):
+        quantity = self.cleaned_data['quantity']
+        if quantity < 1:
+            raise forms.ValidationError('Order at least one.')
+        return quantity
 
-class FoodOrderForm(forms.ModelForm):
+class FoodOrderForm(CatalogModelForm):
     class Meta:
         model = FoodOrder
         fields = ['food', 'quantity']
+        field_classes = {'food': CatalogChoiceField}
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['food'].queryset = Food.objects.all()
\ No newline at end of file
+        self.fields['food'].set_catalog(catalog.get('foods'))
+
+    def clean_quantity(self):
+        quantity = self.cleaned_data['quantity']
+        if quantity < 1:
+            raise forms.ValidationError('Order at least one.')
+        return quantity
+
+class DashboardFilterForm(forms.Form):
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    status = forms.ChoiceField(choices=[('', 'Any')] + FoodOrder.PAYMENT_STATUS_CHOICES, required=False,
+                               widget=forms.Select(attrs={'class': 'form-select'}))
+    room = forms.CharField(max_length=50, required=False, widget=forms.TextInput(attrs={'class': 'form-control'}))
+
+    def filter_bookings(self, queryset):
+        data = self.cleaned_data
+        if data.get('date_from'):
+            queryset = queryset.filter(booking_date__gte=data['date_from'])
+        if data.get('date_to'):
+            queryset = queryset.filter(booking_date__lte=data['date_to'])
+        if data.get('room'):
+            queryset = queryset.filter(room__room_number=data['room'])
+        return queryset
+
+    def filter_orders(self, queryset):
+        data = self.cleaned_data
+        if data.get('date_from'):
+            queryset = queryset.filter(order_date__gte=data['date_from'])
+        if data.get('date_to'):
+            queryset = queryset.filter(order_date__lte=data['date_to'])
+        if data.get('status'):
+            queryset = queryset.filter(payment_status=data['status'])
+        return queryset
+
+
+class AnalyticsRangeForm(forms.Form):
+    date_from = forms.DateField(widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    date_to = forms.DateField(widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from, date_to = cleaned_data.get('date_from'), cleaned_data.get('date_to')
+        if date_from and date_to:
+            if date_to < date_from:
+                raise forms.ValidationError('The end date must not be before the start date.')
+            if (date_to - date_from).days + 1 > MAX_NIGHTS:
+                raise forms.ValidationError(f'Choose a range of at most {MAX_NIGHTS} nights.')
+        return cleaned_data
+
+
+class ExportForm(forms.Form):
+    format = forms.ChoiceField(choices=[(fmt, fmt.upper()) for fmt in FORMATS], required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+
+class ApiPageForm(forms.Form):
+    fields = forms.CharField(required=False)
+    after = forms.IntegerField(required=False, min_value=0)
+    limit = forms.IntegerField(required=False, min_value=1, max_value=MAX_LIMIT)
+
+    def __init__(self, data, columns):
+        super().__init__(data)
+        self.columns = columns
+
+    def clean(self):
+        cleaned_data = super().clean()
+        names = [name.strip() for name in (cleaned_data.get('fields') or '').split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.columns]
+        if unknown:
+            self.add_error('fields', f"Unknown fields: {', '.join(unknown)}. Choose from: {', '.join(self.columns)}.")
+        cleaned_data['fields'] = names
+        return cleaned_data
+
+
+class PaymentForm(forms.Form):
+    PAYMENT_METHODS = [
+        ('card', 'Card'),
+        ('cash', 'Cash'),
+        ('mobile', 'Mobile Banking'),
+    ]
+    payment_method = forms.ChoiceField(choices=PAYMENT_METHODS, initial='card', widget=forms.Select(attrs={'class': 'form-select'}))
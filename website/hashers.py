@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with the work factor taken from
+    settings.PASSWORD_HASH_ITERATIONS. It keeps the pbkdf2_sha256 algorithm
+    name, so existing hashes verify unchanged; a hash at any other cost is
+    rewritten at the configured one on the owner's next successful login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', PBKDF2PasswordHasher.iterations)
@@ -0,0 +1,116 @@
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+
+WIDTHS = (320, 640, 960, 1280, 1920)
+JPEG_QUALITY = 75
+WEBP_QUALITY = 70
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+OUTPUT_PREFIX = 'responsive'
+MANIFEST_NAME = 'manifest.json'
+EXTENSIONS = {'jpeg': 'jpg', 'png': 'png', 'webp': 'webp'}
+
+
+def output_root():
+    # Variants live inside the first static dir, so staticfiles finds and collects them like any other file.
+    return Path(settings.STATICFILES_DIRS[0]) / OUTPUT_PREFIX
+
+
+def manifest_path():
+    return output_root() / MANIFEST_NAME
+
+
+_manifest = {'key': None, 'entries': {}}
+
+
+def manifest():
+    """Return the image manifest, re-reading it only when the file changes."""
+    path = manifest_path()
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return {}
+    if (path, mtime) != _manifest['key']:
+        with open(path) as f:
+            _manifest['entries'] = json.load(f)
+        _manifest['key'] = (path, mtime)
+    return _manifest['entries']
+
+
+def _hashed_name(stem, width, data, extension):
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    return f'{stem}-{width}w.{digest}.{extension}'
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'jpeg':
+        image.convert('RGB').save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif fmt == 'png':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+    return buffer.getvalue()
+
+
+def build_variants(source, relative_name, previous=None, widths=WIDTHS):
+    """
+    Write resized WebP variants of one source image under output_root(), plus
+    fallback variants for browsers without WebP: JPEG, or PNG for images with
+    transparency.
+
+    Returns the manifest entry. If ``previous`` was built from the same source
+    bytes and its files still exist, it is returned unchanged.
+    """
+    from PIL import Image, ImageOps
+
+    source_bytes = Path(source).read_bytes()
+    source_hash = hashlib.sha256(source_bytes).hexdigest()
+    root = output_root()
+    if previous and previous.get('source_hash') == source_hash and all(
+        (root.parent / variant['path']).exists()
+        for variants in previous['variants'].values() for variant in variants
+    ):
+        return previous
+
+    stem = Path(relative_name).with_suffix('')
+    target_dir = root / stem.parent
+    target_dir.mkdir(parents=True, exist_ok=True)
+    with Image.open(io.BytesIO(source_bytes)) as original:
+        original = ImageOps.exif_transpose(original)
+        has_alpha = original.mode in ('RGBA', 'LA', 'PA') or 'transparency' in original.info
+        original = original.convert('RGBA' if has_alpha else 'RGB')
+        fallback = 'png' if has_alpha else 'jpeg'
+        width, height = original.size
+        targets = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+        entry = {
+            'source_hash': source_hash, 'width': width, 'height': height,
+            'variants': {'fallback': [], 'webp': []},
+        }
+        for target in targets:
+            resized = original if target == width else original.resize(
+                (target, round(height * target / width)), Image.Resampling.LANCZOS
+            )
+            for key, fmt in (('fallback', fallback), ('webp', 'webp')):
+                extension = EXTENSIONS[fmt]
+                data = _encode(resized, fmt)
+                name = _hashed_name(stem.name, target, data, extension)
+                (target_dir / name).write_bytes(data)
+                entry['variants'][key].append({
+                    'width': target,
+                    'path': f'{OUTPUT_PREFIX}/{(stem.parent / name).as_posix()}',
+                    'bytes': len(data),
+                })
+    return entry
+
+
+def write_manifest(entries):
+    path = manifest_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(entries, indent=2, sort_keys=True))
+    os.replace(tmp, path)
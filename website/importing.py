@@ -0,0 +1,196 @@
+import csv
+import itertools
+import json
+from pathlib import Path
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from . import catalog
+from .models import Food, InventoryItem, Person, PhoneNumber, Room, Service
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+
+# kind -> (model, unique key, importable columns)
+KINDS = {
+    'rooms': (Room, 'room_number', ('room_number', 'num_beds', 'room_type', 'price', 'is_available')),
+    'foods': (Food, 'food_item_number', ('food_item_number', 'description', 'price', 'food_type')),
+    'services': (Service, 'service_id', ('service_id', 'description', 'price', 'service_type')),
+    'guests': (Person, 'username', ('username', 'email', 'first_name', 'last_name', 'password', 'phone_number')),
+    'inventory': (InventoryItem, 'name', ('name', 'quantity', 'low_stock_threshold')),
+}
+# Columns that are not fields of the model itself.
+EXTRA_COLUMNS = {'guests': ('phone_number',)}
+
+
+class ImportFailed(Exception):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f'{len(errors)} invalid rows')
+
+
+def read_records(path, fmt=None):
+    """Yield (line number, {column: value}) from a CSV file with a header row or a JSON Lines file."""
+    fmt = fmt or ('jsonl' if Path(path).suffix.lower() in ('.jsonl', '.ndjson') else 'csv')
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_number, json.loads(line)
+
+
+def check_columns(kind, columns):
+    """Raise ImportFailed unless ``columns`` can create new rows of ``kind``."""
+    model, key, allowed = KINDS[kind]
+    errors = [(0, f"unknown column '{column}'") for column in columns if column not in allowed]
+    for name in allowed:
+        if name in EXTRA_COLUMNS.get(kind, ()) or name == 'password':
+            continue
+        field = model._meta.get_field(name)
+        if name not in columns and not field.has_default() and not field.null:
+            errors.append((0, f"missing column '{name}'"))
+    if errors:
+        raise ImportFailed(errors)
+
+
+def _clean(field, value):
+    if value is None or value == '':
+        if field.has_default():
+            return field.get_default()
+        value = None
+    return field.clean(value, None)
+
+
+def _column_problems(kind, record, columns):
+    # Every record needs the first record's columns: they decide what the upsert overwrites.
+    allowed = KINDS[kind][2]
+    problems = []
+    for name in record:
+        if name not in allowed:
+            problems.append(f"unknown column '{name}'")
+        elif name not in columns:
+            problems.append(f"column '{name}' is not in the first record")
+    problems.extend(f"missing column '{name}'" for name in columns if name not in record)
+    return problems
+
+
+def clean_batch(kind, batch, columns):
+    """
+    Validate one batch of (line number, record) pairs against the import's
+    ``columns``. Returns ({key: unsaved instance}, {key: phone number},
+    [(line number, error)]). A key repeated within the batch keeps its last row.
+    """
+    model, key, _ = KINDS[kind]
+    extra = EXTRA_COLUMNS.get(kind, ())
+    objects, phones, errors = {}, {}, []
+    # One unusable password per batch: generating a random one per row costs a third of the import.
+    unusable_password = make_password(None)
+    for line_number, record in batch:
+        if not isinstance(record, dict):
+            errors.append((line_number, 'not an object of column values'))
+            continue
+        problems = _column_problems(kind, record, columns)
+        if problems:
+            errors.append((line_number, '; '.join(problems)))
+            continue
+        values = {}
+        for name, raw in record.items():
+            if name == 'phone_number' and raw:
+                try:
+                    PhoneNumber._meta.get_field('number').clean(raw, None)
+                except ValidationError as exc:
+                    problems.append(f"phone_number: {' '.join(exc.messages)}")
+            if name in extra:
+                continue
+            if name == 'password':
+                # Only pre-hashed passwords: hashing 100k plain passwords would take hours.
+                if raw:
+                    try:
+                        identify_hasher(raw)
+                    except ValueError:
+                        problems.append('password: not a recognised password hash')
+                values[name] = raw or unusable_password
+                continue
+            try:
+                values[name] = _clean(model._meta.get_field(name), raw)
+            except ValidationError as exc:
+                problems.append(f"{name}: {' '.join(exc.messages)}")
+        if problems:
+            errors.append((line_number, '; '.join(problems)))
+            continue
+        if kind == 'guests':
+            values.setdefault('password', unusable_password)
+            if record.get('phone_number'):
+                phones[values[key]] = record['phone_number']
+        objects[values[key]] = model(**values)
+    return objects, phones, errors
+
+
+def _upsert(model, key, objects, update_fields):
+    # INSERT ... ON CONFLICT ([key]) DO UPDATE SET ...;
+    model.objects.bulk_create(
+        objects, update_conflicts=bool(update_fields), ignore_conflicts=not update_fields,
+        unique_fields=[key] if connection.features.supports_update_conflicts_with_target else None,
+        update_fields=update_fields or None,
+    )
+
+
+def _write(kind, objects, phones, update_fields):
+    model, key, _ = KINDS[kind]
+    existing = set(model.objects.filter(**{f'{key}__in': objects}).values_list(key, flat=True)) # SELECT [key] FROM [table] WHERE [key] IN (...);
+    if 'password' in update_fields:
+        # An empty password cell gives new guests an unusable password but leaves existing guests' passwords alone.
+        blank = [obj for obj in objects.values() if obj.password.startswith(UNUSABLE_PASSWORD_PREFIX)]
+        _upsert(model, key, [obj for obj in objects.values() if not obj.password.startswith(UNUSABLE_PASSWORD_PREFIX)], update_fields)
+        _upsert(model, key, blank, [name for name in update_fields if name != 'password'])
+    else:
+        _upsert(model, key, objects.values(), update_fields)
+    if phones:
+        person_ids = dict(Person.objects.filter(username__in=phones).values_list('username', 'pk'))
+        PhoneNumber.objects.filter(person_id__in=person_ids.values()).delete()
+        PhoneNumber.objects.bulk_create([PhoneNumber(person_id=person_ids[username], number=number) for username, number in phones.items()])
+    return len(objects) - len(existing), len(existing)
+
+
+def run(kind, records, batch_size=BATCH_SIZE, skip_invalid=False):
+    """
+    Upsert ``records`` ((line number, {column: value}) pairs) as ``kind``
+    rows, matching existing rows on the kind's unique key and updating only
+    the columns present. Runs in one transaction: unless ``skip_invalid``,
+    any invalid row raises ImportFailed and nothing is written.
+
+    Returns {'created', 'updated', 'invalid', 'errors'}.
+    """
+    key = KINDS[kind][1]
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return {'created': 0, 'updated': 0, 'invalid': 0, 'errors': []}
+    if not isinstance(first[1], dict):
+        raise ImportFailed([(first[0], 'not an object of column values')])
+    columns = list(first[1])
+    check_columns(kind, columns)
+    update_fields = [name for name in columns if name != key and name not in EXTRA_COLUMNS.get(kind, ())]
+    report = {'created': 0, 'updated': 0, 'invalid': 0, 'errors': []}
+    with transaction.atomic():
+        records = itertools.chain([first], records)
+        while batch := list(itertools.islice(records, batch_size)):
+            objects, phones, errors = clean_batch(kind, batch, columns)
+            report['invalid'] += len(errors)
+            report['errors'].extend(errors[:MAX_REPORTED_ERRORS - len(report['errors'])])
+            if errors and not skip_invalid:
+                raise ImportFailed(report['errors'])
+            if objects:
+                created, updated = _write(kind, objects, phones, update_fields)
+                report['created'] += created
+                report['updated'] += updated
+        if kind in catalog.CATALOGS:
+            # bulk_create sends no post_save signals.
+            catalog.invalidate(kind)
+    return report
@@ -0,0 +1,136 @@
+import collections
+import contextvars
+import threading
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+# Metrics of the request being handled in this thread/task, or None outside a request.
+current_metrics = contextvars.ContextVar('current_metrics', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        # Async views may run queries for one request on several threads at once.
+        self.lock = threading.Lock()
+
+    @property
+    def wall_time(self):
+        return time.perf_counter() - self.started
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.queries += 1
+                self.sql_time += elapsed
+
+
+def record_current_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection):
+    """
+    Attach the query recorder to a database connection. Installed on every new
+    connection, in any thread, so queries are attributed to the request whose
+    context they run in, including sync_to_async worker threads.
+    """
+    if record_current_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_current_query)
+
+
+def query_budget(max_queries):
+    """Declare the most queries a view may issue per request; enforced by RequestMetricsMiddleware."""
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+class RollingStats:
+    """The last ``window`` requests per view, kept in process memory."""
+
+    def __init__(self, window=500):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self.budgets = {}
+
+    def add(self, view_name, metrics, wall_time, budget=None):
+        with self.lock:
+            self.samples[view_name].append((wall_time, metrics.sql_time, metrics.template_time, metrics.queries))
+            if budget is not None:
+                self.budgets[view_name] = budget
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.budgets.clear()
+
+    def snapshot(self):
+        with self.lock:
+            samples = {name: list(rows) for name, rows in self.samples.items()}
+            budgets = dict(self.budgets)
+        report = {}
+        for name, rows in sorted(samples.items()):
+            wall = sorted(row[0] for row in rows)
+            queries = [row[3] for row in rows]
+            report[name] = {
+                'requests': len(rows),
+                'wall_p50_ms': round(wall[(len(wall) - 1) // 2] * 1000, 3),
+                'wall_p95_ms': round(wall[max(int(len(wall) * 0.95 + 0.5) - 1, 0)] * 1000, 3),
+                'sql_mean_ms': round(sum(row[1] for row in rows) / len(rows) * 1000, 3),
+                'template_mean_ms': round(sum(row[2] for row in rows) / len(rows) * 1000, 3),
+                'queries_mean': round(sum(queries) / len(queries), 2),
+                'queries_max': max(queries),
+                'query_budget': budgets.get(name),
+            }
+        return report
+
+
+request_stats = RollingStats()
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The stock Django template backend, with render time added to the current
+    request's metrics. Queries run lazily while rendering are counted in both
+    the SQL and the template timings.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import FoodOrder, GuestBalance, Payment, RoomBooking, ServiceOrder
+
+BATCH_SIZE = 1000
+FIELDS = ('food_due', 'service_due', 'room_due', 'paid')
+
+# ledger field -> (model, guest field, amount field, filter) used by compute().
+SOURCES = {
+    'food_due': (FoodOrder, 'ordered_by', 'total_price', {'payment_status': FoodOrder.UNPAID}),
+    'service_due': (ServiceOrder, 'ordered_by', 'total_price', {'payment_status': ServiceOrder.UNPAID}),
+    'room_due': (RoomBooking, 'booked_by', 'total_price', {'checked_out_at__isnull': True}),
+    'paid': (Payment, 'user', 'amount', {}),
+}
+
+
+def contribution(instance):
+    """Return the (person id, ledger field, amount) a saved row adds to its guest's balance."""
+    if isinstance(instance, FoodOrder):
+        return instance.ordered_by_id, 'food_due', instance.total_price if instance.payment_status == FoodOrder.UNPAID else 0
+    if isinstance(instance, ServiceOrder):
+        return instance.ordered_by_id, 'service_due', (instance.total_price or 0) if instance.payment_status == ServiceOrder.UNPAID else 0
+    if isinstance(instance, RoomBooking):
+        return instance.booked_by_id, 'room_due', instance.total_price if instance.checked_out_at is None else 0
+    return instance.user_id, 'paid', instance.amount
+
+
+def adjust(person_id, **changes):
+    """Add each of ``changes`` (ledger field -> amount) to the guest's balance, in the caller's transaction."""
+    changes = {field: amount for field, amount in changes.items() if amount}
+    if not changes:
+        return
+    balance = GuestBalance.objects.filter(person_id=person_id)
+    # UPDATE website_guestbalance SET [field] = [field] + [amount], ... WHERE person_id = [person_id];
+    if balance.update(**{field: F(field) + amount for field, amount in changes.items()}):
+        return
+    try:
+        with transaction.atomic():
+            GuestBalance.objects.create(person_id=person_id, **changes)
+    except IntegrityError:
+        # Another transaction created the row in the meantime; add to it instead.
+        balance.update(**{field: F(field) + amount for field, amount in changes.items()})
+
+
+def record(before, after):
+    """
+    Apply the change from ``before`` to ``after`` (each a contribution() result,
+    or None for no row) to the ledger.
+    """
+    if before == after:
+        return
+    changes = defaultdict(lambda: defaultdict(int))
+    if before:
+        changes[before[0]][before[1]] -= before[2]
+    if after:
+        changes[after[0]][after[1]] += after[2]
+    for person_id, amounts in changes.items():
+        adjust(person_id, **amounts)
+
+
+def balance(person):
+    """The guest's balance, one primary-key lookup; a guest with no activity yet gets an unsaved zero balance."""
+    # SELECT * FROM website_guestbalance WHERE person_id = [person_id];
+    return GuestBalance.objects.filter(person_id=person.pk).first() or GuestBalance(person_id=person.pk)
+
+
+def compute():
+    """Recompute every guest's balance from the source rows: {person id: {field: amount}}."""
+    totals = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+    for field, (model, guest, amount, filters) in SOURCES.items():
+        # SELECT [guest]_id, SUM([amount]) FROM [source] WHERE ... GROUP BY [guest]_id;
+        rows = model.objects.filter(**filters).order_by().values(guest).annotate(total=Sum(amount))
+        for row in rows:
+            totals[row[guest]][field] = row['total'] or 0
+    return totals
+
+
+def drift():
+    """Return (person id, field, ledger amount, actual amount) for every ledger figure that disagrees with the source rows."""
+    actual = compute()
+    stored = {row['person_id']: row for row in GuestBalance.objects.values('person_id', *FIELDS)}
+    found = []
+    for person_id in sorted(actual.keys() | stored.keys()):
+        for field in FIELDS:
+            have = stored.get(person_id, {}).get(field, 0)
+            want = actual.get(person_id, {}).get(field, 0)
+            if have != want:
+                found.append((person_id, field, have, want))
+    return found
+
+
+def rebuild():
+    """Replace the whole ledger with balances recomputed from the source rows; returns the rows written."""
+    with transaction.atomic():
+        GuestBalance.objects.all().delete()
+        rows = [GuestBalance(person_id=person_id, **amounts) for person_id, amounts in compute().items()]
+        GuestBalance.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from website.models import InventoryItem
+
+
+def _change(value):
+    name, sep, amount = value.rpartition('=')
+    try:
+        if not sep or not name:
+            raise ValueError
+        return name, int(amount)
+    except ValueError:
+        raise CommandError(f"'{value}' is not NAME=AMOUNT, e.g. flour=+20 or napkins=-5.")
+
+
+class Command(BaseCommand):
+    help = (
+        'Restock or adjust several inventory items at once, e.g. "flour=+20 cheese=-3", in a single '
+        'UPDATE, and list the items at or below their low-stock threshold.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('changes', nargs='*', type=_change, help='NAME=AMOUNT pairs; AMOUNT is added to the stock.')
+
+    def handle(self, *args, **options):
+        changes = dict(options['changes'])
+        if changes:
+            ids = dict(InventoryItem.objects.filter(name__in=changes).values_list('name', 'pk'))
+            unknown = sorted(set(changes) - set(ids))
+            if unknown:
+                raise CommandError(f"Unknown inventory items: {', '.join(unknown)}")
+            updated = InventoryItem.objects.adjust({ids[name]: amount for name, amount in changes.items()})
+            self.stdout.write(self.style.SUCCESS(f'Adjusted {updated} items.'))
+        for item in InventoryItem.objects.low_stock().order_by('name'):
+            self.stdout.write(self.style.WARNING(f'{item.name:<40} {item.quantity:>6} (low stock at {item.low_stock_threshold})'))
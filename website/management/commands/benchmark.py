@@ -0,0 +1,73 @@
+import json
+import platform
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from website import benchmarks
+from website.seeding import DEFAULT_COUNTS, DEFAULT_PASSWORD, generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Time every URL in website.urls and the hot ORM paths, recording query counts and '
+        'p50/p95 latency, compare the sync views under WSGI with their async twins under ASGI, and write a JSON report that can be diffed between releases.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per scenario (default 20).')
+        parser.add_argument('--output', default='benchmark-report.json', help='Where to write the JSON report.')
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Multiplier for the seed_hotel default row counts used for the throwaway database.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated dataset.')
+        parser.add_argument('--current-db', action='store_true',
+                            help='Benchmark the configured database as-is instead of a freshly seeded test database.')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of the guests used for the login scenario.')
+
+    def handle(self, *args, **options):
+        counts = None
+        old_name = None
+        # Same request environment as the test runner: DEBUG off, testserver allowed, outgoing mail captured.
+        setup_test_environment()
+        if not options['current_db']:
+            # Benchmark against a throwaway database so real data is never touched.
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            counts = {name: max(int(count * options['scale']), 1) for name, count in DEFAULT_COUNTS.items()}
+            generate(counts, seed=options['seed'], password=options['password'])
+        try:
+            started = time.perf_counter()
+            results = benchmarks.run(iterations=options['iterations'], password=options['password'])
+            elapsed = time.perf_counter() - started
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'seed': None if options['current_db'] else options['seed'],
+            'dataset': counts,
+            **results,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+        for section in ('urls', 'orm'):
+            for name, stats in results[section].items():
+                self.stdout.write(f"{name:<40} {stats['queries']:>4} queries  p50 {stats['p50_ms']:>9.2f} ms  p95 {stats['p95_ms']:>9.2f} ms")
+        for name, stats in results['asgi'].items():
+            self.stdout.write(
+                f"{name:<40} WSGI p50 {stats['wsgi_p50_ms']:>9.2f} ms  p95 {stats['wsgi_p95_ms']:>9.2f} ms  "
+                f"ASGI p50 {stats['asgi_p50_ms']:>9.2f} ms  p95 {stats['asgi_p95_ms']:>9.2f} ms"
+            )
+        for name, reason in results['skipped'].items():
+            self.stdout.write(self.style.WARNING(f'{name:<40} skipped: {reason}'))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']} in {elapsed:.1f}s."))
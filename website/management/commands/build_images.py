@@ -0,0 +1,52 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from website import images
+
+
+class Command(BaseCommand):
+    help = (
+        'Build resized, recompressed JPEG/PNG and WebP variants of the static images, with '
+        'content-hashed names and a manifest used by the {% responsive_img %} template tag.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild every image even if its source is unchanged.')
+
+    def handle(self, *args, **options):
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            raise CommandError('build_images needs Pillow: pip install Pillow')
+
+        root = images.output_root()
+        previous = {} if options['force'] else images.manifest()
+        entries = {}
+        started = time.perf_counter()
+        for static_dir in map(Path, settings.STATICFILES_DIRS):
+            for source in sorted(static_dir.rglob('*')):
+                if source.suffix.lower() not in images.SOURCE_EXTENSIONS or root in source.parents:
+                    continue
+                name = source.relative_to(static_dir).as_posix()
+                entry = images.build_variants(source, name, previous.get(name))
+                entries[name] = entry
+                largest_webp = entry['variants']['webp'][-1]['bytes']
+                self.stdout.write(f"{name:<40} {source.stat().st_size / 1024:>8.0f} KB -> {largest_webp / 1024:>6.0f} KB webp "
+                                  f"at {entry['variants']['webp'][-1]['width']}px")
+        images.write_manifest(entries)
+
+        # Drop variants no longer referenced, e.g. from a replaced source image.
+        keep = {root.parent / variant['path'] for entry in entries.values()
+                for variants in entry['variants'].values() for variant in variants}
+        keep.add(images.manifest_path())
+        removed = 0
+        for path in root.rglob('*'):
+            if path.is_file() and path not in keep:
+                path.unlink()
+                removed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Built {len(entries)} images in {time.perf_counter() - started:.1f}s; removed {removed} stale files.'
+        ))
@@ -0,0 +1,36 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from website.exports import DATASETS, FORMATS, stream
+
+
+def _date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"'{value}' is not a date in YYYY-MM-DD format.")
+
+
+class Command(BaseCommand):
+    help = 'Stream bookings, orders, payments or billings as CSV or JSON, in constant memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--from', dest='start', type=_date, help='First day to export.')
+        parser.add_argument('--to', dest='end', type=_date, help='Last day to export.')
+        parser.add_argument('--output', default='-', help='File to write (default: standard output).')
+
+    def handle(self, *args, **options):
+        chunks = stream(options['dataset'], options['format'], options['start'], options['end'])
+        if options['output'] == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        started = time.perf_counter()
+        with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        self.stderr.write(f"Wrote {options['output']} in {time.perf_counter() - started:.1f}s.")
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from website import importing
+
+
+class Command(BaseCommand):
+    help = (
+        'Import rooms, foods, services, guests or inventory items from a CSV file (with a header row) or '
+        'a JSON Lines file, validating and upserting in batches on each kind\'s unique key. Guest '
+        'passwords must already be hashed; guests without one get an unusable password.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(importing.KINDS))
+        parser.add_argument('path', help='CSV or .jsonl file to import.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='File format (default: from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=importing.BATCH_SIZE, help='Rows validated and written per batch.')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Import the valid rows and report the rest, instead of importing nothing.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            report = importing.run(
+                options['kind'], importing.read_records(options['path'], options['format']),
+                batch_size=options['batch_size'], skip_invalid=options['skip_invalid'],
+            )
+        except importing.ImportFailed as exc:
+            for line_number, message in exc.errors:
+                self.stderr.write(f'line {line_number}: {message}' if line_number else message)
+            raise CommandError('Nothing was imported.')
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Could not read {options["path"]}: {exc}')
+        except IntegrityError as exc:
+            raise CommandError(f'Nothing was imported: {exc}')
+        elapsed = time.perf_counter() - started
+
+        for line_number, message in report['errors']:
+            self.stderr.write(f'line {line_number}: {message}')
+        rows = report['created'] + report['updated']
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {rows} {options['kind']} ({report['created']} created, {report['updated']} updated, "
+            f"{report['invalid']} invalid skipped) in {elapsed:.1f}s, {rows / max(elapsed, 1e-9):.0f} rows/s."
+        ))
@@ -0,0 +1,54 @@
+import datetime
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from website.analytics import MAX_NIGHTS, room_type_performance
+
+
+def _date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"'{value}' is not a date in YYYY-MM-DD format.")
+
+
+class Command(BaseCommand):
+    help = 'Report occupancy rate, ADR and RevPAR per room type for a range of nights.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', type=_date, help='First night (default: 29 days before --to).')
+        parser.add_argument('--to', dest='end', type=_date, help='Last night (default: today).')
+        parser.add_argument('--json', action='store_true', help='Print the full report, including per-night occupancy, as JSON.')
+
+    def handle(self, *args, **options):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            raise CommandError('occupancy_report needs NumPy: pip install numpy')
+
+        end = options['end'] or timezone.localdate()
+        start = options['start'] or end - datetime.timedelta(days=29)
+        if start > end:
+            raise CommandError('--from must not be after --to.')
+        if (end - start).days + 1 > MAX_NIGHTS:
+            raise CommandError(f'Choose a range of at most {MAX_NIGHTS} nights.')
+
+        started = time.perf_counter()
+        performance = room_type_performance(start, end)
+        elapsed = time.perf_counter() - started
+        if options['json']:
+            self.stdout.write(json.dumps(performance, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        self.stdout.write(f"{start} to {end} ({performance['nights']} nights)")
+        self.stdout.write(f"{'room type':<24} {'rooms':>6} {'sold':>9} {'occupancy':>10} {'ADR':>10} {'RevPAR':>10} {'revenue':>14}")
+        for row in [*performance['room_types'], {'label': 'All rooms', **performance['total']}]:
+            self.stdout.write(
+                f"{row['label']:<24} {row['rooms']:>6} {row['sold_nights']:>9} {row['occupancy']:>10.1%} "
+                f"{row['adr']:>10.2f} {row['revpar']:>10.2f} {row['revenue']:>14.2f}"
+            )
+        self.stdout.write(self.style.SUCCESS(f'Computed in {elapsed * 1000:.0f} ms.'))
@@ -0,0 +1,32 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from website import revenue
+
+
+def _date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"'{value}' is not a date in YYYY-MM-DD format.")
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the daily revenue rollup from bookings, orders and payments. Use it to backfill '
+        'the rollup, or to repair it after bulk loads that bypass model signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', type=_date, help='First day to rebuild (default: the earliest).')
+        parser.add_argument('--to', dest='end', type=_date, help='Last day to rebuild (default: the latest).')
+
+    def handle(self, *args, **options):
+        if options['start'] and options['end'] and options['start'] > options['end']:
+            raise CommandError('--from must not be after --to.')
+        started = time.perf_counter()
+        rows = revenue.rebuild(options['start'], options['end'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} daily revenue rows in {elapsed:.1f}s.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from website import ledger
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute every guest balance from their orders, stays and payments and report where the '
+        'running ledger has drifted. Use --fix to rewrite the ledger from the source rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rebuild the ledger after reporting drift.')
+
+    def handle(self, *args, **options):
+        found = ledger.drift()
+        for person_id, field, have, want in found:
+            self.stdout.write(f'guest {person_id}: {field} is {have}, should be {want}')
+        if not found:
+            self.stdout.write(self.style.SUCCESS('Every guest balance matches its source rows.'))
+            return
+        if options['fix']:
+            rows = ledger.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(found)} figures; rewrote {rows} balances.'))
+            return
+        raise CommandError(f'{len(found)} balance figures have drifted; run with --fix to rebuild the ledger.')
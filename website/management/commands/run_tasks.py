@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from website import tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background tasks such as confirmation emails. Claims are leased, so several '
+        'workers, in one process with --threads or in separate processes, can share the queue.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Tasks to run at once.')
+        parser.add_argument('--once', action='store_true', help='Exit once no task is due instead of polling.')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to wait between polls of an empty queue.')
+
+    def handle(self, *args, **options):
+        try:
+            outcomes = tasks.work(threads=options['threads'], once=options['once'], poll=options['poll'])
+        except KeyboardInterrupt:
+            # Tasks that were running stay leased and are picked up again when the lease runs out.
+            self.stdout.write('Stopped.')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Ran {sum(outcomes.values())} tasks: {outcomes['done']} done, "
+            f"{outcomes['queued']} to retry, {outcomes['failed']} failed."
+        ))
@@ -0,0 +1,34 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from website import routers
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database into the read replica file. This stands in for replication '
+        'in local setups; run it on a schedule to bound how far the replica lags.'
+    )
+
+    def handle(self, *args, **options):
+        alias = routers.replica_alias()
+        if alias is None:
+            raise CommandError('No read replica is configured; set DATABASE_REPLICA_PATH.')
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('sync_replica only copies SQLite databases; use the database\'s own replication.')
+        started = time.perf_counter()
+        replica.close()
+        primary.ensure_connection()
+        target = sqlite3.connect(replica.settings_dict['NAME'])
+        try:
+            # The online backup API copies a consistent snapshot while the primary stays writable.
+            primary.connection.backup(target)
+            target.execute('PRAGMA journal_mode = wal')
+        finally:
+            target.close()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Copied the primary database to {alias} in {elapsed:.1f}s.'))
@@ -0,0 +1,133 @@
+import contextvars
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import routers
+from .instrumentation import QueryBudgetExceeded, RequestMetrics, current_metrics, request_stats
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure every request: DB query count, SQL time, template render time and
+    wall time. The numbers go out in a Server-Timing header and into the
+    rolling per-view stats served by the request_stats view.
+
+    Views decorated with ``query_budget(n)`` are checked against their budget;
+    going over logs a warning, or raises QueryBudgetExceeded when
+    QUERY_BUDGET_RAISE is set, as it is under the test runner.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        wall_time = metrics.wall_time
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        budget = getattr(match.func, 'query_budget', None) if match else None
+        request_stats.add(view_name, metrics, wall_time, budget)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.sql_time * 1000:.2f};desc="{metrics.queries} queries"',
+            f'tpl;dur={metrics.template_time * 1000:.2f}',
+            f'total;dur={wall_time * 1000:.2f}',
+        ])
+
+        if budget is not None and metrics.queries > budget:
+            message = f'{view_name} ran {metrics.queries} queries, over its budget of {budget}.'
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+def _in_context(context, chunks):
+    # Streamed bodies are read after the view returns; keep their queries on the request's database.
+    chunks = iter(chunks)
+    while True:
+        try:
+            yield context.run(next, chunks)
+        except StopIteration:
+            return
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve the reads of views marked with ``replica_reads`` from the read
+    replica, through website.routers.ReplicaRouter.
+
+    A client that sends a POST (or any other unsafe method) gets a cookie
+    pinning its reads to the primary for REPLICA_PIN_SECONDS, so it sees its
+    own writes while the replica catches up.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = routers.ReadRouting(pinned=routers.PIN_COOKIE in request.COOKIES)
+        token = routers.current_routing.set(routing)
+        try:
+            response = self.get_response(request)
+            context = contextvars.copy_context()
+        finally:
+            routers.current_routing.reset(token)
+        return self.finish(request, response, routing, context)
+
+    async def __acall__(self, request):
+        routing = routers.ReadRouting(pinned=routers.PIN_COOKIE in request.COOKIES)
+        token = routers.current_routing.set(routing)
+        try:
+            response = await self.get_response(request)
+            context = contextvars.copy_context()
+        finally:
+            routers.current_routing.reset(token)
+        return self.finish(request, response, routing, context)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing = routers.current_routing.get()
+        if routing is not None and not routing.pinned and getattr(view_func, 'replica_reads', False):
+            routing.replica = True
+
+    def finish(self, request, response, routing, context):
+        if routing.replica and response.streaming and not response.is_async:
+            response.streaming_content = _in_context(context, response.streaming_content)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE') and routers.replica_alias():
+            response.set_cookie(
+                routers.PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:16
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_stays(apps, schema_editor):
+    RoomBooking = apps.get_model('website', 'RoomBooking')
+    RoomNight = apps.get_model('website', 'RoomNight')
+    nights = []
+    for booking in RoomBooking.objects.all():
+        booking.check_out = booking.booking_date + datetime.timedelta(days=booking.num_nights)
+        booking.save(update_fields=['check_out'])
+        nights.extend(
+            RoomNight(room_id=booking.room_id, booking_id=booking.pk, night=booking.booking_date + datetime.timedelta(days=i))
+            for i in range(booking.num_nights)
+        )
+    RoomNight.objects.bulk_create(nights, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0012_inventoryitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roombooking',
+            name='check_out',
+            field=models.DateField(default=datetime.date(2026, 10, 18), editable=False),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('night', models.DateField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_nights', to='website.roombooking')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='website.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room', 'night'], name='website_roomnight_room_night'), models.Index(fields=['night', 'room'], name='website_roomnight_night_room')],
+            },
+        ),
+        migrations.RunPython(backfill_stays, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0013_roombooking_check_out_roomnight'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='roomnight',
+            name='website_roomnight_room_night',
+        ),
+        migrations.AddConstraint(
+            model_name='roomnight',
+            constraint=models.UniqueConstraint(fields=('room', 'night'), name='website_roomnight_unique_room_night'),
+        ),
+    ]
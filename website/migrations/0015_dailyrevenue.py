@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0014_roomnight_unique_room_night'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('stream', models.CharField(choices=[('room', 'Room'), ('food', 'Food'), ('service', 'Service'), ('payment', 'Payment')], max_length=10)),
+                ('category', models.CharField(max_length=50)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrevenue',
+            constraint=models.UniqueConstraint(fields=('day', 'stream', 'category'), name='website_dailyrevenue_unique_day_stream_category'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0015_dailyrevenue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('night', models.DateField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='website.room')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='roomrate',
+            constraint=models.UniqueConstraint(fields=('room', 'night'), name='website_roomrate_unique_room_night'),
+        ),
+    ]
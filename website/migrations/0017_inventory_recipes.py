@@ -0,0 +1,45 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0016_roomrate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='low_stock_threshold',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='FoodIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('food', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredients', to='website.food')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='website.inventoryitem')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ServiceSupply',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='website.inventoryitem')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='supplies', to='website.service')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='foodingredient',
+            constraint=models.UniqueConstraint(fields=('food', 'item'), name='website_foodingredient_unique_food_item'),
+        ),
+        migrations.AddConstraint(
+            model_name='servicesupply',
+            constraint=models.UniqueConstraint(fields=('service', 'item'), name='website_servicesupply_unique_service_item'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0017_inventory_recipes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodorder',
+            index=models.Index(fields=['ordered_by', 'payment_status'], name='website_foodorder_owner_status'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['room_type', 'room_number'], name='website_room_available_type'),
+        ),
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(fields=['room', 'booking_date'], name='website_booking_room_date'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceorder',
+            index=models.Index(fields=['ordered_by', 'payment_status'], name='website_svcorder_owner_status'),
+        ),
+    ]
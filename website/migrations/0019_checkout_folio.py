@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0018_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billing',
+            name='booking',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='billings', to='website.roombooking'),
+        ),
+        migrations.AddField(
+            model_name='roombooking',
+            name='checked_out_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
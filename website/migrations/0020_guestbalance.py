@@ -0,0 +1,44 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill(apps, schema_editor):
+    # Opens a balance for every guest, with the figures website.ledger.compute() would give.
+    Person = apps.get_model('website', 'Person')
+    GuestBalance = apps.get_model('website', 'GuestBalance')
+    sources = {
+        'food_due': (apps.get_model('website', 'FoodOrder'), 'ordered_by', 'total_price', {'payment_status': 'unpaid'}),
+        'service_due': (apps.get_model('website', 'ServiceOrder'), 'ordered_by', 'total_price', {'payment_status': 'unpaid'}),
+        'room_due': (apps.get_model('website', 'RoomBooking'), 'booked_by', 'total_price', {'checked_out_at__isnull': True}),
+        'paid': (apps.get_model('website', 'Payment'), 'user', 'amount', {}),
+    }
+    balances = {pk: GuestBalance(person_id=pk) for pk in Person.objects.values_list('pk', flat=True)}
+    for field, (model, guest, amount, filters) in sources.items():
+        for row in model.objects.filter(**filters).order_by().values(guest).annotate(total=Sum(amount)):
+            setattr(balances[row[guest]], field, row['total'] or 0)
+    GuestBalance.objects.bulk_create(balances.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0019_checkout_folio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GuestBalance',
+            fields=[
+                ('person', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('food_due', models.IntegerField(default=0)),
+                ('service_due', models.IntegerField(default=0)),
+                ('room_due', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0020_guestbalance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodorder',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='roombooking',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='serviceorder',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
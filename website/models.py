@@ -1,6 +1,9 @@
-from django.db import models
+import datetime
+
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin, Group, Permission
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 
 class PersonManager(BaseUserManager):
@@ -96,6 +99,7 @@ CREATE TABLE website_room (
     price DECIMAL(10, 2),
     is_available BOOLEAN DEFAULT TRUE
 );
+CREATE INDEX website_room_available_type ON website_room (room_type, room_number) WHERE is_available;
 """
 class Room(models.Model):
     STANDARD_SINGLE = 'standard_single'
@@ -116,7 +120,13 @@ class Room(models.Model):
     num_beds = models.IntegerField()
     room_type = models.CharField(max_length=20, choices=ROOM_TYPES)
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    is_available = models.BooleanField(default=True)  # Default to available
+    is_available = models.BooleanField(default=True)  # Room is in service; nightly occupancy is tracked in RoomNight
+
+    class Meta:
+        indexes = [
+            # Only rooms in service are ever searched; room_number last returns them in display order without a sort.
+            models.Index(fields=['room_type', 'room_number'], condition=models.Q(is_available=True), name='website_room_available_type'),
+        ]
 
     def __str__(self):
         return f"{self.room_number} ({self.room_type})"
@@ -126,25 +136,157 @@ CREATE TABLE website_roombooking (
     room_id INT,
     booked_by_id INT,
     booking_date DATE DEFAULT CURRENT_DATE,
+    check_out DATE,
     num_nights INT,
     total_price DECIMAL(10, 2),
+    checked_out_at TIMESTAMP NULL,
+    updated_at TIMESTAMP,
     FOREIGN KEY (room_id) REFERENCES website_room(id) ON DELETE CASCADE,
     FOREIGN KEY (booked_by_id) REFERENCES website_person(id) ON DELETE CASCADE
 );
+CREATE INDEX website_roombooking_booked_by_id ON website_roombooking (booked_by_id);
+CREATE INDEX website_booking_room_date ON website_roombooking (room_id, booking_date);
 """
 class RoomBooking(models.Model):
+    MAX_NIGHTS = 365  # Every night is a website_roomnight row, so one booking must not write thousands of them
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     booked_by = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
-    booking_date = models.DateField(default=timezone.now)
+    booking_date = models.DateField(default=timezone.now)  # Check-in date
+    check_out = models.DateField(editable=False)
     num_nights = models.IntegerField()
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    checked_out_at = models.DateTimeField(null=True, blank=True, editable=False)  # Set when the folio is closed (billing.close_folio)
+    updated_at = models.DateTimeField(auto_now=True)  # Bulk updates must set it too; dashboards revalidate against it
+
+    class Meta:
+        indexes = [
+            # booked_by already has the index Django gives every foreign key.
+            models.Index(fields=['room', 'booking_date'], name='website_booking_room_date'),
+        ]
+
+    @property
+    def check_in(self):
+        if isinstance(self.booking_date, datetime.datetime):
+            return self.booking_date.date()
+        return self.booking_date
+
+    def nights(self):
+        return [self.check_in + datetime.timedelta(days=i) for i in range(self.num_nights)]
+
+    def _stay(self):
+        return self.room_id, self.check_in, self.num_nights
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'room_id', 'booking_date', 'num_nights'} <= set(field_names):
+            # The stay as stored, so save() re-prices and re-books nights only when it changes.
+            instance._stored_stay = instance._stay()
+        return instance
+
+    def clean(self):
+        if self.num_nights is None or self.check_in is None:
+            return
+        if self.num_nights > self.MAX_NIGHTS:
+            raise ValidationError({'num_nights': f'A booking can be at most {self.MAX_NIGHTS} nights.'})
+        try:
+            self.check_in + datetime.timedelta(days=self.num_nights)
+        except OverflowError:
+            raise ValidationError({'booking_date': 'The stay would end after the last date that can be booked.'})
 
     def save(self, *args, **kwargs):
-        self.total_price = self.room.price * self.num_nights
-        super(RoomBooking, self).save(*args, **kwargs)
+        self.booking_date = self.check_in
+        self.check_out = self.check_in + datetime.timedelta(days=self.num_nights)
+        adding = self._state.adding
+        # Other edits keep the price the guest booked at, not today's rates.
+        stay_changed = adding or getattr(self, '_stored_stay', None) != self._stay()
+        if stay_changed:
+            self.total_price = RoomRate.stay_price(self.room, self.check_in, self.num_nights)
+        # The booking row and its nights commit together; a clash on the
+        # (room, night) unique constraint rolls both back with an IntegrityError.
+        with transaction.atomic():
+            super(RoomBooking, self).save(*args, **kwargs)
+            if stay_changed:
+                if not adding:
+                    RoomNight.objects.filter(booking=self).delete() # DELETE FROM website_roomnight WHERE booking_id = [booking_id];
+                RoomNight.objects.bulk_create([
+                    RoomNight(room_id=self.room_id, booking=self, night=night) for night in self.nights()
+                ]) # INSERT INTO website_roomnight (room_id, booking_id, night) VALUES (...), (...);
+        self._stored_stay = self._stay()
     def __str__(self):
         return f"{self.room.room_number} ({self.room.room_type}) - {self.booked_by.username}"
 """
+CREATE TABLE website_roomnight (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    room_id INT,
+    booking_id INT,
+    night DATE,
+    FOREIGN KEY (room_id) REFERENCES website_room(id) ON DELETE CASCADE,
+    FOREIGN KEY (booking_id) REFERENCES website_roombooking(id) ON DELETE CASCADE
+);
+CREATE UNIQUE INDEX website_roomnight_unique_room_night ON website_roomnight (room_id, night);
+CREATE INDEX website_roomnight_night_room ON website_roomnight (night, room_id);
+"""
+class RoomNight(models.Model):
+    """One row per room per occupied night: the availability index for date-range searches."""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    booking = models.ForeignKey(RoomBooking, on_delete=models.CASCADE, related_name='room_nights')
+    night = models.DateField()
+
+    class Meta:
+        constraints = [
+            # A room can be sold at most once per night, whatever races the booking path.
+            models.UniqueConstraint(fields=['room', 'night'], name='website_roomnight_unique_room_night'),
+        ]
+        indexes = [
+            models.Index(fields=['night', 'room'], name='website_roomnight_night_room'),
+        ]
+
+    def __str__(self):
+        return f"{self.room_id} - {self.night}"
+"""
+CREATE TABLE website_roomrate (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    room_id INT,
+    night DATE,
+    price DECIMAL(10, 2),
+    FOREIGN KEY (room_id) REFERENCES website_room(id) ON DELETE CASCADE
+);
+CREATE UNIQUE INDEX website_roomrate_unique_room_night ON website_roomrate (room_id, night);
+"""
+class RoomRate(models.Model):
+    """A room's price for one night, written in batch by the pricing engine (website.pricing)."""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    night = models.DateField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'night'], name='website_roomrate_unique_room_night'),
+        ]
+
+    @classmethod
+    def stay_price(cls, room, check_in, num_nights):
+        """Total price of a stay: the nightly rates from the rate table, or room.price for nights without one."""
+        return cls.stay_prices([room], check_in, num_nights)[room.pk]
+
+    @classmethod
+    def stay_prices(cls, rooms, check_in, num_nights):
+        """stay_price() of the same stay in each of ``rooms``, as {room id: total}, in one query."""
+        rates = {
+            row['room']: row for row in cls.objects.filter(
+                room__in=[room.pk for room in rooms], night__gte=check_in, night__lt=check_in + datetime.timedelta(days=num_nights),
+            ).order_by().values('room').annotate(total=models.Sum('price'), nights=models.Count('pk'))
+        } # SELECT room_id, SUM(price), COUNT(id) FROM website_roomrate WHERE room_id IN (...) AND night >= [check_in] AND night < [check_out] GROUP BY room_id;
+        no_rates = {'total': 0, 'nights': 0}
+        return {
+            room.pk: rates.get(room.pk, no_rates)['total'] + room.price * (num_nights - rates.get(room.pk, no_rates)['nights'])
+            for room in rooms
+        }
+
+    def __str__(self):
+        return f"{self.room_id} - {self.night}: {self.price}"
+"""
 CREATE TABLE website_food (
     id INT AUTO_INCREMENT PRIMARY KEY,
     food_item_number VARCHAR(50) UNIQUE,
@@ -179,9 +321,11 @@ CREATE TABLE website_foodorder (
     quantity INT,
     order_date DATE DEFAULT CURRENT_DATE,
     total_price INT,
+    updated_at TIMESTAMP,
     FOREIGN KEY (food_id) REFERENCES website_food(id) ON DELETE CASCADE,
     FOREIGN KEY (ordered_by_id) REFERENCES website_person(id) ON DELETE CASCADE
 );
+CREATE INDEX website_foodorder_owner_status ON website_foodorder (ordered_by_id, payment_status);
 """
 class FoodOrder(models.Model):
     PAID = 'paid'
@@ -196,11 +340,26 @@ class FoodOrder(models.Model):
     quantity = models.IntegerField()
     order_date = models.DateField(default=timezone.now)
     total_price = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ordered_by', 'payment_status'], name='website_foodorder_owner_status'),
+        ]
+
     def __str__(self):
         return f"{self.food.food_type} - {self.ordered_by.username}"
     def save(self, *args, **kwargs):
         self.total_price = self.food.price * self.quantity
-        super(FoodOrder, self).save(*args, **kwargs)   
+        adding = self._state.adding
+        # A new order and the stock it uses commit together; InsufficientStock rolls back both.
+        with transaction.atomic():
+            super(FoodOrder, self).save(*args, **kwargs)
+            if adding:
+                InventoryItem.objects.consume({
+                    item_id: amount * self.quantity
+                    for item_id, amount in FoodIngredient.objects.filter(food_id=self.food_id).values_list('item_id', 'quantity')
+                }) # SELECT item_id, quantity FROM website_foodingredient WHERE food_id = [food_id];
 """
 CREATE TABLE website_service (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -242,9 +401,11 @@ CREATE TABLE website_serviceorder (
     quantity INT,
     order_date DATE DEFAULT CURRENT_DATE,
     total_price INT,
+    updated_at TIMESTAMP,
     FOREIGN KEY (service_id) REFERENCES website_service(id) ON DELETE CASCADE,
     FOREIGN KEY (ordered_by_id) REFERENCES website_person(id) ON DELETE CASCADE
 );
+CREATE INDEX website_svcorder_owner_status ON website_serviceorder (ordered_by_id, payment_status);
 """
 class ServiceOrder(models.Model):
     PAID = 'paid'
@@ -259,9 +420,23 @@ class ServiceOrder(models.Model):
     quantity = models.IntegerField()
     order_date = models.DateField(auto_now_add=True)
     total_price = models.IntegerField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ordered_by', 'payment_status'], name='website_svcorder_owner_status'),
+        ]
+
     def save(self, *args, **kwargs):
         self.total_price = self.service.price * self.quantity
-        super(ServiceOrder, self).save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            super(ServiceOrder, self).save(*args, **kwargs)
+            if adding:
+                InventoryItem.objects.consume({
+                    item_id: amount * self.quantity
+                    for item_id, amount in ServiceSupply.objects.filter(service_id=self.service_id).values_list('item_id', 'quantity')
+                }) # SELECT item_id, quantity FROM website_servicesupply WHERE service_id = [service_id];
 
     def __str__(self):
         return f"{self.service.service_type} - {self.ordered_by.username}"
@@ -293,7 +468,9 @@ CREATE TABLE website_billing (
     amount DECIMAL(10, 2),
     payment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     status VARCHAR(10),
-    FOREIGN KEY (user_id) REFERENCES website_person(id) ON DELETE CASCADE
+    booking_id INT NULL,
+    FOREIGN KEY (user_id) REFERENCES website_person(id) ON DELETE CASCADE,
+    FOREIGN KEY (booking_id) REFERENCES website_roombooking(id) ON DELETE SET NULL
 );
 """
 class Billing(models.Model):
@@ -309,16 +486,227 @@ class Billing(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=10, choices=BILL_STATUS_CHOICES, default=UNPAID)
+    booking = models.ForeignKey(RoomBooking, on_delete=models.SET_NULL, null=True, blank=True, related_name='billings')  # The stay a checkout bill closed
 """
 CREATE TABLE website_inventoryitem (
     id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(100) UNIQUE,
-    quantity INT DEFAULT 0
+    quantity INT DEFAULT 0,
+    low_stock_threshold INT DEFAULT 0
 );
 """
+class InsufficientStock(Exception):
+    pass
+
+
+def _per_item(amounts):
+    # CASE id WHEN [item_id] THEN [amount] ... END
+    return models.Case(*[models.When(pk=pk, then=models.Value(amount)) for pk, amount in amounts.items()],
+                       output_field=models.IntegerField())
+
+
+class InventoryItemQuerySet(models.QuerySet):
+    def low_stock(self):
+        return self.filter(quantity__lte=models.F('low_stock_threshold'))
+
+    def adjust(self, changes):
+        """
+        Add each signed amount in ``changes`` ({item id: amount}) to that
+        item's stock in one UPDATE and return the number of items changed.
+        """
+        changes = {pk: amount for pk, amount in changes.items() if amount}
+        if not changes:
+            return 0
+        # UPDATE website_inventoryitem SET quantity = quantity + CASE id WHEN ... END WHERE id IN (...);
+        return self.filter(pk__in=changes).update(quantity=models.F('quantity') + _per_item(changes))
+
+    def consume(self, needs):
+        """
+        Take each amount in ``needs`` ({item id: amount}) out of stock in one
+        UPDATE. All or nothing: raises InsufficientStock, changing nothing, if
+        any item has less than it needs. Returning stock goes through adjust().
+        """
+        if any(amount < 0 for amount in needs.values()):
+            raise ValueError('consume() takes stock out; use adjust() to add it.')
+        needs = {pk: amount for pk, amount in needs.items() if amount}
+        if not needs:
+            return
+        with transaction.atomic():
+            # The stock check is part of the UPDATE, so concurrent orders never read-modify-write a row.
+            # UPDATE website_inventoryitem SET quantity = quantity - CASE ... END WHERE id IN (...) AND quantity >= CASE ... END;
+            updated = self.filter(pk__in=needs, quantity__gte=_per_item(needs)).update(
+                quantity=models.F('quantity') - _per_item(needs)
+            )
+            if updated != len(needs):
+                raise InsufficientStock('Not enough stock to fill this order.')
+
+
 class InventoryItem(models.Model):
     name = models.CharField(max_length=100, unique=True)
     quantity = models.IntegerField(default=0)
+    low_stock_threshold = models.IntegerField(default=0)
+
+    objects = InventoryItemQuerySet.as_manager()
+
+    @property
+    def is_low(self):
+        return self.quantity <= self.low_stock_threshold
+
+    def __str__(self):
+        return f"{self.name} (Quantity: {self.quantity})"
+"""
+CREATE TABLE website_foodingredient (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    food_id INT,
+    item_id INT,
+    quantity INT,
+    FOREIGN KEY (food_id) REFERENCES website_food(id) ON DELETE CASCADE,
+    FOREIGN KEY (item_id) REFERENCES website_inventoryitem(id) ON DELETE CASCADE
+);
+CREATE UNIQUE INDEX website_foodingredient_unique_food_item ON website_foodingredient (food_id, item_id);
+"""
+class FoodIngredient(models.Model):
+    """One line of a dish's recipe: how much of an inventory item a single portion uses."""
+    food = models.ForeignKey(Food, on_delete=models.CASCADE, related_name='ingredients')
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['food', 'item'], name='website_foodingredient_unique_food_item'),
+        ]
+
+    def __str__(self):
+        return f"{self.food} uses {self.quantity} x {self.item.name}"
+"""
+CREATE TABLE website_servicesupply (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    service_id INT,
+    item_id INT,
+    quantity INT,
+    FOREIGN KEY (service_id) REFERENCES website_service(id) ON DELETE CASCADE,
+    FOREIGN KEY (item_id) REFERENCES website_inventoryitem(id) ON DELETE CASCADE
+);
+CREATE UNIQUE INDEX website_servicesupply_unique_service_item ON website_servicesupply (service_id, item_id);
+"""
+class ServiceSupply(models.Model):
+    """A consumable an order of a service uses up, per unit ordered."""
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='supplies')
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['service', 'item'], name='website_servicesupply_unique_service_item'),
+        ]
+
+    def __str__(self):
+        return f"{self.service} uses {self.quantity} x {self.item.name}"
+"""
+CREATE TABLE website_dailyrevenue (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    day DATE,
+    stream VARCHAR(10),
+    category VARCHAR(50),
+    amount DECIMAL(14, 2) DEFAULT 0,
+    count INT DEFAULT 0
+);
+CREATE UNIQUE INDEX website_dailyrevenue_unique_day_stream_category ON website_dailyrevenue (day, stream, category);
+"""
+class DailyRevenue(models.Model):
+    ROOM = 'room'
+    FOOD = 'food'
+    SERVICE = 'service'
+    PAYMENT = 'payment'
+    STREAM_CHOICES = [
+        (ROOM, 'Room'),
+        (FOOD, 'Food'),
+        (SERVICE, 'Service'),
+        (PAYMENT, 'Payment'),
+    ]
+    day = models.DateField()
+    stream = models.CharField(max_length=10, choices=STREAM_CHOICES)
+    category = models.CharField(max_length=50)  # Room type, food type, service type or payment method
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'stream', 'category'], name='website_dailyrevenue_unique_day_stream_category'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.stream} {self.category}: {self.amount}"
+"""
+CREATE TABLE website_guestbalance (
+    person_id INT PRIMARY KEY,
+    food_due INT DEFAULT 0,
+    service_due INT DEFAULT 0,
+    room_due DECIMAL(12, 2) DEFAULT 0,
+    paid DECIMAL(14, 2) DEFAULT 0,
+    FOREIGN KEY (person_id) REFERENCES website_person(id) ON DELETE CASCADE
+);
+"""
+class GuestBalance(models.Model):
+    """A guest's running balance, kept current by website.ledger as orders, stays and payments change."""
+    person = models.OneToOneField(Person, on_delete=models.CASCADE, primary_key=True, related_name='balance')
+    food_due = models.IntegerField(default=0)  # Unpaid food orders
+    service_due = models.IntegerField(default=0)  # Unpaid service orders
+    room_due = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # Stays not yet closed at checkout
+    paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # Every payment the guest has made
+
+    @property
+    def orders_due(self):
+        return self.food_due + self.service_due
+
+    @property
+    def total_due(self):
+        return self.orders_due + self.room_due
+
+    def __str__(self):
+        return f"{self.person_id}: {self.total_due} due"
+"""
+CREATE TABLE website_task (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100),
+    payload JSON,
+    status VARCHAR(10) DEFAULT 'queued',
+    attempts INT DEFAULT 0,
+    max_attempts INT DEFAULT 5,
+    run_after TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP,
+    finished_at TIMESTAMP NULL
+);
+CREATE INDEX website_task_due ON website_task (status, run_after);
+"""
+class Task(models.Model):
+    """A side effect deferred out of the request, run by the run_tasks worker (website.tasks)."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    # When a queued task may next run; for a running one, when its worker's lease runs out.
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='website_task_due'),
+        ]
 
     def __str__(self):
-        return f"{self.name} (Quantity: {self.quantity})"
\ No newline at end of file
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,48 @@
+from django.core.exceptions import ValidationError
+
+PAGE_SIZE = 25
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_page(queryset, after=None, size=PAGE_SIZE, key='-pk'):
+    """
+    Return one page of ``queryset`` ordered by the unique column ``key``.
+
+    Instead of OFFSET, the page starts right after the ``after`` cursor (the
+    key value of the last row already shown), so every page is an index range
+    scan that costs the same however deep into history the reader goes.
+    """
+    descending = key.startswith('-')
+    field = key.lstrip('-')
+    if after not in (None, ''):
+        model_field = queryset.model._meta.pk if field == 'pk' else queryset.model._meta.get_field(field)
+        try:
+            after = model_field.to_python(after)
+        except ValidationError:
+            after = None
+        if after is not None:
+            lookup = f'{field}__lt' if descending else f'{field}__gt'
+            queryset = queryset.filter(**{lookup: after})
+    # SELECT ... WHERE [key] < [after] ORDER BY [key] DESC LIMIT [size + 1];
+    rows = list(queryset.order_by(key)[:size + 1])
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        # Rows are model instances, or dicts from a values() queryset.
+        next_cursor = rows[-1][field] if isinstance(rows[-1], dict) else getattr(rows[-1], field)
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,97 @@
+import datetime
+import itertools
+
+from django.db import connection, transaction
+
+from .models import Room, RoomNight, RoomRate
+
+BATCH_SIZE = 1000
+
+# Rate = Room.price x room type factor x weekday factor x demand factor, clamped to [MIN_FACTOR, MAX_FACTOR].
+ROOM_TYPE_FACTORS = {
+    Room.STANDARD_SINGLE: 1.0,
+    Room.PREMIUM_SINGLE: 1.0,
+    Room.STANDARD_DOUBLE: 1.0,
+    Room.PREMIUM_DOUBLE: 1.05,
+    Room.LUXURY_FAMILY: 1.1,
+}
+WEEKDAY_FACTORS = (0.95, 0.95, 0.95, 1.0, 1.15, 1.2, 1.0)  # Monday first
+# (forecast occupancy below, factor); the last band catches a full house.
+DEMAND_BANDS = ((0.3, 0.9), (0.6, 1.0), (0.85, 1.1), (float('inf'), 1.25))
+MIN_FACTOR = 0.7
+MAX_FACTOR = 1.6
+# Weeks of past occupancy used for the weekday baseline of the forecast.
+HISTORY_WEEKS = 8
+
+
+def forecast_occupancy(start, nights, room_ids, room_types):
+    """
+    Forecast occupancy per room type (rows, indexed like Room.ROOM_TYPES) per
+    night: the higher of the nights already sold and the average for the same
+    weekday over the last HISTORY_WEEKS weeks. ``room_ids`` must be sorted,
+    with ``room_types`` holding each room's type index.
+    """
+    import numpy as np
+
+    history = HISTORY_WEEKS * 7
+    first = start - datetime.timedelta(days=history)
+    rooms_per_type = np.bincount(room_types, minlength=len(Room.ROOM_TYPES))
+    # SELECT room_id, night FROM website_roomnight WHERE night >= [first] AND night < [end];
+    sold = RoomNight.objects.filter(night__gte=first, night__lt=start + datetime.timedelta(days=nights)).values_list('room_id', 'night')
+    columns = list(zip(*sold)) or [(), ()]
+    rooms = np.searchsorted(room_ids, np.array(columns[0], dtype=np.int64))
+    days = (np.array(columns[1], dtype='datetime64[D]') - np.datetime64(first, 'D')).astype(np.int64)
+    counts = np.zeros((len(Room.ROOM_TYPES), history + nights), dtype=np.float64)
+    np.add.at(counts, (room_types[rooms], days), 1)
+    occupancy = counts / np.maximum(rooms_per_type, 1)[:, None]
+
+    # History covers whole weeks starting on first.weekday(), so reshaping lines weekdays up in columns.
+    baseline = occupancy[:, :history].reshape(len(Room.ROOM_TYPES), HISTORY_WEEKS, 7).mean(axis=1)
+    baseline = np.roll(baseline, first.weekday(), axis=1)  # column i is weekday i (Monday first)
+    weekdays = (start.weekday() + np.arange(nights)) % 7
+    return np.maximum(occupancy[:, history:], baseline[:, weekdays])
+
+
+def compute_rates(start, nights):
+    """
+    Price every room for each of ``nights`` nights from ``start``, vectorized
+    over rooms x nights. Returns (room ids, rates matrix). Requires NumPy.
+    """
+    import numpy as np
+
+    type_codes = [code for code, _ in Room.ROOM_TYPES]
+    rooms = list(Room.objects.order_by('pk').values_list('pk', 'room_type', 'price')) # SELECT id, room_type, price FROM website_room ORDER BY id;
+    room_ids = np.array([pk for pk, _, _ in rooms], dtype=np.int64)
+    room_types = np.array([type_codes.index(room_type) for _, room_type, _ in rooms], dtype=np.int64)
+    base = np.array([float(price) for _, _, price in rooms], dtype=np.float64)
+
+    forecast = forecast_occupancy(start, nights, room_ids, room_types)
+    thresholds = np.array([limit for limit, _ in DEMAND_BANDS[:-1]])
+    demand = np.array([factor for _, factor in DEMAND_BANDS])[np.digitize(forecast, thresholds)]
+    weekday = np.array(WEEKDAY_FACTORS)[(start.weekday() + np.arange(nights)) % 7]
+    room_type = np.array([ROOM_TYPE_FACTORS[code] for code in type_codes])
+
+    factors = room_type[room_types][:, None] * weekday[None, :] * demand[room_types]
+    rates = np.round(base[:, None] * np.clip(factors, MIN_FACTOR, MAX_FACTOR), 2)
+    return room_ids, rates
+
+
+def reprice(start, nights):
+    """Replace the rate table for ``nights`` nights from ``start`` and return the number of rates written."""
+    room_ids, rates = compute_rates(start, nights)
+    operations = connection.ops
+    dates = [operations.adapt_datefield_value(start + datetime.timedelta(days=i)) for i in range(nights)]
+    table = operations.quote_name(RoomRate._meta.db_table)
+    rows = (
+        (int(room_id), night, f'{rate:.2f}')
+        for room_id, row in zip(room_ids, rates.tolist()) for night, rate in zip(dates, row)
+    )
+    with transaction.atomic():
+        # DELETE FROM website_roomrate WHERE night >= [start] AND night < [end];
+        RoomRate.objects.filter(night__gte=start, night__lt=start + datetime.timedelta(days=nights)).delete()
+        # A whole house over a year is hundreds of thousands of rates; building a model instance for
+        # each one (bulk_create) costs several times more than the inserts themselves.
+        with connection.cursor() as cursor:
+            while batch := list(itertools.islice(rows, BATCH_SIZE)):
+                cursor.executemany(f'INSERT INTO {table} (room_id, night, price) VALUES (%s, %s, %s)', batch)
+    return rates.size
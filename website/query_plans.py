@@ -0,0 +1,111 @@
+import datetime
+import re
+
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+
+from . import api, views
+from .availability import available_rooms
+from .forms import DashboardFilterForm
+from .models import Employee, FoodOrder, Person, Room, RoomBooking
+
+# What a full table scan looks like in each backend's EXPLAIN output.
+FULL_SCAN_PATTERNS = {
+    # SQLite: "SCAN website_foodorder", with or without "USING INDEX": walking a whole index is still a scan.
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT\b)(\w+)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\w+)'),
+}
+
+
+class HotQuery:
+    """
+    One of the view helpers whose queries must stay indexed.
+
+    ``sections`` builds a dict of loaders like the ones the views evaluate.
+    ``paged_scans`` names the tables the query may walk in primary-key order:
+    keyset pages over them stop after one page, so a scan there is bounded.
+    """
+
+    def __init__(self, sections, paged_scans=()):
+        self.sections = sections
+        self.paged_scans = frozenset(paged_scans)
+
+
+HOT_QUERIES = {
+    'guest_dashboard': HotQuery(lambda ctx: views._guest_dashboard_sections(ctx['guest'])),
+    'payment': HotQuery(lambda ctx: views._payment_sections(ctx['guest'])),
+    'employee_dashboard': HotQuery(
+        lambda ctx: views._employee_dashboard_sections(ctx['request'], ctx['filters']),
+        # Employees page through every order; there is no per-guest filter to index on.
+        paged_scans=['website_foodorder', 'website_serviceorder', 'website_inventoryitem'],
+    ),
+    'api': HotQuery(lambda ctx: {
+        resource: (lambda resource=resource: api.page(resource, ctx['guest'], see_all=False))
+        for resource, (model, owner, fields) in api.RESOURCES.items() if owner
+    }),
+    'room_search': HotQuery(lambda ctx: {
+        'rooms': lambda: list(available_rooms(ctx['today'], ctx['today'] + datetime.timedelta(days=3), Room.STANDARD_DOUBLE)),
+    }),
+}
+
+
+def build_context():
+    """Pick a guest, an employee and a filtered dashboard request from the current database."""
+    today = timezone.localdate()
+    booking = RoomBooking.objects.select_related('room', 'booked_by').order_by('-pk').first()
+    guest = booking.booked_by if booking else FoodOrder.objects.select_related('ordered_by').first().ordered_by
+    employee = Employee.objects.select_related('person').first()
+    params = {
+        'date_from': str(today - datetime.timedelta(days=30)), 'date_to': str(today),
+        'status': FoodOrder.UNPAID, 'room': booking.room.room_number if booking else '',
+    }
+    request = RequestFactory().get('/dashboard/', params)
+    request.user = employee.person if employee else Person.objects.first()
+    filters = DashboardFilterForm(params)
+    filters.is_valid()
+    return {'today': today, 'guest': guest, 'request': request, 'filters': filters}
+
+
+def capture(sections):
+    """Evaluate every loader and return the (sql, params) of each SELECT it ran."""
+    statements = []
+
+    def record(execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        for load in sections.values():
+            load()
+    return statements
+
+
+def explain(sql, params):
+    """Return the database's plan for one statement as a list of lines."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+    if pattern is None:
+        raise NotImplementedError(f'No full-scan pattern for the {connection.vendor} backend.')
+    return {match.group(1) for line in plan for match in pattern.finditer(line)}
+
+
+def regressions(ctx=None):
+    """
+    EXPLAIN every query the hot view helpers run and return the ones that scan
+    a whole table they are not allowed to, as (query name, table, sql, plan).
+    """
+    ctx = ctx or build_context()
+    found = []
+    for name, hot in HOT_QUERIES.items():
+        for sql, params in capture(hot.sections(ctx)):
+            plan = explain(sql, params)
+            for table in sorted(full_scans(plan) - hot.paged_scans):
+                found.append((name, table, sql, plan))
+    return found
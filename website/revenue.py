@@ -0,0 +1,104 @@
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyRevenue, FoodOrder, Payment, RoomBooking, ServiceOrder
+
+BATCH_SIZE = 1000
+
+# stream -> (model, day expression, category lookup, amount field) used by rebuild().
+SOURCES = {
+    DailyRevenue.ROOM: (RoomBooking, F('booking_date'), 'room__room_type', 'total_price'),
+    DailyRevenue.FOOD: (FoodOrder, F('order_date'), 'food__food_type', 'total_price'),
+    DailyRevenue.SERVICE: (ServiceOrder, F('order_date'), 'service__service_type', 'total_price'),
+    DailyRevenue.PAYMENT: (Payment, TruncDate('payment_date'), 'payment_method', 'amount'),
+}
+
+
+def _as_date(value):
+    if isinstance(value, datetime.datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def contribution(instance):
+    """Return the (day, stream, category) rollup key and amount a saved row adds to the rollup."""
+    if isinstance(instance, RoomBooking):
+        return (instance.check_in, DailyRevenue.ROOM, instance.room.room_type), instance.total_price
+    if isinstance(instance, FoodOrder):
+        return (_as_date(instance.order_date), DailyRevenue.FOOD, instance.food.food_type), instance.total_price
+    if isinstance(instance, ServiceOrder):
+        return (_as_date(instance.order_date), DailyRevenue.SERVICE, instance.service.service_type), instance.total_price or 0
+    return (_as_date(instance.payment_date), DailyRevenue.PAYMENT, instance.payment_method), instance.amount
+
+
+def stored(instance):
+    """``instance`` as currently stored, with what contribution() needs, or None if it is not saved yet."""
+    if instance._state.adding or instance.pk is None:
+        return None
+    related = [source[2].split('__')[0] for source in SOURCES.values() if source[0] is type(instance) and '__' in source[2]]
+    return type(instance).objects.select_related(*related).filter(pk=instance.pk).first() # SELECT ... FROM [source] ... WHERE id = [pk];
+
+
+def _add(key, amount, count):
+    day, stream, category = key
+    rollup = DailyRevenue.objects.filter(day=day, stream=stream, category=category)
+    # UPDATE website_dailyrevenue SET amount = amount + [amount], count = count + [count] WHERE day = ... AND stream = ... AND category = ...;
+    if rollup.update(amount=F('amount') + amount, count=F('count') + count):
+        if count < 0:
+            rollup.filter(count__lte=0).delete() # DELETE FROM website_dailyrevenue WHERE ... AND count <= 0;
+        return
+    try:
+        with transaction.atomic():
+            DailyRevenue.objects.create(day=day, stream=stream, category=category, amount=amount, count=count)
+    except IntegrityError:
+        # Another transaction created the row in the meantime; add to it instead.
+        rollup.update(amount=F('amount') + amount, count=F('count') + count)
+
+
+def record(before, after):
+    """
+    Apply the change from ``before`` to ``after`` (each a contribution() result,
+    or None for no row) to the rollup, in the caller's transaction.
+    """
+    if before == after:
+        return
+    if before and after and before[0] == after[0]:
+        _add(after[0], after[1] - before[1], 0)
+        return
+    if before:
+        _add(before[0], -before[1], -1)
+    if after:
+        _add(after[0], after[1], 1)
+
+
+def rebuild(start=None, end=None):
+    """
+    Recompute the rollup from the source tables for days in [start, end]
+    (either bound may be None) and return the number of rollup rows written.
+    """
+    with transaction.atomic():
+        stale = DailyRevenue.objects.all()
+        if start:
+            stale = stale.filter(day__gte=start)
+        if end:
+            stale = stale.filter(day__lte=end)
+        stale.delete()
+        rows = []
+        for stream, (model, day, category, amount) in SOURCES.items():
+            # SELECT [day], [category], SUM([amount]), COUNT(*) FROM [source] ... GROUP BY [day], [category];
+            totals = model.objects.annotate(rollup_day=day, rollup_category=F(category)).order_by()
+            if start:
+                totals = totals.filter(rollup_day__gte=start)
+            if end:
+                totals = totals.filter(rollup_day__lte=end)
+            totals = totals.values('rollup_day', 'rollup_category').annotate(total=Sum(amount), n=Count('pk'))
+            rows.extend(
+                DailyRevenue(day=row['rollup_day'], stream=stream, category=row['rollup_category'], amount=row['total'] or 0, count=row['n'])
+                for row in totals
+            )
+        DailyRevenue.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
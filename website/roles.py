@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Employee
+
+
+def _version_key(person_id):
+    return f'role:{person_id}:version'
+
+
+def _session_key(request):
+    return f'role:session:{request.session.session_key}'
+
+
+def version(person_id):
+    return cache.get_or_set(_version_key(person_id), time.time_ns(), timeout=None)
+
+
+def remember(request, user):
+    """Resolve whether ``user`` is an employee and cache the answer for this session."""
+    current = version(user.pk)
+    is_employee = Employee.objects.filter(person_id=user.pk).exists() # SELECT 1 FROM website_employee WHERE person_id = [user_id] LIMIT 1;
+    if request.session.session_key:
+        cache.set(_session_key(request), (is_employee, current), settings.SESSION_COOKIE_AGE)
+    return is_employee
+
+
+def is_employee(request):
+    """
+    Whether the signed-in user is an employee, normally without a query: the
+    answer is resolved at login and cached per session, and re-resolved only
+    when that person's Employee row has changed since or the entry is gone.
+    """
+    if not request.user.is_authenticated:
+        return False
+    role = cache.get(_session_key(request))
+    if role is None or role[1] != version(request.user.pk):
+        return remember(request, request.user)
+    return role[0]
+
+
+def forget(person_id):
+    """Make every session of ``person_id`` re-resolve its role on the next request."""
+    cache.delete(_version_key(person_id))
+    transaction.on_commit(lambda: cache.delete(_version_key(person_id)))
@@ -0,0 +1,61 @@
+import contextvars
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Routing state of the request being handled, or None outside a request.
+current_routing = contextvars.ContextVar('current_routing', default=None)
+
+PIN_COOKIE = 'hms_primary'
+
+# Sessions and accounts always come from the primary: a lagging replica must never sign anyone out.
+PRIMARY_ONLY = {'sessions.session', settings.AUTH_USER_MODEL.lower()}
+
+
+class ReadRouting:
+    def __init__(self, pinned=False):
+        # The client wrote recently, so it must read its own writes from the primary.
+        self.pinned = pinned
+        self.replica = False
+
+
+def replica_alias():
+    """The configured read replica's alias, or None when reads should stay on the primary."""
+    alias = getattr(settings, 'REPLICA_DATABASE', 'replica')
+    databases = connections.settings
+    if alias not in databases:
+        return None
+    # Under test a replica mirrors the primary; reading it on a second connection gains nothing.
+    if databases[alias]['NAME'] == databases[DEFAULT_DB_ALIAS]['NAME']:
+        return None
+    return alias
+
+
+def replica_reads(view_func):
+    """Mark a read-only view whose queries may be served by the read replica; enforced by ReplicaRoutingMiddleware."""
+    view_func.replica_reads = True
+    return view_func
+
+
+class ReplicaRouter:
+    """
+    Send the reads of views marked with ``replica_reads`` to the replica, and
+    everything else, writes included, to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if routing is not None and routing.replica and model._meta.label_lower not in PRIMARY_ONLY:
+            return replica_alias() or DEFAULT_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or Django would save rows read from the replica back to it.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary and gets its schema from there.
+        return db != replica_alias()
@@ -0,0 +1,170 @@
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import catalog, ledger, revenue
+from .models import (
+    Billing, Employee, Food, FoodOrder, InventoryItem, Payment, Person, PhoneNumber, Room, RoomBooking,
+    RoomNight, Service, ServiceOrder,
+)
+
+DEFAULT_COUNTS = {
+    'persons': 1000,
+    'employees': 20,
+    'rooms': 200,
+    'foods': 30,
+    'services': 12,
+    'bookings': 5000,
+    'food_orders': 20000,
+    'service_orders': 10000,
+    'payments': 3000,
+    'inventory_items': 300,
+}
+BATCH_SIZE = 1000
+DEFAULT_PASSWORD = 'hotel-guest'
+
+ROOM_PRICES = {
+    Room.STANDARD_SINGLE: (1, Decimal('60.00')),
+    Room.PREMIUM_SINGLE: (1, Decimal('90.00')),
+    Room.STANDARD_DOUBLE: (2, Decimal('110.00')),
+    Room.PREMIUM_DOUBLE: (2, Decimal('150.00')),
+    Room.LUXURY_FAMILY: (4, Decimal('240.00')),
+}
+
+
+def generate(counts=None, seed=0, prefix='seed', password=DEFAULT_PASSWORD, start=None):
+    """
+    Insert a synthetic hotel with bulk inserts and return the row counts created.
+
+    Output is fully determined by ``seed`` so benchmark runs are comparable.
+    Every generated person shares ``password`` (hashed once) so load tests
+    can log in as any of them.
+    """
+    counts = {**DEFAULT_COUNTS, **(counts or {})}
+    rng = random.Random(seed)
+    start = start or timezone.localdate() - datetime.timedelta(days=365)
+    password_hash = make_password(password)
+
+    with transaction.atomic():
+        persons = Person.objects.bulk_create([
+            Person(
+                username=f'{prefix}-person-{i}', email=f'{prefix}-person-{i}@example.com',
+                first_name=f'Guest{i}', last_name=prefix.title(), password=password_hash,
+            )
+            for i in range(counts['persons'])
+        ], batch_size=BATCH_SIZE)
+        PhoneNumber.objects.bulk_create([
+            PhoneNumber(person=person, number=f'+880{rng.randrange(10 ** 9, 10 ** 10)}') for person in persons
+        ], batch_size=BATCH_SIZE)
+        staff = persons[:counts['employees']]
+        Employee.objects.bulk_create([
+            Employee(person=person, employee_id=f'{prefix}-E{i}', salary=rng.randrange(20000, 90000, 500), role='Front desk')
+            for i, person in enumerate(staff)
+        ], batch_size=BATCH_SIZE)
+        guests = persons[counts['employees']:] or persons
+
+        room_types = [room_type for room_type, _ in Room.ROOM_TYPES]
+        rooms = []
+        for i in range(counts['rooms']):
+            room_type = room_types[i % len(room_types)]
+            num_beds, price = ROOM_PRICES[room_type]
+            rooms.append(Room(room_number=f'{prefix}-{i // 50 + 1}{i % 50:02d}', num_beds=num_beds, room_type=room_type, price=price))
+        rooms = Room.objects.bulk_create(rooms, batch_size=BATCH_SIZE)
+
+        foods = Food.objects.bulk_create([
+            Food(
+                food_item_number=f'{prefix}-F{i}', description=f'Menu item {i}',
+                price=Decimal(rng.randrange(400, 3000)) / 100, food_type=rng.choice(Food.FOOD_TYPES)[0],
+            )
+            for i in range(counts['foods'])
+        ], batch_size=BATCH_SIZE)
+        services = Service.objects.bulk_create([
+            Service(
+                service_id=f'S{prefix[:3]}{i}'[:10], description=f'Service {i}',
+                price=Decimal(rng.randrange(500, 5000)) / 100, service_type=Service.SERVICE_TYPES[i % len(Service.SERVICE_TYPES)][0],
+            )
+            for i in range(counts['services'])
+        ], batch_size=BATCH_SIZE)
+
+        # Stays are laid out back to back per room, so the occupancy index stays consistent.
+        next_free = {room.pk: start + datetime.timedelta(days=rng.randrange(7)) for room in rooms}
+        bookings = []
+        for i in range(counts['bookings'] if rooms else 0):
+            room = rooms[i % len(rooms)]
+            check_in = next_free[room.pk]
+            num_nights = rng.randint(1, 7)
+            next_free[room.pk] = check_in + datetime.timedelta(days=num_nights + rng.randrange(4))
+            bookings.append(RoomBooking(
+                room=room, booked_by=rng.choice(guests), booking_date=check_in,
+                check_out=check_in + datetime.timedelta(days=num_nights), num_nights=num_nights,
+                total_price=room.price * num_nights,
+            ))
+        bookings = RoomBooking.objects.bulk_create(bookings, batch_size=BATCH_SIZE)
+        RoomNight.objects.bulk_create([
+            RoomNight(room_id=booking.room_id, booking=booking, night=night)
+            for booking in bookings for night in booking.nights()
+        ], batch_size=BATCH_SIZE)
+
+        days = max((timezone.localdate() - start).days, 1)
+        food_orders = []
+        for _ in range(counts['food_orders'] if foods else 0):
+            food = rng.choice(foods)
+            quantity = rng.randint(1, 4)
+            food_orders.append(FoodOrder(
+                food=food, ordered_by=rng.choice(guests), quantity=quantity, total_price=food.price * quantity,
+                order_date=start + datetime.timedelta(days=rng.randrange(days)),
+                payment_status=FoodOrder.PAID if rng.random() < 0.7 else FoodOrder.UNPAID,
+            ))
+        food_orders = FoodOrder.objects.bulk_create(food_orders, batch_size=BATCH_SIZE)
+        service_orders = []
+        for _ in range(counts['service_orders'] if services else 0):
+            service = rng.choice(services)
+            quantity = rng.randint(1, 3)
+            service_orders.append(ServiceOrder(
+                service=service, ordered_by=rng.choice(guests), quantity=quantity, total_price=service.price * quantity,
+                payment_status=ServiceOrder.PAID if rng.random() < 0.7 else ServiceOrder.UNPAID,
+            ))
+        service_orders = ServiceOrder.objects.bulk_create(service_orders, batch_size=BATCH_SIZE)
+
+        orders = [order for order in food_orders + service_orders if order.payment_status == order.PAID]
+        payments = []
+        for _ in range(counts['payments']):
+            order = rng.choice(orders) if orders else None
+            payments.append(Payment(
+                user=order.ordered_by if order else rng.choice(guests),
+                amount=order.total_price if order else Decimal(rng.randrange(1000, 50000)) / 100,
+                payment_method=rng.choice(['card', 'cash', 'mobile']),
+                food_order=order if isinstance(order, FoodOrder) else None,
+                service_order=order if isinstance(order, ServiceOrder) else None,
+            ))
+        payments = Payment.objects.bulk_create(payments, batch_size=BATCH_SIZE)
+        billings = Billing.objects.bulk_create([
+            Billing(user=payment.user, amount=payment.amount, status=Billing.PAID) for payment in payments
+        ], batch_size=BATCH_SIZE)
+
+        inventory_items = InventoryItem.objects.bulk_create([
+            InventoryItem(name=f'{prefix} item {i}', quantity=rng.randrange(0, 500), low_stock_threshold=rng.randrange(0, 50))
+            for i in range(counts['inventory_items'])
+        ], batch_size=BATCH_SIZE)
+        # bulk_create sends no post_save signals.
+        catalog.invalidate_all()
+        revenue.rebuild()
+        ledger.rebuild()
+
+    return {
+        'persons': len(persons),
+        'employees': len(staff),
+        'rooms': len(rooms),
+        'foods': len(foods),
+        'services': len(services),
+        'bookings': len(bookings),
+        'food_orders': len(food_orders),
+        'service_orders': len(service_orders),
+        'payments': len(payments),
+        'billings': len(billings),
+        'inventory_items': len(inventory_items),
+    }
@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import catalog, ledger, revenue, roles, routers
+from .instrumentation import install_query_recorder
+from .models import Employee, Food, FoodOrder, GuestBalance, Payment, Person, Room, RoomBooking, Service, ServiceOrder
+
+
+@receiver([post_save, post_delete], sender=Room)
+@receiver([post_save, post_delete], sender=Food)
+@receiver([post_save, post_delete], sender=Service)
+def invalidate_catalog(sender, **kwargs):
+    catalog.invalidate(catalog.CATALOG_MODELS[sender])
+
+
+@receiver(user_logged_in)
+def resolve_role(sender, request, user, **kwargs):
+    if request is not None:
+        roles.remember(request, user)
+
+
+@receiver([post_save, post_delete], sender=Employee)
+def forget_role(sender, instance, **kwargs):
+    roles.forget(instance.person_id)
+
+
+@receiver(post_save, sender=Person)
+def open_balance(sender, instance, created, raw=False, **kwargs):
+    # With the row in place, every later ledger change is a single UPDATE.
+    if created and not raw:
+        GuestBalance.objects.create(person=instance)
+
+
+@receiver(pre_save, sender=RoomBooking)
+@receiver(pre_save, sender=FoodOrder)
+@receiver(pre_save, sender=ServiceOrder)
+@receiver(pre_save, sender=Payment)
+def remember_stored(sender, instance, raw=False, **kwargs):
+    if not raw:
+        stored = revenue.stored(instance)
+        instance._revenue_before = revenue.contribution(stored) if stored else None
+        instance._ledger_before = ledger.contribution(stored) if stored else None
+
+
+@receiver(post_save, sender=RoomBooking)
+@receiver(post_save, sender=FoodOrder)
+@receiver(post_save, sender=ServiceOrder)
+@receiver(post_save, sender=Payment)
+def add_to_rollups(sender, instance, raw=False, **kwargs):
+    if not raw:
+        revenue.record(getattr(instance, '_revenue_before', None), revenue.contribution(instance))
+        ledger.record(getattr(instance, '_ledger_before', None), ledger.contribution(instance))
+
+
+@receiver(post_delete, sender=RoomBooking)
+@receiver(post_delete, sender=FoodOrder)
+@receiver(post_delete, sender=ServiceOrder)
+@receiver(post_delete, sender=Payment)
+def remove_from_rollups(sender, instance, origin=None, **kwargs):
+    revenue.record(revenue.contribution(instance), None)
+    # When the guest is being deleted their balance row goes too; recreating it would break the foreign key.
+    if getattr(origin, 'model', type(origin)) is not Person:
+        ledger.record(ledger.contribution(instance), None)
+
+
+@receiver(connection_created)
+def record_queries(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # On the raw connection, so the pragmas don't count against the current request's query budget.
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+    if connection.alias == routers.replica_alias():
+        # Nothing may write to the replica but sync_replica.
+        connection.connection.execute('PRAGMA query_only = ON')
@@ -0,0 +1,147 @@
+import datetime
+import logging
+import random
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import FoodOrder, RoomBooking, ServiceOrder, Task
+
+logger = logging.getLogger(__name__)
+
+# Task name -> function, filled in by @task.
+REGISTRY = {}
+
+
+def task(func=None, *, max_attempts=None):
+    """Register a function the worker may run; its name is what gets stored in website_task."""
+    def register(func):
+        func.task_name = func.__name__
+        func.max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+        REGISTRY[func.task_name] = func
+        return func
+    return register(func) if func is not None else register
+
+
+def enqueue(func, **payload):
+    """
+    Queue func(**payload) for the worker. The row is written once the current
+    transaction commits, so work that rolls back queues nothing and the worker
+    never looks for rows it cannot see yet; outside a transaction it is written
+    straight away. The payload must be JSON: pass primary keys, not instances.
+    """
+    transaction.on_commit(lambda: Task.objects.create(name=func.task_name, payload=payload, max_attempts=func.max_attempts)) # INSERT INTO website_task (name, payload, max_attempts, ...) VALUES (...);
+
+
+def backoff(attempts):
+    """Delay before retrying after the given number of attempts: exponential, capped, with jitter."""
+    base, cap = settings.TASK_RETRY_BACKOFF
+    delay = min(cap, base * 2 ** (attempts - 1))
+    # Equal jitter: tasks that failed together do not all come back together.
+    return datetime.timedelta(seconds=delay / 2 + random.uniform(0, delay / 2))
+
+
+def claim(limit):
+    """
+    Lease up to ``limit`` due tasks to this worker and return them. A running
+    task whose lease has run out belongs to a worker that died and is due again.
+    """
+    now = timezone.now()
+    due = Task.objects.filter(status__in=[Task.QUEUED, Task.RUNNING], run_after__lte=now)
+    claimed = []
+    for pk in due.order_by('run_after').values_list('pk', flat=True)[:limit]: # SELECT id FROM website_task WHERE status IN ('queued', 'running') AND run_after <= [now] ORDER BY run_after LIMIT [limit];
+        # Of several workers racing for a task, the one whose conditional UPDATE matches wins it.
+        if due.filter(pk=pk).update(
+            status=Task.RUNNING, attempts=F('attempts') + 1,
+            run_after=now + datetime.timedelta(seconds=settings.TASK_LEASE_SECONDS),
+        ): # UPDATE website_task SET status = 'running', attempts = attempts + 1, run_after = [lease end] WHERE id = [id] AND status IN (...) AND run_after <= [now];
+            claimed.append(pk)
+    return list(Task.objects.filter(pk__in=claimed).order_by('run_after'))
+
+
+def _finish(task, **fields):
+    # Only while it is still ours: a task whose lease ran out may have been claimed again.
+    Task.objects.filter(pk=task.pk, status=Task.RUNNING, attempts=task.attempts).update(**fields)
+
+
+def execute(task):
+    """Run one claimed task, then mark it done, due for a retry after a backoff, or failed."""
+    close_old_connections()
+    try:
+        func = REGISTRY.get(task.name)
+        if func is None:
+            _finish(task, status=Task.FAILED, last_error=f'No task named {task.name!r} is registered.', finished_at=timezone.now())
+            return Task.FAILED
+        if task.attempts > task.max_attempts:
+            # The worker running the last attempt died; running it again could take this one down too.
+            _finish(task, status=Task.FAILED, last_error=task.last_error or 'The last attempt never finished.', finished_at=timezone.now())
+            return Task.FAILED
+        try:
+            func(**task.payload)
+        except Exception:
+            error = traceback.format_exc()
+            if task.attempts < task.max_attempts:
+                logger.warning('Task %s #%s failed, attempt %s of %s', task.name, task.pk, task.attempts, task.max_attempts, exc_info=True)
+                _finish(task, status=Task.QUEUED, run_after=timezone.now() + backoff(task.attempts), last_error=error)
+                return Task.QUEUED
+            logger.error('Task %s #%s failed for good after %s attempts', task.name, task.pk, task.attempts, exc_info=True)
+            _finish(task, status=Task.FAILED, last_error=error, finished_at=timezone.now())
+            return Task.FAILED
+        _finish(task, status=Task.DONE, finished_at=timezone.now())
+        return Task.DONE
+    finally:
+        close_old_connections()
+
+
+def work(threads=1, once=False, poll=1.0, stop=None):
+    """
+    Claim and run tasks on a pool of ``threads`` until ``stop()`` is true, or,
+    with ``once``, until nothing is due. Returns how many tasks ended in each status.
+    """
+    outcomes = {Task.DONE: 0, Task.QUEUED: 0, Task.FAILED: 0}
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='task') as pool:
+        while stop is None or not stop():
+            tasks = claim(threads)
+            if not tasks:
+                if once:
+                    break
+                time.sleep(poll)
+                continue
+            for status in pool.map(execute, tasks):
+                outcomes[status] += 1
+    return outcomes
+
+
+# kind -> (model, owner field, the other rows the message shows, what the guest is told), for send_confirmation.
+CONFIRMATIONS = {
+    'room_booking': (RoomBooking, 'booked_by', 'room', lambda row: (
+        f'Room {row.room.room_number} is booked',
+        f'Your stay in room {row.room.room_number} from {row.booking_date} to {row.check_out} '
+        f'({row.num_nights} nights) is confirmed. Total: {row.total_price}.',
+    )),
+    'food_order': (FoodOrder, 'ordered_by', 'food', lambda row: (
+        'Your food order is on its way',
+        f'{row.quantity} x {row.food.description}. Total: {row.total_price}, added to your bill.',
+    )),
+    'service_order': (ServiceOrder, 'ordered_by', 'service', lambda row: (
+        'Your service is booked',
+        f'{row.quantity} x {row.service.description}. Total: {row.total_price}, added to your bill.',
+    )),
+}
+
+
+@task
+def send_confirmation(kind, pk):
+    """Email the guest a confirmation of a booking or order."""
+    model, owner, related, message = CONFIRMATIONS[kind]
+    row = model.objects.select_related(owner, related).filter(pk=pk).first() # SELECT ... FROM [table] INNER JOIN website_person ... WHERE id = [pk];
+    if row is None:
+        return  # Cancelled before the worker got to it; there is nothing to confirm.
+    subject, body = message(row)
+    send_mail(subject, body, None, [getattr(row, owner).email])
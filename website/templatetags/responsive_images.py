@@ -0,0 +1,54 @@
+from django import template
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from website import images
+
+register = template.Library()
+
+DEFAULT_WIDTH = 960
+
+
+def _srcset(variants):
+    return ', '.join(f"{static(variant['path'])} {variant['width']}w" for variant in variants)
+
+
+def _pick(variants, width):
+    for variant in variants:
+        if variant['width'] >= width:
+            return variant
+    return variants[-1]
+
+
+@register.simple_tag
+def responsive_img(name, sizes='100vw', **attrs):
+    """
+    Render a static image as a <picture> with WebP and JPEG/PNG srcsets built
+    by the build_images command, e.g.
+    {% responsive_img 'hotel_management/gym.jpg' sizes='(min-width: 768px) 33vw, 100vw' class='card-img-top' alt='Gym' %}.
+    Images missing from the manifest fall back to a plain <img>.
+    """
+    attrs.setdefault('loading', 'lazy')
+    attrs.setdefault('decoding', 'async')
+    entry = images.manifest().get(name)
+    if entry is None:
+        return format_html('<img src="{}"{}>', static(name), flatatt(attrs))
+    fallback = entry['variants']['fallback']
+    attrs.setdefault('width', entry['width'])
+    attrs.setdefault('height', entry['height'])
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        _srcset(entry['variants']['webp']), sizes,
+        static(_pick(fallback, DEFAULT_WIDTH)['path']), _srcset(fallback), sizes, flatatt(attrs),
+    )
+
+
+@register.simple_tag
+def responsive_src(name, width=DEFAULT_WIDTH):
+    """URL of the smallest JPEG/PNG variant at least ``width`` pixels wide, for CSS backgrounds."""
+    entry = images.manifest().get(name)
+    if entry is None:
+        return static(name)
+    return static(_pick(entry['variants']['fallback'], int(width))['path'])
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+# The running test command's --verbosity, for tests that report measurements only when asked.
+verbosity = 1
+
+
+class BudgetEnforcingRunner(DiscoverRunner):
+    """
+    The default test runner, with views over their query budget failing instead
+    of logging, and its verbosity published for tests that report measurements.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        global verbosity
+        super().setup_test_environment(**kwargs)
+        verbosity = self.verbosity
+        self._query_budget_raise = settings.QUERY_BUDGET_RAISE
+        settings.QUERY_BUDGET_RAISE = True
+
+    def teardown_test_environment(self, **kwargs):
+        settings.QUERY_BUDGET_RAISE = self._query_budget_raise
+        super().teardown_test_environment(**kwargs)
@@ -1,3 +1,1443 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+from pathlib import Path
+import sys
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.template import Context, Template
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import benchmarks, billing, catalog, exports, importing, ledger, pricing, query_plans, routers, tasks, testing, throttling, views
+from .analytics import room_type_performance
+from .availability import RoomUnavailable, available_rooms, reserve
+from .billing import outstanding_balance
+from .concurrency import load_concurrently
+from .forms import FoodOrderForm, RoomBookingForm, ServiceBookingForm
+from .instrumentation import QueryBudgetExceeded, request_stats
+from .models import Billing, DailyRevenue, Employee, Food, FoodIngredient, FoodOrder, GuestBalance, InsufficientStock, InventoryItem, Payment, Person, PhoneNumber, Room, RoomBooking, RoomNight, RoomRate, Service, ServiceOrder, ServiceSupply, Task
+from .pagination import keyset_page
+from .seeding import generate
+
+
+class RoomAvailabilityTests(TestCase):
+    def setUp(self):
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.single = Room.objects.create(room_number='101', num_beds=1, room_type=Room.STANDARD_SINGLE, price=50)
+        self.double = Room.objects.create(room_number='201', num_beds=2, room_type=Room.STANDARD_DOUBLE, price=80)
+        self.day = datetime.date(2026, 1, 10)
+
+    def book(self, room, check_in, num_nights):
+        return RoomBooking.objects.create(room=room, booked_by=self.guest, booking_date=check_in, num_nights=num_nights)
+
+    def test_booking_records_interval_and_nights(self):
+        booking = self.book(self.single, self.day, 3)
+        self.assertEqual(booking.check_out, self.day + datetime.timedelta(days=3))
+        self.assertEqual(booking.total_price, 150)
+        self.assertEqual(
+            list(booking.room_nights.order_by('night').values_list('night', flat=True)),
+            booking.nights(),
+        )
+
+    def test_overlapping_stay_is_unavailable(self):
+        self.book(self.single, self.day, 3)
+        rooms = available_rooms(self.day + datetime.timedelta(days=2), self.day + datetime.timedelta(days=4))
+        self.assertEqual(list(rooms), [self.double])
+
+    def test_back_to_back_stays_are_available(self):
+        self.book(self.single, self.day, 3)
+        rooms = available_rooms(self.day + datetime.timedelta(days=3), self.day + datetime.timedelta(days=5))
+        self.assertIn(self.single, rooms)
+        rooms = available_rooms(self.day - datetime.timedelta(days=2), self.day)
+        self.assertIn(self.single, rooms)
+
+    def test_room_type_filter_and_out_of_service_rooms(self):
+        Room.objects.filter(pk=self.double.pk).update(is_available=False)
+        self.assertEqual(list(available_rooms(self.day, self.day + datetime.timedelta(days=1))), [self.single])
+        self.assertEqual(
+            list(available_rooms(self.day, self.day + datetime.timedelta(days=1), Room.STANDARD_DOUBLE)), []
+        )
+
+    def test_availability_is_a_single_query(self):
+        for i in range(20):
+            self.book(self.single, self.day + datetime.timedelta(days=i * 2), 1)
+        with self.assertNumQueries(1):
+            list(available_rooms(self.day, self.day + datetime.timedelta(days=30), Room.STANDARD_SINGLE))
+
+    def test_form_rejects_room_taken_for_requested_nights(self):
+        self.book(self.single, self.day, 2)
+        form = RoomBookingForm(data={'room': self.single.pk, 'num_nights': 2, 'booking_date': self.day + datetime.timedelta(days=1)})
+        self.assertFalse(form.is_valid())
+        self.assertIn('room', form.errors)
+        form = RoomBookingForm(data={'room': self.single.pk, 'num_nights': 2, 'booking_date': self.day + datetime.timedelta(days=2)})
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_checkout_releases_remaining_nights(self):
+        day = timezone.localdate() + datetime.timedelta(days=5)
+        booking = self.book(self.single, day, 2)
+        self.client.force_login(self.guest)
+        self.client.post(reverse('checkout', args=[booking.pk]))
+        self.assertFalse(RoomNight.objects.exists())
+        self.assertIn(self.single, available_rooms(day, day + datetime.timedelta(days=2)))
+
+    def test_booking_page_lists_and_books_free_rooms(self):
+        self.client.force_login(self.guest)
+        response = self.client.get(reverse('room_booking'), {'booking_date': self.day, 'num_nights': 2})
+        self.assertContains(response, '101 (standard_single)')
+        response = self.client.post(reverse('room_booking'), {'room': self.single.pk, 'num_nights': 2, 'booking_date': self.day})
+        self.assertRedirects(response, reverse('index'))
+        self.assertEqual(RoomNight.objects.filter(room=self.single).count(), 2)
+
+    def test_booking_page_quotes_the_rate_table(self):
+        RoomRate.objects.create(room=self.single, night=self.day, price=70)
+        self.client.force_login(self.guest)
+        response = self.client.get(reverse('room_booking'), {'booking_date': self.day, 'num_nights': 2})
+        self.assertEqual(dict((room.pk, price) for room, price in response.context['quotes'])[self.single.pk], 70 + 50)
+        self.assertContains(response, 'data-price="120.00"')
+        self.client.post(reverse('room_booking'), {'room': self.single.pk, 'num_nights': 2, 'booking_date': self.day})
+        self.assertEqual(RoomBooking.objects.get().total_price, 120)
+
+    def test_only_stay_changes_reprice_a_booking(self):
+        booking = self.book(self.single, self.day, 2)
+        RoomRate.objects.create(room=self.single, night=self.day, price=70)
+        booking = RoomBooking.objects.get(pk=booking.pk)
+        with CaptureQueriesContext(connection) as captured:
+            booking.save()
+        self.assertFalse([q for q in captured if 'website_roomrate' in q['sql'] or 'website_roomnight' in q['sql']])
+        self.assertEqual(booking.total_price, 100)
+        booking.num_nights = 3
+        booking.save()
+        booking.refresh_from_db()
+        self.assertEqual((booking.total_price, booking.room_nights.count()), (170, 3))
+
+    def test_overlong_and_out_of_range_stays_are_form_errors(self):
+        self.client.force_login(self.guest)
+        for params in [{'num_nights': 3000000}, {'booking_date': '9999-12-30', 'num_nights': 5}]:
+            self.assertEqual(self.client.get(reverse('room_booking'), params).status_code, 200)
+        response = self.client.post(reverse('room_booking'), {'room': self.single.pk, 'num_nights': 20000, 'booking_date': self.day})
+        self.assertFormError(response.context['form'], 'num_nights', f'A booking can be at most {RoomBooking.MAX_NIGHTS} nights.')
+        response = self.client.post(reverse('room_booking'), {'room': self.single.pk, 'num_nights': 5, 'booking_date': '9999-12-30'})
+        self.assertFormError(response.context['form'], 'booking_date', 'The stay would end after the last date that can be booked.')
+        self.assertFalse(RoomBooking.objects.exists())
+
+
+class EmployeeDashboardTests(TestCase):
+    def setUp(self):
+        self.staff = Person.objects.create_user('staff', 'staff@example.com', 'pass12345', first_name='Sam')
+        Employee.objects.create(person=self.staff, employee_id='E1', role='Front desk')
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+        self.service = Service.objects.create(service_id='S1', description='Gym pass', price=5, service_type=Service.GYM)
+        self.day = datetime.date(2026, 2, 1)
+        self.client.force_login(self.staff)
+
+    def add_history(self, count):
+        for i in range(count):
+            room = Room.objects.create(room_number=f'R{Room.objects.count()}', num_beds=1, room_type=Room.STANDARD_SINGLE, price=40)
+            RoomBooking.objects.create(room=room, booked_by=self.guest, booking_date=self.day, num_nights=1)
+            FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=1)
+            ServiceOrder.objects.create(service=self.service, ordered_by=self.guest, quantity=1)
+            InventoryItem.objects.create(name=f'Item {InventoryItem.objects.count()}', quantity=i)
+
+    def count_queries(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('dashboard'), params)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_query_count_does_not_grow_with_history(self):
+        self.add_history(3)
+        small = self.count_queries()
+        self.add_history(60)
+        self.assertEqual(self.count_queries(), small)
+
+    def test_sections_are_paginated_by_cursor(self):
+        self.add_history(30)
+        response = self.client.get(reverse('dashboard'))
+        page = response.context['food_orders']
+        self.assertEqual(len(page), 25)
+        self.assertTrue(page.has_next)
+        response = self.client.get(reverse('dashboard'), {'food_orders_after': page.next_cursor})
+        older = response.context['food_orders']
+        self.assertEqual(len(older), 5)
+        self.assertFalse(older.has_next)
+        self.assertTrue(max(o.pk for o in older) < min(o.pk for o in page))
+
+    def test_filters(self):
+        self.add_history(3)
+        FoodOrder.objects.filter(pk=FoodOrder.objects.first().pk).update(payment_status=FoodOrder.PAID)
+        response = self.client.get(reverse('dashboard'), {'status': 'paid', 'room': 'R1'})
+        self.assertEqual(len(response.context['food_orders']), 1)
+        self.assertEqual([b.room.room_number for b in response.context['room_bookings']], ['R1'])
+        response = self.client.get(reverse('dashboard'), {'date_from': self.day + datetime.timedelta(days=1)})
+        self.assertEqual(len(response.context['room_bookings']), 0)
+
+    def test_invalid_cursor_is_ignored(self):
+        self.add_history(2)
+        page = keyset_page(FoodOrder.objects.all(), after='not-a-number')
+        self.assertEqual(len(page), 2)
+
+
+class PaymentTests(TestCase):
+    def setUp(self):
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.other = Person.objects.create_user('other', 'other@example.com', 'pass12345')
+        self.food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+        self.service = Service.objects.create(service_id='S1', description='Gym pass', price=5, service_type=Service.GYM)
+        FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=2)
+        FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=1, payment_status=FoodOrder.PAID)
+        ServiceOrder.objects.create(service=self.service, ordered_by=self.guest, quantity=3)
+        FoodOrder.objects.create(food=self.food, ordered_by=self.other, quantity=5)
+        self.client.force_login(self.guest)
+
+    def test_balance_is_one_query_scoped_to_guest(self):
+        with self.assertNumQueries(1):
+            balance = outstanding_balance(self.guest)
+        self.assertEqual(balance['food_total'] + balance['service_total'], 39)
+        self.assertEqual(outstanding_balance(Person.objects.create_user('new', 'new@example.com'))['food_total'], 0)
+
+    def test_page_shows_only_own_balance(self):
+        response = self.client.get(reverse('payment'))
+        self.assertEqual(response.context['total_amount'], 39)
+        self.assertEqual(len(response.context['unpaid_food_orders']), 1)
+
+    def test_paying_settles_only_own_orders(self):
+        response = self.client.post(reverse('payment'), {'payment_method': 'cash'})
+        self.assertRedirects(response, reverse('dashboard'))
+        self.assertFalse(FoodOrder.objects.filter(ordered_by=self.guest, payment_status=FoodOrder.UNPAID).exists())
+        self.assertFalse(ServiceOrder.objects.filter(ordered_by=self.guest, payment_status=ServiceOrder.UNPAID).exists())
+        self.assertTrue(FoodOrder.objects.filter(ordered_by=self.other, payment_status=FoodOrder.UNPAID).exists())
+        payment = Payment.objects.get(user=self.guest)
+        self.assertEqual((payment.amount, payment.payment_method), (39, 'cash'))
+        self.assertEqual(Billing.objects.get(user=self.guest).status, Billing.PAID)
+
+    def test_nothing_owed_records_nothing(self):
+        self.client.post(reverse('payment'), {'payment_method': 'card'})
+        self.client.post(reverse('payment'), {'payment_method': 'card'})
+        self.assertEqual(Payment.objects.count(), 1)
+
+
+class SeedingAndBenchmarkTests(TestCase):
+    COUNTS = {
+        'persons': 12, 'employees': 2, 'rooms': 6, 'foods': 3, 'services': 2, 'bookings': 30,
+        'food_orders': 40, 'service_orders': 20, 'payments': 10, 'inventory_items': 5,
+    }
+
+    def test_generate_is_bulk_and_consistent(self):
+        created = generate(self.COUNTS, seed=1, prefix='t')
+        self.assertEqual(created['bookings'], 30)
+        self.assertEqual(Person.objects.count(), 12)
+        self.assertEqual(RoomNight.objects.count(), sum(RoomBooking.objects.values_list('num_nights', flat=True)))
+        self.assertTrue(Person.objects.first().check_password('hotel-guest'))
+
+    def test_report_covers_every_url(self):
+        generate(self.COUNTS, seed=1, prefix='t')
+        report = benchmarks.run(iterations=2)
+        timed = {key.split(' ')[1] for key in report['urls']}
+        named = {pattern.name for pattern in benchmarks.urls.urlpatterns}
+        self.assertEqual(timed, named)
+        self.assertEqual(report['skipped'], {})
+        stats = report['urls']['GET dashboard [employee]']
+        self.assertLessEqual(stats['p50_ms'], stats['p95_ms'])
+        self.assertGreater(stats['queries'], 0)
+        self.assertEqual(set(report['asgi']), set(benchmarks.ASGI_PAIRS))
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.client.force_login(self.guest)
+        request_stats.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('dashboard'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[0-9.]+;desc="\d+ queries"')
+        self.assertRegex(timing, r'tpl;dur=[0-9.]+')
+        self.assertRegex(timing, r'total;dur=[0-9.]+')
+
+    def test_over_budget_view_fails(self):
+        with mock.patch.object(views.dashboard, 'query_budget', 1):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('dashboard'))
+            with override_settings(QUERY_BUDGET_RAISE=False), self.assertLogs('website.middleware', 'WARNING'):
+                self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(self.client.get(reverse('request_stats')).status_code, 302)
+        staff = Person.objects.create_user('ops', 'ops@example.com', 'pass12345', is_staff=True)
+        self.client.force_login(staff)
+        stats = self.client.get(reverse('request_stats')).json()
+        self.assertEqual(stats['dashboard']['requests'], 1)
+        self.assertEqual(stats['dashboard']['query_budget'], 7)
+        self.assertGreater(stats['dashboard']['queries_max'], 0)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        catalog.clear()
+        self.food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+
+    def test_catalog_is_served_from_cache(self):
+        self.assertEqual(catalog.get('foods'), (self.food,))
+        with self.assertNumQueries(0):
+            form = FoodOrderForm(data={'food': self.food.pk, 'quantity': 2})
+            self.assertTrue(form.is_valid(), form.errors)
+            self.assertEqual(form.cleaned_data['food'], self.food)
+            self.assertEqual(form.fields['food'].catalog, [self.food])
+
+    def test_save_and_delete_invalidate(self):
+        catalog.get('foods')
+        burger = Food.objects.create(food_item_number='F2', description='Cheeseburger', price=9, food_type=Food.BURGER)
+        self.assertEqual(catalog.get('foods'), (self.food, burger))
+        burger.price = 10
+        burger.save()
+        self.assertEqual(catalog.get('foods')[1].price, 10)
+        self.food.delete()
+        self.assertEqual(catalog.get('foods'), (burger,))
+
+    def test_local_tier_reloads_from_shared_cache_on_new_version(self):
+        catalog.get('foods')
+        catalog.local_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(catalog.get('foods'), (self.food,))
+
+    def test_changes_from_other_processes_show_up_after_max_age(self):
+        catalog.get('foods')
+        # Another process's write: its version bump lands in that process's own cache.
+        Food.objects.filter(pk=self.food.pk).update(price=15)
+        self.assertEqual(catalog.get('foods')[0].price, 12)
+        later = time.time() + settings.CATALOG_MAX_AGE + 1
+        with mock.patch('time.time', return_value=later), mock.patch('time.monotonic', return_value=time.monotonic() + settings.CATALOG_MAX_AGE + 1):
+            self.assertEqual(catalog.get('foods')[0].price, 15)
+
+    def test_unknown_choice_is_rejected(self):
+        form = FoodOrderForm(data={'food': 999, 'quantity': 1})
+        self.assertFalse(form.is_valid())
+        self.assertIn('food', form.errors)
+
+
+class ResponsiveImageTests(TestCase):
+    def setUp(self):
+        self.static_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.static_dir)
+        settings = override_settings(STATICFILES_DIRS=[self.static_dir])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def render(self, source):
+        return Template('{% load responsive_images %}' + source).render(Context())
+
+    def test_unbuilt_image_falls_back_to_plain_img(self):
+        html = self.render("{% responsive_img 'hotel_management/gym.jpg' class='card-img-top' alt='Gym' %}")
+        self.assertInHTML('<img src="/static/hotel_management/gym.jpg" class="card-img-top" alt="Gym" loading="lazy" decoding="async">', html)
+
+    def test_build_writes_hashed_variants_and_srcset(self):
+        try:
+            from PIL import Image
+        except ImportError:
+            self.skipTest('Pillow is not installed')
+        (self.static_dir / 'hotel_management').mkdir()
+        Image.new('RGB', (1000, 500), 'teal').save(self.static_dir / 'hotel_management' / 'pool.jpg')
+        call_command('build_images', stdout=open(self.static_dir / 'build.log', 'w'))
+        manifest = json.loads((self.static_dir / 'responsive' / 'manifest.json').read_text())
+        entry = manifest['hotel_management/pool.jpg']
+        self.assertEqual([v['width'] for v in entry['variants']['webp']], [320, 640, 960, 1000])
+        for variant in entry['variants']['fallback'] + entry['variants']['webp']:
+            self.assertTrue((self.static_dir / variant['path']).exists())
+            self.assertRegex(variant['path'], r'-\d+w\.[0-9a-f]{12}\.(jpg|webp)$')
+
+        html = self.render("{% responsive_img 'hotel_management/pool.jpg' sizes='33vw' alt='Pool' %}")
+        self.assertIn('<source type="image/webp" srcset="/static/responsive/hotel_management/pool-320w.', html)
+        self.assertIn('sizes="33vw"', html)
+        self.assertIn('width="1000"', html)
+        self.assertIn('height="500"', html)
+        self.assertIn('/static/responsive/hotel_management/pool-960w.', self.render("{% responsive_src 'hotel_management/pool.jpg' 900 %}"))
+
+
+class PublicPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_pages_are_served_from_cache(self):
+        first = self.client.get(reverse('room'))
+        self.assertTemplateUsed(first, 'website/room.html')
+        self.client.cookies['csrftoken'] = 'something'
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('room'))
+        self.assertEqual(second.templates, [])
+        self.assertEqual(second.content, first.content)
+        self.assertIn('Cookie', second['Vary'])
+
+    def test_signed_in_users_get_fresh_pages(self):
+        self.client.get(reverse('about'))
+        guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.client.force_login(guest)
+        response = self.client.get(reverse('about'))
+        self.assertTemplateUsed(response, 'website/about.html')
+        self.assertContains(response, 'Log Out')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        self.client.logout()
+        self.assertContains(self.client.get(reverse('about')), 'Log In')
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    THREADS = 16
+    ATTEMPTS_PER_THREAD = 25
+
+    def setUp(self):
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.rooms = [
+            Room.objects.create(room_number=str(100 + i), num_beds=1, room_type=Room.STANDARD_SINGLE, price=50)
+            for i in range(4)
+        ]
+        self.day = datetime.date(2026, 1, 1)
+
+    def test_same_room_cannot_be_sold_twice(self):
+        reserve(RoomBooking(room=self.rooms[0], booked_by=self.guest, booking_date=self.day, num_nights=3))
+        with self.assertRaises(RoomUnavailable):
+            reserve(RoomBooking(room=self.rooms[0], booked_by=self.guest, booking_date=self.day + datetime.timedelta(days=2), num_nights=2))
+        self.assertEqual(RoomBooking.objects.count(), 1)
+        self.assertEqual(RoomNight.objects.count(), 3)
+
+    def test_concurrent_reservations_never_double_book(self):
+        counts = {'booked': 0, 'rejected': 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker(seed):
+            rng = random.Random(seed)
+            barrier.wait()
+            try:
+                for _ in range(self.ATTEMPTS_PER_THREAD):
+                    booking = RoomBooking(
+                        room=rng.choice(self.rooms), booked_by=self.guest,
+                        booking_date=self.day + datetime.timedelta(days=rng.randrange(10)), num_nights=rng.randint(1, 3),
+                    )
+                    while True:
+                        try:
+                            reserve(booking)
+                            outcome = 'booked'
+                        except RoomUnavailable:
+                            outcome = 'rejected'
+                        except OperationalError:
+                            # The in-memory SQLite test database allows a single writer
+                            # and reports contention instead of waiting; try again.
+                            booking.pk = None
+                            booking._state.adding = True
+                            time.sleep(0.001)
+                            continue
+                        break
+                    with lock:
+                        counts[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.THREADS)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        attempts = self.THREADS * self.ATTEMPTS_PER_THREAD
+        self.assertEqual(counts['booked'] + counts['rejected'], attempts)
+        self.assertEqual(RoomBooking.objects.count(), counts['booked'])
+        # Check the stays themselves rather than trusting the constraint.
+        for room in self.rooms:
+            stays = sorted(RoomBooking.objects.filter(room=room).values_list('booking_date', 'check_out'))
+            for (_, previous_out), (next_in, _) in zip(stays, stays[1:]):
+                self.assertLessEqual(previous_out, next_in)
+        if testing.verbosity >= 2:
+            sys.stderr.write(
+                f"\n{attempts} concurrent reservations in {elapsed:.2f}s "
+                f"({attempts / elapsed:.0f}/s): {counts['booked']} booked, {counts['rejected']} rejected\n"
+            )
+
+
+class LoadConcurrentlyTests(SimpleTestCase):
+    def test_loaders_overlap(self):
+        # Each loader waits for the other two, so this only finishes if all three run at once.
+        barrier = threading.Barrier(3, timeout=5)
+
+        def loader(value):
+            def load():
+                barrier.wait()
+                return value, threading.get_ident()
+            return load
+
+        results = async_to_sync(load_concurrently)({name: loader(name) for name in 'abc'})
+        self.assertEqual([value for value, _ in results.values()], ['a', 'b', 'c'])
+        self.assertEqual(len({thread for _, thread in results.values()}), 3)
+
+
+class AsyncViewTests(TransactionTestCase):
+    def setUp(self):
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        staff = Person.objects.create_user('clerk', 'clerk@example.com', 'pass12345')
+        Employee.objects.create(person=staff, employee_id='E1', role='Front desk')
+        self.staff = staff
+        room = Room.objects.create(room_number='101', num_beds=1, room_type=Room.STANDARD_SINGLE, price=50)
+        food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+        service = Service.objects.create(service_id='S1', description='Gym pass', price=5, service_type=Service.GYM)
+        RoomBooking.objects.create(room=room, booked_by=self.guest, booking_date=datetime.date(2026, 1, 1), num_nights=2)
+        FoodOrder.objects.create(food=food, ordered_by=self.guest, quantity=2)
+        ServiceOrder.objects.create(service=service, ordered_by=self.guest, quantity=1)
+
+    def test_loader_threads_close_their_connections(self):
+        def load():
+            Person.objects.count()
+            return connections['default']  # This worker thread's own connection
+        wrapper_class = type(connections['default'])
+        # SQLite never really closes an in-memory test database, so watch the calls instead.
+        with mock.patch.object(wrapper_class, 'close', autospec=True, side_effect=wrapper_class.close) as close:
+            results = async_to_sync(load_concurrently)({name: load for name in 'abc'})
+        closed = {call.args[0] for call in close.call_args_list}
+        for wrapper in results.values():
+            self.assertIsNot(wrapper, connections['default'])
+            self.assertIn(wrapper, closed)
+
+    def test_async_views_match_sync_views(self):
+        for user in (self.guest, self.staff):
+            self.client.force_login(user)
+            for sync_name, async_name in (('dashboard', 'dashboard_async'), ('payment', 'payment_async')):
+                expected = self.client.get(reverse(sync_name))
+                actual = self.client.get(reverse(async_name))
+                self.assertEqual(actual.status_code, 200)
+                self.assertEqual(actual.context.get('total_amount'), expected.context.get('total_amount'))
+                for section in ('room_bookings', 'food_orders', 'unpaid_food_orders', 'unpaid_service_orders'):
+                    if section in expected.context:
+                        self.assertEqual(list(actual.context[section]), list(expected.context[section]))
+
+    def test_asgi_dashboard(self):
+        client = AsyncClient()
+        async_to_sync(client.aforce_login)(self.guest)
+        response = async_to_sync(client.get)(reverse('dashboard_async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Server-Timing', response)
+        self.assertEqual([booking.room.room_number for booking in response.context['room_bookings']], ['101'])
+
+    def test_async_payment_settles(self):
+        self.client.force_login(self.guest)
+        response = self.client.post(reverse('payment_async'), {'payment_method': 'cash'})
+        self.assertRedirects(response, reverse('dashboard_async'))
+        self.assertEqual(Payment.objects.get().payment_method, 'cash')
+        self.assertFalse(FoodOrder.objects.filter(payment_status=FoodOrder.UNPAID).exists())
+
+    def test_anonymous_is_redirected_to_login(self):
+        response = self.client.get(reverse('dashboard_async'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('?next=', response['Location'])
+
+
+class DailyRevenueTests(TestCase):
+    def setUp(self):
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Room.objects.create(room_number='101', num_beds=1, room_type=Room.STANDARD_SINGLE, price=50)
+        self.food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+        self.service = Service.objects.create(service_id='S1', description='Gym pass', price=5, service_type=Service.GYM)
+        self.day = datetime.date(2026, 1, 1)
+
+    def rollup(self):
+        return {
+            (row.day, row.stream, row.category): (row.amount, row.count)
+            for row in DailyRevenue.objects.all()
+        }
+
+    def test_saves_and_deletes_update_the_rollup(self):
+        booking = RoomBooking.objects.create(room=self.room, booked_by=self.guest, booking_date=self.day, num_nights=2)
+        RoomBooking.objects.create(room=self.room, booked_by=self.guest, booking_date=self.day + datetime.timedelta(days=5), num_nights=1)
+        order = FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=2)
+        FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=1)
+        ServiceOrder.objects.create(service=self.service, ordered_by=self.guest, quantity=3)
+        Payment.objects.create(user=self.guest, amount=51, payment_method='card')
+        today = order.order_date.date() if isinstance(order.order_date, datetime.datetime) else order.order_date
+
+        rollup = self.rollup()
+        self.assertEqual(rollup[(self.day, DailyRevenue.ROOM, Room.STANDARD_SINGLE)], (100, 1))
+        self.assertEqual(rollup[(today, DailyRevenue.FOOD, Food.PIZZA)], (36, 2))
+        self.assertEqual(rollup[(today, DailyRevenue.SERVICE, Service.GYM)], (15, 1))
+        self.assertEqual(rollup[(today, DailyRevenue.PAYMENT, 'card')], (51, 1))
+
+        booking.num_nights = 3
+        booking.save()
+        order.delete()
+        rollup = self.rollup()
+        self.assertEqual(rollup[(self.day, DailyRevenue.ROOM, Room.STANDARD_SINGLE)], (150, 1))
+        self.assertEqual(rollup[(today, DailyRevenue.FOOD, Food.PIZZA)], (12, 1))
+
+        booking.delete()
+        self.assertNotIn((self.day, DailyRevenue.ROOM, Room.STANDARD_SINGLE), self.rollup())
+
+    def test_rebuild_matches_incremental_rollup(self):
+        generate(SeedingAndBenchmarkTests.COUNTS, seed=3, prefix='t')
+        FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=4)
+        RoomBooking.objects.create(room=self.room, booked_by=self.guest, booking_date=self.day, num_nights=2)
+        incremental = self.rollup()
+        DailyRevenue.objects.update(amount=0)
+        call_command('rebuild_revenue', stdout=open(os.devnull, 'w'))
+        self.assertEqual(self.rollup(), incremental)
+        food_total = sum(order.total_price for order in FoodOrder.objects.all())
+        self.assertEqual(sum(row.amount for row in DailyRevenue.objects.filter(stream=DailyRevenue.FOOD)), food_total)
+
+    def test_rebuild_limited_to_a_date_range(self):
+        RoomBooking.objects.create(room=self.room, booked_by=self.guest, booking_date=self.day, num_nights=1)
+        later = RoomBooking.objects.create(room=self.room, booked_by=self.guest, booking_date=self.day + datetime.timedelta(days=10), num_nights=1)
+        DailyRevenue.objects.update(amount=1)
+        call_command('rebuild_revenue', '--from', str(later.booking_date), stdout=open(os.devnull, 'w'))
+        rollup = self.rollup()
+        self.assertEqual(rollup[(self.day, DailyRevenue.ROOM, Room.STANDARD_SINGLE)][0], 1)
+        self.assertEqual(rollup[(later.booking_date, DailyRevenue.ROOM, Room.STANDARD_SINGLE)][0], 50)
+
+
+class OccupancyAnalyticsTests(TestCase):
+    def setUp(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest('NumPy is not installed')
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.single = Room.objects.create(room_number='101', num_beds=1, room_type=Room.STANDARD_SINGLE, price=50)
+        Room.objects.create(room_number='102', num_beds=1, room_type=Room.STANDARD_SINGLE, price=50)
+        self.family = Room.objects.create(room_number='301', num_beds=4, room_type=Room.LUXURY_FAMILY, price=200)
+        self.day = datetime.date(2026, 1, 10)
+
+    def test_occupancy_adr_and_revpar(self):
+        # Starts before the range, so only 2 of its 3 nights count.
+        RoomBooking.objects.create(room=self.single, booked_by=self.guest, booking_date=self.day - datetime.timedelta(days=1), num_nights=3)
+        RoomBooking.objects.create(room=self.family, booked_by=self.guest, booking_date=self.day + datetime.timedelta(days=3), num_nights=5)
+        performance = room_type_performance(self.day, self.day + datetime.timedelta(days=4))
+        rows = {row['room_type']: row for row in performance['room_types']}
+
+        single = rows[Room.STANDARD_SINGLE]
+        self.assertEqual((single['rooms'], single['available_nights'], single['sold_nights']), (2, 10, 2))
+        self.assertEqual((single['occupancy'], single['adr'], single['revpar']), (0.2, 50.0, 10.0))
+        self.assertEqual(single['daily_occupancy'], [0.5, 0.5, 0.0, 0.0, 0.0])
+        family = rows[Room.LUXURY_FAMILY]
+        self.assertEqual((family['sold_nights'], family['revenue'], family['revpar']), (2, 400.0, 80.0))
+        self.assertEqual(rows[Room.PREMIUM_DOUBLE]['occupancy'], 0.0)
+        self.assertEqual(performance['total']['sold_nights'], 4)
+        self.assertEqual(performance['total']['revenue'], 500.0)
+
+    def test_matches_per_night_count_on_seeded_data(self):
+        generate(SeedingAndBenchmarkTests.COUNTS, seed=5, prefix='t')
+        start = RoomNight.objects.order_by('night').first().night
+        end = start + datetime.timedelta(days=60)
+        with self.assertNumQueries(2):
+            performance = room_type_performance(start, end)
+        for row in performance['room_types']:
+            sold = RoomNight.objects.filter(room__room_type=row['room_type'], night__range=(start, end)).count()
+            self.assertEqual(row['sold_nights'], sold)
+
+    def test_view_is_employee_only(self):
+        self.client.force_login(self.guest)
+        self.assertEqual(self.client.get(reverse('analytics')).status_code, 403)
+        staff = Person.objects.create_user('clerk', 'clerk@example.com', 'pass12345')
+        Employee.objects.create(person=staff, employee_id='E1', role='Front desk')
+        self.client.force_login(staff)
+        response = self.client.get(reverse('analytics'), {'date_from': '2026-01-01', 'date_to': '2026-01-31'})
+        self.assertContains(response, 'Luxury Family Room')
+        self.assertEqual(response.context['performance']['nights'], 31)
+        response = self.client.get(reverse('analytics'), {'date_from': '2026-01-31', 'date_to': '2026-01-01'})
+        self.assertIsNone(response.context['performance'])
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('occupancy_report', '--from', '2026-01-01', '--to', '2026-01-31', stdout=out)
+        self.assertIn('All rooms', out.getvalue())
+
+
+class DynamicPricingTests(TestCase):
+    def setUp(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest('NumPy is not installed')
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.single = Room.objects.create(room_number='101', num_beds=1, room_type=Room.STANDARD_SINGLE, price=100)
+        self.family = Room.objects.create(room_number='301', num_beds=4, room_type=Room.LUXURY_FAMILY, price=200)
+        self.monday = datetime.date(2026, 3, 2)
+
+    def test_weekday_room_type_and_demand_factors(self):
+        room_ids, rates = pricing.compute_rates(self.monday, 7)
+        single, family = rates[list(room_ids).index(self.single.pk)], rates[list(room_ids).index(self.family.pk)]
+        # An empty house prices in the lowest demand band.
+        self.assertEqual(list(single), [round(100 * f * 0.9, 2) for f in pricing.WEEKDAY_FACTORS])
+        self.assertEqual(family[0], round(200 * 1.1 * 0.95 * 0.9, 2))
+
+        RoomBooking.objects.create(room=self.single, booked_by=self.guest, booking_date=self.monday, num_nights=1)
+        _, rates = pricing.compute_rates(self.monday, 1)
+        # One of one standard single rooms sold: full-house band.
+        self.assertEqual(rates[list(room_ids).index(self.single.pk)][0], round(100 * 0.95 * 1.25, 2))
+
+    def test_forecast_uses_same_weekday_history(self):
+        # Sold every Saturday for the last 8 weeks, nothing on the books yet.
+        saturday = self.monday + datetime.timedelta(days=5)
+        for week in range(1, pricing.HISTORY_WEEKS + 1):
+            RoomBooking.objects.create(room=self.single, booked_by=self.guest, booking_date=saturday - datetime.timedelta(weeks=week), num_nights=1)
+        import numpy
+        room_ids = numpy.array([self.single.pk, self.family.pk])
+        forecast = pricing.forecast_occupancy(self.monday, 7, room_ids, numpy.array([0, 4]))
+        self.assertEqual(list(forecast[0]), [0, 0, 0, 0, 0, 1, 0])
+        self.assertEqual(forecast[4].sum(), 0)
+
+    def test_bookings_read_the_rate_table(self):
+        call_command('reprice_rooms', '--from', str(self.monday), '--nights', '3', stdout=io.StringIO())
+        self.assertEqual(RoomRate.objects.count(), 6)
+        rates = dict(RoomRate.objects.filter(room=self.single).values_list('night', 'price'))
+        with self.assertNumQueries(1):
+            total = RoomRate.stay_price(self.single, self.monday + datetime.timedelta(days=1), 4)
+        # Two priced nights, then two at the room's base price.
+        self.assertEqual(total, rates[self.monday + datetime.timedelta(days=1)] + rates[self.monday + datetime.timedelta(days=2)] + 200)
+        booking = RoomBooking.objects.create(room=self.single, booked_by=self.guest, booking_date=self.monday + datetime.timedelta(days=1), num_nights=4)
+        self.assertEqual(booking.total_price, total)
+
+    def test_repricing_is_a_replace(self):
+        pricing.reprice(self.monday, 10)
+        self.single.price = 120
+        self.single.save()
+        self.assertEqual(pricing.reprice(self.monday, 10), 20)
+        self.assertEqual(RoomRate.objects.count(), 20)
+        self.assertEqual(RoomRate.objects.get(room=self.single, night=self.monday).price, Decimal('102.60'))
+
+
+class InventoryConsumptionTests(TestCase):
+    def setUp(self):
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+        self.service = Service.objects.create(service_id='S1', description='Pool day', price=30, service_type=Service.SWIMMING_POOL)
+        self.dough = InventoryItem.objects.create(name='dough', quantity=10, low_stock_threshold=2)
+        self.cheese = InventoryItem.objects.create(name='cheese', quantity=7, low_stock_threshold=3)
+        self.towels = InventoryItem.objects.create(name='towels', quantity=5)
+        FoodIngredient.objects.create(food=self.food, item=self.dough, quantity=1)
+        FoodIngredient.objects.create(food=self.food, item=self.cheese, quantity=2)
+        ServiceSupply.objects.create(service=self.service, item=self.towels, quantity=2)
+
+    def stock(self):
+        return dict(InventoryItem.objects.values_list('name', 'quantity'))
+
+    def test_orders_consume_their_recipe_in_one_update(self):
+        with CaptureQueriesContext(connection) as captured:
+            FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=3)
+        updates = [q['sql'] for q in captured if q['sql'].startswith('UPDATE "website_inventoryitem"')]
+        self.assertEqual(len(updates), 1)
+        ServiceOrder.objects.create(service=self.service, ordered_by=self.guest, quantity=2)
+        self.assertEqual(self.stock(), {'dough': 7, 'cheese': 1, 'towels': 1})
+        self.assertEqual(list(InventoryItem.objects.low_stock().values_list('name', flat=True)), ['cheese'])
+
+    def test_non_positive_quantities_are_rejected(self):
+        for quantity in (0, -5):
+            self.assertIn('quantity', FoodOrderForm({'food': self.food.pk, 'quantity': quantity}).errors)
+            self.assertIn('quantity', ServiceBookingForm({'service': self.service.pk, 'quantity': quantity}).errors)
+        with self.assertRaises(ValueError):
+            FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=-5)
+        self.assertFalse(FoodOrder.objects.exists())
+        self.assertEqual(self.stock(), {'dough': 10, 'cheese': 7, 'towels': 5})
+
+    def test_short_stock_rejects_the_whole_order(self):
+        with self.assertRaises(InsufficientStock):
+            FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=4)
+        self.assertFalse(FoodOrder.objects.exists())
+        self.assertEqual(self.stock(), {'dough': 10, 'cheese': 7, 'towels': 5})
+
+        self.client.force_login(self.guest)
+        response = self.client.post(reverse('food_order'), {'food': self.food.pk, 'quantity': 4})
+        self.assertContains(response, 'Not enough stock')
+        self.assertFalse(FoodOrder.objects.exists())
+
+    def test_editing_an_order_does_not_consume_again(self):
+        order = FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=1)
+        order.payment_status = FoodOrder.PAID
+        order.save()
+        self.assertEqual(self.stock()['dough'], 9)
+
+    def test_bulk_adjust_command(self):
+        out = io.StringIO()
+        call_command('adjust_inventory', 'dough=+5', 'cheese=-6', stdout=out)
+        self.assertEqual(self.stock(), {'dough': 15, 'cheese': 1, 'towels': 5})
+        self.assertIn('cheese', out.getvalue())
+        self.assertNotIn('dough ', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('adjust_inventory', 'flour=+1', stdout=out)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        staff = Person.objects.create_user('clerk', 'clerk@example.com', 'pass12345')
+        Employee.objects.create(person=staff, employee_id='E1', role='Accounts')
+        self.staff = staff
+        room = Room.objects.create(room_number='101', num_beds=1, room_type=Room.STANDARD_SINGLE, price=50)
+        for day in (1, 15, 28):
+            RoomBooking.objects.create(room=room, booked_by=self.guest, booking_date=datetime.date(2026, 2, day), num_nights=1)
+        Payment.objects.create(user=self.guest, amount=75, payment_method='card')
+
+    def test_csv_export_streams_filtered_rows(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('export', args=['bookings']), {'date_from': '2026-02-10', 'date_to': '2026-02-28'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="bookings.csv"')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'room__room_number', 'room__room_type'])
+        self.assertEqual([line.split(',')[4] for line in lines[1:]], ['2026-02-15', '2026-02-28'])
+
+    def test_json_export_is_valid_json(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('export', args=['payments']), {'format': 'json'})
+        payments = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(payments), 1)
+        self.assertEqual((payments[0]['user__username'], payments[0]['amount']), ('guest', '75.00'))
+        booking = RoomBooking.objects.get(booking_date=datetime.date(2026, 2, 15))
+        Billing.objects.create(user=self.guest, booking=booking, amount=50, status=Billing.PAID)
+        response = self.client.get(reverse('export', args=['billings']), {'format': 'json'})
+        billings = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['booking_id'] for row in billings], [booking.pk])
+
+    def test_export_is_employee_only_and_validates_input(self):
+        self.client.force_login(self.guest)
+        self.assertEqual(self.client.get(reverse('export', args=['bookings'])).status_code, 403)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('export', args=['rooms'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('export', args=['bookings']), {'format': 'xml'}).status_code, 400)
+
+    def test_rows_are_fetched_in_chunks(self):
+        with mock.patch.object(exports, 'CHUNK_SIZE', 2):
+            chunks = exports.stream('bookings', 'csv')
+            self.assertTrue(next(chunks).startswith('id,'))
+            with CaptureQueriesContext(connection) as captured:
+                body = ''.join(chunks)
+        self.assertEqual(len(captured), 1)
+        self.assertEqual(body.count('\n'), 3)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('export_data', 'bookings', '--from', '2026-02-15', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def write(self, name, text):
+        path = self.dir / name
+        path.write_text(text)
+        return str(path)
+
+    def test_csv_upserts_on_the_unique_key(self):
+        Room.objects.create(room_number='101', num_beds=1, room_type=Room.STANDARD_SINGLE, price=50)
+        catalog.get('rooms')
+        path = self.write('rooms.csv', 'room_number,num_beds,room_type,price\n101,2,standard_double,80\n102,1,standard_single,55.50\n')
+        out = io.StringIO()
+        call_command('import_data', 'rooms', path, stdout=out)
+        self.assertIn('1 created, 1 updated', out.getvalue())
+        self.assertEqual(list(Room.objects.order_by('room_number').values_list('room_number', 'num_beds', 'price', 'is_available')),
+                         [('101', 2, Decimal('80.00'), True), ('102', 1, Decimal('55.50'), True)])
+        self.assertEqual(len(catalog.get('rooms')), 2)
+
+    def test_invalid_rows_abort_or_are_skipped(self):
+        path = self.write('menu.jsonl', '\n'.join([
+            json.dumps({'food_item_number': 'F1', 'description': 'Margherita', 'price': '12', 'food_type': 'pizza'}),
+            json.dumps({'food_item_number': 'F2', 'description': 'Soup', 'price': 'cheap', 'food_type': 'soup'}),
+        ]))
+        err = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('import_data', 'foods', path, stdout=io.StringIO(), stderr=err)
+        self.assertIn('line 2: price', err.getvalue())
+        self.assertIn('food_type', err.getvalue())
+        self.assertFalse(Food.objects.exists())
+
+        call_command('import_data', 'foods', path, '--skip-invalid', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(list(Food.objects.values_list('food_item_number', flat=True)), ['F1'])
+
+    def test_guests_with_phone_numbers_and_hashed_passwords(self):
+        existing = Person.objects.create_user('amina', 'amina@example.com', 'pass12345')
+        hashed = make_password('welcome-back')
+        path = self.write('guests.csv', (
+            'username,email,first_name,last_name,phone_number\n'
+            'amina,amina@example.org,Amina,Rahman,+8801711111111\n'
+            'omar,omar@example.org,Omar,Faruk,+8801722222222\n'
+        ))
+        call_command('import_data', 'guests', path, stdout=io.StringIO())
+        existing.refresh_from_db()
+        self.assertEqual(existing.email, 'amina@example.org')
+        self.assertTrue(existing.check_password('pass12345'))
+        self.assertFalse(Person.objects.get(username='omar').has_usable_password())
+        self.assertEqual(PhoneNumber.objects.get(person__username='omar').number, '+8801722222222')
+
+        path = self.write('passwords.csv', f'username,email,first_name,last_name,password\nomar,omar@example.org,Omar,Faruk,{hashed}\n')
+        call_command('import_data', 'guests', path, stdout=io.StringIO())
+        self.assertTrue(Person.objects.get(username='omar').check_password('welcome-back'))
+        self.assertEqual(PhoneNumber.objects.filter(person__username='omar').count(), 1)
+
+        path = self.write('blank.csv', 'username,email,first_name,last_name,password\nomar,omar@example.net,Omar,Faruk,\nnadia,nadia@example.org,Nadia,Islam,\n')
+        call_command('import_data', 'guests', path, stdout=io.StringIO())
+        omar = Person.objects.get(username='omar')
+        self.assertEqual(omar.email, 'omar@example.net')
+        self.assertTrue(omar.check_password('welcome-back'))
+        self.assertFalse(Person.objects.get(username='nadia').has_usable_password())
+
+    def test_unknown_and_missing_columns(self):
+        path = self.write('inventory.csv', 'name,colour\nflour,white\n')
+        err = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('import_data', 'inventory', path, stdout=io.StringIO(), stderr=err)
+        self.assertIn("unknown column 'colour'", err.getvalue())
+        path = self.write('rooms.csv', 'room_number,price\n101,50\n')
+        with self.assertRaises(CommandError):
+            call_command('import_data', 'rooms', path, stdout=io.StringIO(), stderr=err)
+        self.assertIn("missing column 'num_beds'", err.getvalue())
+
+    def test_every_jsonl_record_is_checked(self):
+        first = {'name': 'flour', 'quantity': 10, 'low_stock_threshold': 2}
+        path = self.write('inventory.jsonl', '\n'.join([
+            json.dumps(first),
+            json.dumps({**first, 'name': 'sugar', 'colour': 'white'}),
+            json.dumps(['salt', 5, 1]),
+            json.dumps({'name': 'rice', 'quantity': 3}),
+        ]))
+        err = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('import_data', 'inventory', path, stdout=io.StringIO(), stderr=err)
+        self.assertIn("line 2: unknown column 'colour'", err.getvalue())
+        self.assertIn('line 3: not an object of column values', err.getvalue())
+        self.assertIn("line 4: missing column 'low_stock_threshold'", err.getvalue())
+        self.assertFalse(InventoryItem.objects.exists())
+        path = self.write('list.jsonl', json.dumps(['salt', 5, 1]))
+        with self.assertRaises(CommandError):
+            call_command('import_data', 'inventory', path, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_large_file_is_batched(self):
+        lines = ['name,quantity,low_stock_threshold'] + [f'item {i},{i % 50},5' for i in range(5000)]
+        path = self.write('inventory.csv', '\n'.join(lines) + '\n')
+        with CaptureQueriesContext(connection) as captured:
+            report = importing.run('inventory', importing.read_records(path), batch_size=1000)
+        self.assertEqual(report['created'], 5000)
+        self.assertLess(len(captured), 30)
+        self.assertEqual(InventoryItem.objects.low_stock().count(), 600)
+
+
+class SessionRoleTests(TestCase):
+    def setUp(self):
+        self.staff = Person.objects.create_user('clerk', 'clerk@example.com', 'pass12345')
+        self.employee = Employee.objects.create(person=self.staff, employee_id='E1', role='Front desk')
+
+    def dashboard_queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('dashboard'))
+        return response, [query['sql'] for query in captured]
+
+    def test_dashboard_skips_session_and_employee_lookups(self):
+        self.client.force_login(self.staff)
+        response, queries = self.dashboard_queries()
+        self.assertTemplateUsed(response, 'website/dashboard_employee.html')
+        self.assertFalse([sql for sql in queries if 'django_session' in sql or 'website_employee' in sql])
+
+    def test_role_change_applies_to_existing_sessions(self):
+        self.client.force_login(self.staff)
+        self.employee.delete()
+        response, queries = self.dashboard_queries()
+        self.assertTemplateUsed(response, 'website/dashboard.html')
+        self.assertEqual(self.client.get(reverse('analytics')).status_code, 403)
+        Employee.objects.create(person=self.staff, employee_id='E2', role='Manager')
+        self.assertEqual(self.client.get(reverse('analytics')).status_code, 200)
+
+    def test_sessions_fall_back_to_the_database(self):
+        self.client.force_login(self.staff)
+        cache.clear()
+        response, queries = self.dashboard_queries()
+        self.assertTemplateUsed(response, 'website/dashboard_employee.html')
+        self.assertTrue([sql for sql in queries if 'django_session' in sql])
+
+
+@override_settings(LOGIN_THROTTLE_PER_IP=(3, 1), LOGIN_THROTTLE_PER_USERNAME=(2, 1))
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+
+    def attempt(self, password, username='guest', ip='10.0.0.1'):
+        return self.client.post(reverse('login'), {'username': username, 'password': password}, REMOTE_ADDR=ip)
+
+    def test_ip_bucket_refuses_bursts_without_hashing(self):
+        for i in range(3):
+            self.assertEqual(self.attempt('wrong', username=f'nobody{i}').status_code, 200)
+        with mock.patch('website.views.authenticate') as authenticate:
+            response = self.attempt('pass12345')
+        authenticate.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        # Other clients are unaffected.
+        self.assertEqual(self.attempt('pass12345', ip='10.0.0.2').status_code, 302)
+
+    def test_username_bucket_counts_failures_only(self):
+        self.assertEqual(self.attempt('pass12345', ip='10.0.0.1').status_code, 302)
+        self.client.logout()
+        self.attempt('wrong', ip='10.0.0.2')
+        self.attempt('wrong', ip='10.0.0.3')
+        self.assertEqual(self.attempt('pass12345', ip='10.0.0.4').status_code, 429)
+
+    def test_token_bucket_refills(self):
+        bucket = throttling.TokenBucket('test', 1, 60)
+        now = time.time()
+        with mock.patch('time.time', return_value=now):
+            self.assertEqual(bucket.take('k'), 0)
+            self.assertAlmostEqual(bucket.take('k'), 1.0)
+        with mock.patch('time.time', return_value=now - 30):
+            # Clock stepped back: no refill, no negative one either.
+            self.assertAlmostEqual(bucket.take('k'), 1.0)
+        with mock.patch('time.time', return_value=now + 1):
+            self.assertEqual(bucket.take('k'), 0)
+
+    def test_password_is_rehashed_at_the_configured_cost(self):
+        old_hash = self.guest.password
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            self.assertEqual(self.attempt('pass12345').status_code, 302)
+        self.guest.refresh_from_db()
+        self.assertNotEqual(self.guest.password, old_hash)
+        self.assertTrue(self.guest.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(self.guest.check_password('pass12345'))
+
+
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        generate(SeedingAndBenchmarkTests.COUNTS, seed=5, prefix='t')
+
+    def test_hot_queries_use_indexes(self):
+        found = query_plans.regressions()
+        self.assertEqual([(name, table) for name, table, sql, plan in found], [], found)
+
+    def test_every_hot_query_is_explained(self):
+        ctx = query_plans.build_context()
+        for name, hot in query_plans.HOT_QUERIES.items():
+            with self.subTest(name):
+                self.assertTrue(query_plans.capture(hot.sections(ctx)))
+
+    def test_full_scan_is_reported(self):
+        sql, params = FoodOrder.objects.filter(quantity=3).query.sql_with_params()
+        self.assertIn('website_foodorder', query_plans.full_scans(query_plans.explain(sql, params)))
+        sql, params = FoodOrder.objects.filter(ordered_by_id=1, payment_status=FoodOrder.UNPAID).query.sql_with_params()
+        self.assertEqual(query_plans.full_scans(query_plans.explain(sql, params)), set())
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_stay_on_primary_without_a_replica(self):
+        routing = routers.ReadRouting()
+        routing.replica = True
+        token = routers.current_routing.set(routing)
+        try:
+            self.assertIsNone(routers.replica_alias())
+            self.assertEqual(routers.ReplicaRouter().db_for_read(Room), 'default')
+        finally:
+            routers.current_routing.reset(token)
+
+    def test_sync_replica_needs_a_replica(self):
+        with self.assertRaises(CommandError):
+            call_command('sync_replica', stdout=io.StringIO())
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """Routing against a real second SQLite file, refreshed from the test primary by sync_replica."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        connections.settings['replica'] = {
+            **connections.settings['default'], 'NAME': os.path.join(self.directory, 'replica.sqlite3'),
+        }
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        clerk = Person.objects.create_user('clerk', 'clerk@example.com', 'pass12345')
+        Employee.objects.create(person=clerk, employee_id='E1', role='Front desk')
+        self.clerk = clerk
+        self.food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+        FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=1)
+        call_command('sync_replica', stdout=io.StringIO())
+        # Written after the last sync: only the primary has it.
+        FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=2)
+
+    def tearDown(self):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        shutil.rmtree(self.directory)
+
+    def test_read_only_views_read_the_replica(self):
+        self.client.force_login(self.guest)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(len(response.context['food_orders']), 1)
+        self.client.force_login(self.clerk)
+        response = self.client.get(reverse('export', kwargs={'dataset': 'food_orders'}))
+        self.assertEqual(len(b''.join(response.streaming_content).decode().strip().splitlines()), 2)
+
+    def test_a_write_pins_the_client_to_the_primary(self):
+        self.client.force_login(self.guest)
+        response = self.client.post(reverse('food_order'), {'food': self.food.pk, 'quantity': 1})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(len(response.context['food_orders']), 3)
+        call_command('sync_replica', stdout=io.StringIO())
+        self.client.cookies.pop(routers.PIN_COOKIE)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(len(response.context['food_orders']), 3)
+
+    def test_writes_never_reach_the_replica(self):
+        routing = routers.ReadRouting()
+        routing.replica = True
+        token = routers.current_routing.set(routing)
+        try:
+            order = FoodOrder.objects.get(quantity=1)
+            self.assertEqual(order._state.db, 'replica')
+            order.payment_status = FoodOrder.PAID
+            order.save()
+        finally:
+            routers.current_routing.reset(token)
+        self.assertEqual(FoodOrder.objects.using('default').get(pk=order.pk).payment_status, FoodOrder.PAID)
+        with connections['replica'].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            with self.assertRaises(OperationalError):
+                cursor.execute('DELETE FROM website_foodorder')
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.other = Person.objects.create_user('other', 'other@example.com', 'pass12345')
+        self.room = Room.objects.create(room_number='101', num_beds=1, room_type=Room.STANDARD_SINGLE, price=50)
+        food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+        service = Service.objects.create(service_id='S1', description='Gym pass', price=5, service_type=Service.GYM)
+        self.today = timezone.localdate()
+        self.booking = RoomBooking.objects.create(
+            room=self.room, booked_by=self.guest, booking_date=self.today - datetime.timedelta(days=1), num_nights=3,
+        )
+        for _ in range(3):
+            FoodOrder.objects.create(food=food, ordered_by=self.guest, quantity=2)
+        ServiceOrder.objects.create(service=service, ordered_by=self.guest, quantity=1)
+        FoodOrder.objects.create(food=food, ordered_by=self.other, quantity=1)
+        ServiceOrder.objects.create(service=service, ordered_by=self.other, quantity=1)
+
+    def test_checkout_bills_the_folio_and_keeps_the_stay(self):
+        self.client.force_login(self.guest)
+        response = self.client.post(reverse('checkout', args=[self.booking.pk]))
+        self.assertRedirects(response, reverse('dashboard'))
+        billing = Billing.objects.get()
+        self.assertEqual(billing.booking, self.booking)
+        self.assertEqual(billing.status, Billing.PAID)
+        # One night stayed of the three booked.
+        self.assertEqual(billing.amount, 50 + 3 * 24 + 5)
+        self.booking.refresh_from_db()
+        self.assertIsNotNone(self.booking.checked_out_at)
+        self.assertEqual((self.booking.num_nights, self.booking.check_out, self.booking.total_price), (1, self.today, 50))
+        self.assertEqual(DailyRevenue.objects.get(stream=DailyRevenue.ROOM).amount, 50)
+        self.assertEqual(ledger.drift(), [])
+        self.assertFalse(FoodOrder.objects.filter(ordered_by=self.guest, payment_status=FoodOrder.UNPAID).exists())
+        self.assertTrue(FoodOrder.objects.filter(ordered_by=self.other, payment_status=FoodOrder.UNPAID).exists())
+        # The night already stayed stays booked; tonight and tomorrow go back on sale.
+        self.assertEqual(list(self.booking.room_nights.values_list('night', flat=True)), [self.today - datetime.timedelta(days=1)])
+
+    def test_query_count_does_not_grow_with_orders(self):
+        booking = RoomBooking.objects.create(
+            room=self.room, booked_by=self.other, booking_date=self.today + datetime.timedelta(days=10), num_nights=1,
+        )
+        with CaptureQueriesContext(connection) as few:
+            billing.close_folio(booking)
+        with CaptureQueriesContext(connection) as many:
+            billing.close_folio(self.booking)
+        self.assertEqual(len(few), len(many))
+
+    def test_checkout_is_idempotent(self):
+        self.client.force_login(self.guest)
+        self.client.post(reverse('checkout', args=[self.booking.pk]))
+        self.client.post(reverse('checkout', args=[self.booking.pk]))
+        self.assertEqual(Billing.objects.count(), 1)
+
+    def test_only_the_guest_or_staff_can_check_out(self):
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.post(reverse('checkout', args=[self.booking.pk])).status_code, 403)
+        self.assertEqual(self.client.get(reverse('checkout', args=[self.booking.pk])).status_code, 405)
+        Employee.objects.create(person=self.other, employee_id='E1', role='Front desk')
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.post(reverse('checkout', args=[self.booking.pk])).status_code, 302)
+        self.assertEqual(Billing.objects.get().user, self.guest)
+
+
+class GuestLedgerTests(TestCase):
+    def setUp(self):
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.room = Room.objects.create(room_number='101', num_beds=1, room_type=Room.STANDARD_SINGLE, price=50)
+        self.food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+        self.service = Service.objects.create(service_id='S1', description='Gym pass', price=5, service_type=Service.GYM)
+        self.order = FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=2)
+        ServiceOrder.objects.create(service=self.service, ordered_by=self.guest, quantity=3)
+        self.booking = RoomBooking.objects.create(
+            room=self.room, booked_by=self.guest, booking_date=timezone.localdate(), num_nights=2,
+        )
+
+    def figures(self):
+        balance = ledger.balance(self.guest)
+        return balance.food_due, balance.service_due, balance.room_due, balance.paid
+
+    def test_changes_keep_the_balance_current(self):
+        self.assertEqual(self.figures(), (24, 15, 100, 0))
+        self.order.quantity = 3
+        self.order.save()
+        self.assertEqual(self.figures()[0], 36)
+        self.order.payment_status = FoodOrder.PAID
+        self.order.save()
+        self.assertEqual(self.figures()[0], 0)
+        self.booking.delete()
+        self.assertEqual(self.figures()[2], 0)
+        self.assertEqual(ledger.drift(), [])
+
+    def test_payment_and_checkout_settle_the_balance(self):
+        self.client.force_login(self.guest)
+        self.assertEqual(self.client.get(reverse('payment')).context['total_amount'], 39)
+        self.client.post(reverse('payment'), {'payment_method': 'card'})
+        self.assertEqual(self.figures(), (0, 0, 100, 39))
+        FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=1)
+        billing.close_folio(self.booking)
+        self.assertEqual(self.figures(), (0, 0, 0, 39))
+        self.assertEqual(ledger.drift(), [])
+
+    def test_reading_a_balance_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(ledger.balance(self.guest).total_due, 139)
+        newcomer = Person(pk=10**6)
+        with self.assertNumQueries(1):
+            self.assertEqual(ledger.balance(newcomer).total_due, 0)
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        call_command('reconcile_balances', stdout=io.StringIO())
+        GuestBalance.objects.filter(person=self.guest).update(food_due=1)
+        out = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('reconcile_balances', stdout=out)
+        self.assertIn('food_due is 1, should be 24', out.getvalue())
+        call_command('reconcile_balances', '--fix', stdout=io.StringIO())
+        self.assertEqual(self.figures()[0], 24)
+
+    def test_deleting_a_guest_takes_their_balance(self):
+        self.guest.delete()
+        self.assertFalse(GuestBalance.objects.exists())
+
+
+class JsonApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.other = Person.objects.create_user('other', 'other@example.com', 'pass12345')
+        clerk = Person.objects.create_user('clerk', 'clerk@example.com', 'pass12345')
+        Employee.objects.create(person=clerk, employee_id='E1', role='Front desk')
+        self.clerk = clerk
+        self.food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+        for _ in range(5):
+            FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=1)
+        FoodOrder.objects.create(food=self.food, ordered_by=self.other, quantity=1)
+
+    def get(self, resource, **params):
+        return self.client.get(reverse('api', kwargs={'resource': resource}), params)
+
+    def test_guests_see_their_own_rows_a_page_at_a_time(self):
+        self.client.force_login(self.guest)
+        first = self.get('food_orders', limit=3).json()
+        self.assertEqual(len(first['results']), 3)
+        self.assertEqual({row['ordered_by_id'] for row in first['results']}, {self.guest.pk})
+        second = self.client.get(reverse('api', kwargs={'resource': 'food_orders'}) + first['next']).json()
+        self.assertEqual(len(second['results']), 2)
+        self.assertIsNone(second['next'])
+        self.assertLess(first['results'][-1]['id'], second['results'][0]['id'])
+
+    def test_staff_see_every_row(self):
+        self.client.force_login(self.clerk)
+        self.assertEqual(len(self.get('food_orders').json()['results']), 6)
+
+    def test_sparse_fields(self):
+        self.client.force_login(self.guest)
+        rows = self.get('food_orders', fields='food__food_item_number,total_price').json()['results']
+        self.assertEqual(rows[0], {'id': rows[0]['id'], 'food__food_item_number': 'F1', 'total_price': 12})
+        response = self.get('food_orders', fields='password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json()['errors'])
+
+    def test_etag_and_if_none_match(self):
+        self.client.force_login(self.guest)
+        response = self.get('food_orders')
+        etag = response['ETag']
+        again = self.client.get(reverse('api', kwargs={'resource': 'food_orders'}), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+        FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=2)
+        changed = self.client.get(reverse('api', kwargs={'resource': 'food_orders'}), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_query_count_is_constant_per_page(self):
+        self.client.force_login(self.guest)
+        self.get('bookings')
+        with CaptureQueriesContext(connection) as small:
+            self.get('food_orders', fields='food__food_item_number')
+        for _ in range(40):
+            FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=1)
+        with CaptureQueriesContext(connection) as large:
+            self.get('food_orders', fields='food__food_item_number')
+        self.assertEqual(len(small), len(large))
+
+    def test_errors(self):
+        self.assertEqual(self.get('food_orders').status_code, 401)
+        self.client.force_login(self.guest)
+        self.assertEqual(self.get('passwords').status_code, 404)
+        self.assertEqual(self.get('rooms', limit=1000).status_code, 400)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345', first_name='Ada')
+        self.food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+        self.order = FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=1)
+        self.client.force_login(self.guest)
+        # The first page sets the CSRF cookie, which is part of the ETag.
+        self.client.get(reverse('dashboard'))
+
+    def etag(self):
+        return self.client.get(reverse('dashboard'))['ETag']
+
+    def test_unchanged_dashboard_is_not_modified(self):
+        etag = self.etag()
+        self.assertEqual(self.etag(), etag)
+        response = self.client.get(reverse('dashboard'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response.templates, [])
+
+    def test_changes_to_the_guests_rows_change_the_etag(self):
+        seen = {self.etag()}
+        changes = [
+            lambda: FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=2),
+            lambda: FoodOrder.objects.filter(pk=self.order.pk).update(quantity=3, updated_at=timezone.now()),
+            lambda: FoodOrder.objects.filter(pk=self.order.pk).delete(),
+            lambda: billing.settle(self.guest, 'card'),
+            lambda: catalog.invalidate('foods'),
+        ]
+        for change in changes:
+            change()
+            etag = self.etag()
+            self.assertNotIn(etag, seen)
+            seen.add(etag)
+
+    def test_other_guests_rows_do_not_change_the_etag(self):
+        etag = self.etag()
+        other = Person.objects.create_user('other', 'other@example.com', 'pass12345')
+        FoodOrder.objects.create(food=self.food, ordered_by=other, quantity=1)
+        self.assertEqual(self.etag(), etag)
+
+    def test_staff_dashboards_are_always_rendered(self):
+        clerk = Person.objects.create_user('clerk', 'clerk@example.com', 'pass12345')
+        Employee.objects.create(person=clerk, employee_id='E1', role='Front desk')
+        self.client.force_login(clerk)
+        self.assertFalse(self.client.get(reverse('dashboard')).has_header('ETag'))
+
+    def test_catalog_pages(self):
+        signed_in = self.client.get(reverse('room'))['ETag']
+        self.assertEqual(self.client.get(reverse('room'), HTTP_IF_NONE_MATCH=signed_in).status_code, 304)
+        self.client.logout()
+        anonymous = self.client.get(reverse('room'), HTTP_IF_NONE_MATCH=signed_in)
+        self.assertEqual(anonymous.status_code, 200)
+        self.assertNotEqual(anonymous['ETag'], signed_in)
+        self.assertNotEqual(anonymous['ETag'], self.client.get(reverse('about'))['ETag'])
+
+
+class TaskQueueTests(TransactionTestCase):
+    def setUp(self):
+        self.guest = Person.objects.create_user('guest', 'guest@example.com', 'pass12345')
+        self.food = Food.objects.create(food_item_number='F1', description='Margherita', price=12, food_type=Food.PIZZA)
+        self.failures = 0
+
+        def flaky():
+            self.failures += 1
+            raise RuntimeError('mail server down')
+
+        self.flaky = tasks.task(max_attempts=2)(flaky)
+        self.addCleanup(tasks.REGISTRY.pop, 'flaky')
+
+    def test_orders_are_confirmed_by_the_worker(self):
+        self.client.force_login(self.guest)
+        response = self.client.post(reverse('food_order'), {'food': self.food.pk, 'quantity': 2})
+        self.assertRedirects(response, reverse('dashboard'))
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Task.objects.get().payload, {'kind': 'food_order', 'pk': FoodOrder.objects.get().pk})
+        self.assertEqual(tasks.work(threads=2, once=True), {Task.DONE: 1, Task.QUEUED: 0, Task.FAILED: 0})
+        self.assertEqual(mail.outbox[0].to, ['guest@example.com'])
+        self.assertIn('2 x Margherita', mail.outbox[0].body)
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+
+    def test_rolled_back_work_queues_nothing(self):
+        with transaction.atomic():
+            tasks.enqueue(tasks.send_confirmation, kind='food_order', pk=1)
+            transaction.set_rollback(True)
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASK_RETRY_BACKOFF=(10, 60))
+    def test_failures_are_retried_with_backoff_then_given_up(self):
+        tasks.enqueue(self.flaky)
+        started = timezone.now()
+        with self.assertLogs('website.tasks', 'WARNING'):
+            self.assertEqual(tasks.work(once=True), {Task.DONE: 0, Task.QUEUED: 1, Task.FAILED: 0})
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.attempts), (Task.QUEUED, 1))
+        self.assertGreaterEqual(task.run_after, started + datetime.timedelta(seconds=5))
+        self.assertIn('mail server down', task.last_error)
+        # Not due yet, so a second pass leaves it alone.
+        self.assertEqual(tasks.work(once=True)[Task.FAILED], 0)
+        Task.objects.update(run_after=timezone.now())
+        with self.assertLogs('website.tasks', 'ERROR'):
+            self.assertEqual(tasks.work(once=True), {Task.DONE: 0, Task.QUEUED: 0, Task.FAILED: 1})
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+        self.assertEqual(self.failures, 2)
+
+    @override_settings(TASK_RETRY_BACKOFF=(10, 60))
+    def test_backoff_doubles_up_to_the_cap(self):
+        for attempts, low, high in [(1, 5, 10), (2, 10, 20), (3, 20, 40), (10, 30, 60)]:
+            delay = tasks.backoff(attempts).total_seconds()
+            self.assertTrue(low <= delay <= high, (attempts, delay))
+
+    def test_expired_leases_are_claimed_again(self):
+        past, future = timezone.now() - datetime.timedelta(minutes=1), timezone.now() + datetime.timedelta(minutes=1)
+        abandoned = Task.objects.create(name='flaky', status=Task.RUNNING, attempts=1, run_after=past)
+        Task.objects.create(name='flaky', status=Task.RUNNING, attempts=1, run_after=future)
+        Task.objects.create(name='flaky', status=Task.DONE, attempts=1, run_after=past)
+        claimed = tasks.claim(10)
+        self.assertEqual([task.pk for task in claimed], [abandoned.pk])
+        self.assertEqual(claimed[0].attempts, 2)
+        self.assertEqual(tasks.claim(10), [])
+
+    def test_run_tasks_command(self):
+        order = FoodOrder.objects.create(food=self.food, ordered_by=self.guest, quantity=1)
+        tasks.enqueue(tasks.send_confirmation, kind='food_order', pk=order.pk)
+        tasks.enqueue(tasks.send_confirmation, kind='food_order', pk=order.pk + 1)
+        out = io.StringIO()
+        call_command('run_tasks', '--once', '--threads=2', stdout=out)
+        self.assertIn('Ran 2 tasks: 2 done', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
@@ -0,0 +1,80 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Guards read-modify-write of bucket state within this process; across processes
+# sharing a cache a burst can overspend a bucket by a token or two.
+_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    ``capacity`` tokens refilled at ``per_minute`` tokens a minute, one bucket
+    per key, with the state kept in the Django cache. Timestamps are wall-clock
+    time: a monotonic clock means nothing to another process or after a restart.
+    """
+
+    def __init__(self, name, capacity, per_minute):
+        self.name = name
+        self.capacity = capacity
+        self.rate = per_minute / 60
+
+    def _key(self, key):
+        return f'throttle:{self.name}:{hashlib.md5(key.encode()).hexdigest()}'
+
+    def _tokens(self, key, now):
+        tokens, updated = cache.get(self._key(key)) or (self.capacity, now)
+        # A clock stepped backwards refills nothing rather than draining the bucket.
+        return min(self.capacity, tokens + max(now - updated, 0) * self.rate)
+
+    def _retry_after(self, tokens):
+        return 0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def peek(self, key):
+        """Seconds until ``key`` has a token to spend; 0 if it has one now."""
+        return self._retry_after(self._tokens(key, time.time()))
+
+    def take(self, key):
+        """Spend a token for ``key``. Returns 0 on success, or the seconds until one is available."""
+        with _lock:
+            now = time.time()
+            tokens = self._tokens(key, now)
+            retry_after = self._retry_after(tokens)
+            if not retry_after:
+                # Entries expire once the bucket would be full again anyway.
+                cache.set(self._key(key), (tokens - 1, now), math.ceil(self.capacity / self.rate) + 1)
+            return retry_after
+
+    def reset(self, key):
+        cache.delete(self._key(key))
+
+
+def _ip_bucket():
+    return TokenBucket('login-ip', *settings.LOGIN_THROTTLE_PER_IP)
+
+
+def _username_bucket():
+    return TokenBucket('login-username', *settings.LOGIN_THROTTLE_PER_USERNAME)
+
+
+def check_login(request, username):
+    """
+    Decide whether a login attempt may go on to authenticate(). Every attempt
+    spends a token from the client IP's bucket; a username's bucket is only
+    spent by failed attempts (login_failed), so guessing at one account from
+    many addresses is slowed without attempts from elsewhere locking it for
+    good. Returns 0, or the seconds to wait before trying again.
+    """
+    return _ip_bucket().take(request.META.get('REMOTE_ADDR', '')) or _username_bucket().peek(username.casefold())
+
+
+def login_failed(username):
+    _username_bucket().take(username.casefold())
+
+
+def login_succeeded(username):
+    _username_bucket().reset(username.casefold())
@@ -13,9 +13,15 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('room_booking/', views.room_booking, name='room_booking'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/async/', views.dashboard_async, name='dashboard_async'),
     path('checkout/<int:booking_id>/', views.checkout, name='checkout'),
     path('service_booking/', views.service_booking, name='service_booking'),
     path('payment/', views.payment, name='payment'),
-    path('food_order/', views.food_order_view, name='food_order')
+    path('payment/async/', views.payment_async, name='payment_async'),
+    path('food_order/', views.food_order_view, name='food_order'),
+    path('analytics/', views.analytics_view, name='analytics'),
+    path('export/<slug:dataset>/', views.export_view, name='export'),
+    path('api/<slug:resource>/', views.api_list, name='api'),
+    path('stats/requests/', views.request_stats_view, name='request_stats'),
 
 ]
\ No newline at end of file
@@ -1,22 +1,64 @@
+import datetime
+import math
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.db.models import Sum
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import condition, require_POST
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
 from django.contrib.auth import login, authenticate, logout
-from .forms import SignUpForm, LoginForm, RoomBookingForm, ServiceBookingForm, FoodOrderForm
-from .models import RoomBooking, FoodOrder, ServiceOrder, Employee, Billing, Payment, InventoryItem
+from . import api, ledger, roles, tasks, throttling
+from .analytics import room_type_performance
+from .availability import RoomUnavailable, reserve
+from .billing import close_folio, settle
+from .caching import anonymous_page_cache
+from .exports import DATASETS, FORMATS, stream
+from .concurrency import async_login_required, load_concurrently
+from .conditional import dashboard_etag, page_etag
+from .instrumentation import query_budget, request_stats
+from .forms import SignUpForm, LoginForm, RoomBookingForm, ServiceBookingForm, FoodOrderForm, DashboardFilterForm, PaymentForm, AnalyticsRangeForm, ExportForm, ApiPageForm
+from .models import RoomBooking, FoodOrder, ServiceOrder, Billing, Payment, InventoryItem, InsufficientStock
+from .pagination import keyset_page
+from .routers import replica_reads
 
 # Create your views here.
+@query_budget(2)
+@replica_reads
+@condition(etag_func=page_etag('index.html', 'base.html'))
+@anonymous_page_cache
 def home_view(request):
     return render(request, 'index.html')
+@query_budget(2)
+@replica_reads
+@condition(etag_func=page_etag('website/room.html', 'base.html'))
+@anonymous_page_cache
 def room_view(request):
     return render(request, 'website/room.html')
+@query_budget(2)
+@replica_reads
+@condition(etag_func=page_etag('website/food.html', 'base.html'))
+@anonymous_page_cache
 def food_view(request):
     return render(request, 'website/food.html')
+@query_budget(2)
+@replica_reads
+@condition(etag_func=page_etag('website/service.html', 'base.html'))
+@anonymous_page_cache
 def service_view(request):
     return render(request, 'website/service.html')
+@query_budget(2)
+@replica_reads
+@condition(etag_func=page_etag('website/about.html', 'base.html'))
+@anonymous_page_cache
 def about_view(request):
     return render(request, 'website/about.html')
+@query_budget(7)
 def signup(request):
     if request.method == 'POST':
         form = SignUpForm(request.POST)
@@ -27,27 +69,38 @@ def signup(request):
         form = SignUpForm()
     return render(request, 'registration/signup.html', {'form': form})
 
+@query_budget(11)
 def login_view(request):
     if request.method == 'POST':
         form = LoginForm(request.POST)
         if form.is_valid():
             username = form.cleaned_data.get('username')
             password = form.cleaned_data.get('password')
-            print(password)
+            retry_after = throttling.check_login(request, username)
+            if retry_after:
+                # Refused before authenticate(), so a burst of attempts costs no password hashing.
+                form.add_error(None, "Too many login attempts. Please wait a moment and try again.")
+                response = render(request, 'registration/login.html', {'form': form}, status=429)
+                response['Retry-After'] = str(math.ceil(retry_after))
+                return response
             user = authenticate(request, username=username, password=password)
             if user is not None:
+                throttling.login_succeeded(username)
                 login(request, user)
                 return redirect(reverse('index'))
             else:
+                throttling.login_failed(username)
                 form.add_error(None, "Invalid username or password.")
 
     else:
         form = LoginForm()
     return render(request, 'registration/login.html', {'form': form})
 
+@query_budget(4)
 def logout_view(request):
     logout(request)
     return redirect(reverse('index'))
+@query_budget(14)
 @login_required
 def room_booking(request):
     if request.method == 'POST':
@@ -55,60 +108,84 @@ def room_booking(request):
         if form.is_valid():
             room_booking = form.save(commit=False)
             room_booking.booked_by = request.user
-            room_booking.total_price = room_booking.room.price * room_booking.num_nights
-            room_booking.save() #INSERT INTO website_roombooking (room_id, booked_by_id, booking_date, num_nights, total_price) VALUES (...);
+            try:
+                reserve(room_booking) # BEGIN; INSERT INTO website_roombooking (...) VALUES (...); INSERT INTO website_roomnight (room_id, booking_id, night) VALUES (...), (...); COMMIT;
+            except RoomUnavailable as e:
+                form.add_error('room', str(e))
+            else:
+                tasks.enqueue(tasks.send_confirmation, kind='room_booking', pk=room_booking.pk) # INSERT INTO website_task (...) VALUES (...);
+                return redirect(reverse("index"))
+    else:
+        form = RoomBookingForm(initial={'booking_date': timezone.localdate(), 'num_nights': 1, **request.GET.dict()})
+    check_in, check_out = form.requested_stay()
+    return render(request, 'website/room_booking.html', {
+        'form': form, 'quotes': form.quotes(), 'check_in': check_in, 'nights': (check_out - check_in).days,
+    })
+
+def _employee_dashboard_sections(request, filters):
+    after = request.GET.get
+    return {
+        'room_bookings': lambda: keyset_page(filters.filter_bookings(RoomBooking.objects.select_related('room', 'booked_by')), after('room_bookings_after')), # SELECT ... FROM website_roombooking INNER JOIN website_room ... INNER JOIN website_person ...;
+        'food_orders': lambda: keyset_page(filters.filter_orders(FoodOrder.objects.select_related('food', 'ordered_by')), after('food_orders_after')), # SELECT ... FROM website_foodorder INNER JOIN website_food ... INNER JOIN website_person ...;
+        'service_orders': lambda: keyset_page(filters.filter_orders(ServiceOrder.objects.select_related('service', 'ordered_by')), after('service_orders_after')), # SELECT ... FROM website_serviceorder INNER JOIN website_service ... INNER JOIN website_person ...;
+        'inventory_items': lambda: keyset_page(InventoryItem.objects.all(), after('inventory_items_after'), key='name'), # SELECT * FROM website_inventoryitem ORDER BY name;
+    }
 
-            booked_room = room_booking.room
-            booked_room.is_available = False
-            booked_room.save() # UPDATE website_room SET is_available = False WHERE id = [room_id];
+def _employee_dashboard_context(request, filters, sections):
+    context = {'filters': filters}
+    for name, page in sections.items():
+        context[name] = page
+        context[f'{name}_next_url'] = None
+        if page.has_next:
+            params = request.GET.copy()
+            params[f'{name}_after'] = page.next_cursor
+            context[f'{name}_next_url'] = f'?{params.urlencode()}'
+    return context
 
-            return redirect(reverse("index"))
-    else:
-        form = RoomBookingForm()
-    return render(request, 'website/room_booking.html', {'form': form})
+def _guest_dashboard_sections(user):
+    return {
+        'room_bookings': lambda: list(RoomBooking.objects.filter(booked_by=user).select_related('room')), # SELECT ... FROM website_roombooking INNER JOIN website_room ... WHERE booked_by_id = [current_user_id];
+        'food_orders': lambda: list(FoodOrder.objects.filter(ordered_by=user).select_related('food')), # SELECT ... FROM website_foodorder INNER JOIN website_food ... WHERE ordered_by_id = [current_user_id];
+        'service_orders': lambda: list(ServiceOrder.objects.filter(ordered_by=user).select_related('service')), # SELECT ... FROM website_serviceorder INNER JOIN website_service ... WHERE ordered_by_id = [current_user_id];
+    }
 
+@query_budget(7)
+@replica_reads
 @login_required
+@condition(etag_func=dashboard_etag)
 def dashboard(request):
-    is_employee = False
-    if request.user.is_authenticated:
-        try:
-            employee = Employee.objects.get(person=request.user)
-            is_employee = True
-        except Employee.DoesNotExist:
-            pass
-    if is_employee:
-        room_bookings = RoomBooking.objects.all() # SELECT * FROM website_roombooking;
-        food_orders = FoodOrder.objects.all() # SELECT * FROM website_foodorder;
-        service_orders = ServiceOrder.objects.all() # SELECT * FROM website_serviceorder;
-        inventory_items = InventoryItem.objects.all() # SELECT * FROM website_inventoryitems;
-        context = {
-            'room_bookings': room_bookings,
-            'food_orders': food_orders,
-            'service_orders': service_orders,
-            'inventory_items': inventory_items
-        }
-        return render(request, 'website/dashboard_employee.html', context)
+    if roles.is_employee(request):
+        filters = DashboardFilterForm(request.GET)
+        filters.is_valid() # Invalid filter values are left out of cleaned_data and ignored
+        sections = {name: load() for name, load in _employee_dashboard_sections(request, filters).items()}
+        return render(request, 'website/dashboard_employee.html', _employee_dashboard_context(request, filters, sections))
     else:
-        room_bookings = RoomBooking.objects.filter(booked_by=request.user) # SELECT * FROM website_roombooking WHERE booked_by_id = [current_user_id];
-        food_orders = FoodOrder.objects.filter(ordered_by=request.user) # SELECT * FROM website_foodorder WHERE ordered_by_id = [current_user_id];
-        service_orders = ServiceOrder.objects.filter(ordered_by=request.user) # SELECT * FROM website_serviceorder WHERE ordered_by_id = [current_user_id];
-
-        context = {
-            'room_bookings': room_bookings,
-            'food_orders': food_orders,
-            'service_orders': service_orders,
-        }
-        return render(request, 'website/dashboard.html', context=context)
+        sections = {name: load() for name, load in _guest_dashboard_sections(request.user).items()}
+        return render(request, 'website/dashboard.html', context=sections)
+
+@query_budget(7)
+@replica_reads
+@async_login_required
+async def dashboard_async(request):
+    """dashboard, with the section queries running concurrently."""
+    if await sync_to_async(roles.is_employee)(request):
+        filters = DashboardFilterForm(request.GET)
+        filters.is_valid()
+        sections = await load_concurrently(_employee_dashboard_sections(request, filters))
+        return render(request, 'website/dashboard_employee.html', _employee_dashboard_context(request, filters, sections))
+    sections = await load_concurrently(_guest_dashboard_sections(request.user))
+    return render(request, 'website/dashboard.html', context=sections)
+@query_budget(14)
+@require_POST
 @login_required
 def checkout(request, booking_id):
-    if request.user.is_authenticated:
-        booking = get_object_or_404(RoomBooking, pk=booking_id)
-        if booking.booked_by == request.user:
-            booking.room.is_available = True
-            booking.room.save() # UPDATE website_room SET is_available = True WHERE id = [room_id];
-            booking.delete() # DELETE FROM website_roombooking WHERE id = [booking_id];
+    booking = get_object_or_404(RoomBooking.objects.select_related('booked_by', 'room'), pk=booking_id) # SELECT ... FROM website_roombooking INNER JOIN website_person ... INNER JOIN website_room ... WHERE id = [booking_id];
+    if booking.booked_by_id != request.user.pk and not roles.is_employee(request):
+        raise PermissionDenied
+    close_folio(booking) # SELECT [kept nights' rates]; BEGIN; UPDATE website_roombooking ...; UPDATE website_dailyrevenue ...; SELECT [balance]; UPDATE [orders] ...; DELETE FROM website_roomnight ...; INSERT INTO website_billing ...; COMMIT;
     return redirect('dashboard')
 
+@query_budget(16)
 @login_required
 def service_booking(request):
     if request.method == 'POST':
@@ -116,30 +193,56 @@ def service_booking(request):
         if form.is_valid():
             service_order = form.save(commit=False)
             service_order.ordered_by = request.user
-            service_order.save() # INSERT INTO website_serviceorder (service_id, ordered_by_id, quantity) VALUES (...);
-            return redirect('dashboard')
-    form = ServiceBookingForm()
+            try:
+                service_order.save() # INSERT INTO website_serviceorder (service_id, ordered_by_id, quantity) VALUES (...); UPDATE website_inventoryitem SET quantity = quantity - ... ;
+            except InsufficientStock as exc:
+                form.add_error(None, str(exc))
+            else:
+                tasks.enqueue(tasks.send_confirmation, kind='service_order', pk=service_order.pk) # INSERT INTO website_task (...) VALUES (...);
+                return redirect('dashboard')
+    else:
+        form = ServiceBookingForm()
     return render(request, 'website/service_booking.html', {'form': form})
 
+def _payment_sections(user):
+    return {
+        'balance': lambda: ledger.balance(user), # SELECT * FROM website_guestbalance WHERE person_id = [current_user_id];
+        'unpaid_food_orders': lambda: list(FoodOrder.objects.filter(ordered_by=user, payment_status=FoodOrder.UNPAID).select_related('food')), # SELECT ... FROM website_foodorder INNER JOIN website_food ... WHERE ordered_by_id = [current_user_id] AND payment_status = 'unpaid';
+        'unpaid_service_orders': lambda: list(ServiceOrder.objects.filter(ordered_by=user, payment_status=ServiceOrder.UNPAID).select_related('service')), # SELECT ... FROM website_serviceorder INNER JOIN website_service ... WHERE ordered_by_id = [current_user_id] AND payment_status = 'unpaid';
+    }
+
+def _payment_context(form, sections):
+    balance = sections.pop('balance')
+    return {'form': form, 'total_amount': balance.orders_due, **sections}
+
+@query_budget(14)
 @login_required
 def payment(request):
-    unpaid_food_orders = FoodOrder.objects.filter(payment_status='unpaid')
-    unpaid_service_orders = ServiceOrder.objects.filter(payment_status='unpaid')
-
-    total_amount = sum(order.total_price for order in unpaid_food_orders) + sum(order.total_price for order in unpaid_service_orders)
+    if request.method == 'POST':
+        form = PaymentForm(request.POST)
+        if form.is_valid():
+            settle(request.user, form.cleaned_data['payment_method']) # BEGIN; UPDATE ... SET payment_status = 'paid' WHERE ordered_by_id = [current_user_id] ...; INSERT INTO website_payment ...; INSERT INTO website_billing ...; COMMIT;
+            return redirect('dashboard')
+    else:
+        form = PaymentForm()
+    sections = {name: load() for name, load in _payment_sections(request.user).items()}
+    return render(request, 'website/payment.html', _payment_context(form, sections))
 
+@query_budget(14)
+@async_login_required
+async def payment_async(request):
+    """payment, with the balance and order lists loading concurrently."""
     if request.method == 'POST':
-        unpaid_food_orders.update(payment_status='paid') # UPDATE website_foodorder SET payment_status = 'paid' WHERE payment_status = 'unpaid';
-        unpaid_service_orders.update(payment_status='paid') # UPDATE website_serviceorder SET payment_status = 'paid' WHERE payment_status = 'unpaid';
-        return redirect('dashboard')
-
-    context = {
-        'unpaid_food_orders': unpaid_food_orders,
-        'unpaid_service_orders': unpaid_service_orders,
-        'total_amount': total_amount,
-    }
-    return render(request, 'website/payment.html', context)
+        form = PaymentForm(request.POST)
+        if form.is_valid():
+            await sync_to_async(settle)(request.user, form.cleaned_data['payment_method'])
+            return redirect('dashboard_async')
+    else:
+        form = PaymentForm()
+    sections = await load_concurrently(_payment_sections(request.user))
+    return render(request, 'website/payment.html', _payment_context(form, sections))
 
+@query_budget(16)
 @login_required
 def food_order_view(request):
     if request.method == 'POST':
@@ -147,7 +250,77 @@ def food_order_view(request):
         if form.is_valid():
             food_order = form.save(commit=False)
             food_order.ordered_by = request.user
-            food_order.save() # INSERT INTO website_foodorder (food_id, ordered_by_id, quantity) VALUES (...);
-            return redirect('dashboard')
-    form = FoodOrderForm()
+            try:
+                food_order.save() # INSERT INTO website_foodorder (food_id, ordered_by_id, quantity) VALUES (...); UPDATE website_inventoryitem SET quantity = quantity - ... ;
+            except InsufficientStock as exc:
+                form.add_error(None, str(exc))
+            else:
+                tasks.enqueue(tasks.send_confirmation, kind='food_order', pk=food_order.pk) # INSERT INTO website_task (...) VALUES (...);
+                return redirect('dashboard')
+    else:
+        form = FoodOrderForm()
     return render(request, 'website/food_order.html', {'form': form})
+
+@staff_member_required
+def request_stats_view(request):
+    return JsonResponse(request_stats.snapshot())
+
+@query_budget(5)
+@replica_reads
+@login_required
+def analytics_view(request):
+    if not roles.is_employee(request):
+        raise PermissionDenied
+    today = timezone.localdate()
+    form = AnalyticsRangeForm(request.GET or {'date_from': today - datetime.timedelta(days=29), 'date_to': today})
+    performance = None
+    if form.is_valid():
+        performance = room_type_performance(form.cleaned_data['date_from'], form.cleaned_data['date_to'])
+    return render(request, 'website/analytics.html', {'form': form, 'performance': performance})
+
+@query_budget(3)
+@replica_reads
+@login_required
+def export_view(request, dataset):
+    if not roles.is_employee(request):
+        raise PermissionDenied
+    if dataset not in DATASETS:
+        raise Http404
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    fmt = form.cleaned_data['format'] or 'csv'
+    # Rows are queried and sent chunk by chunk while the response streams out.
+    response = StreamingHttpResponse(
+        stream(dataset, fmt, form.cleaned_data['date_from'], form.cleaned_data['date_to']),
+        content_type=f'{FORMATS[fmt]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{fmt}"'
+    return response
+
+@query_budget(4)
+@replica_reads
+def api_list(request, resource):
+    if not request.user.is_authenticated:
+        return JsonResponse({'errors': {'__all__': ['Authentication required.']}}, status=401)
+    if resource not in api.RESOURCES:
+        raise Http404
+    form = ApiPageForm(request.GET, api.RESOURCES[resource][2])
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    rows, cursor = api.page(
+        resource, request.user, roles.is_employee(request),
+        form.cleaned_data['fields'], form.cleaned_data['after'], form.cleaned_data['limit'],
+    )
+    next_url = None
+    if cursor is not None:
+        params = request.GET.copy()
+        params['after'] = cursor
+        next_url = f'?{params.urlencode()}'
+    body, etag = api.render({'results': rows, 'next': next_url})
+    # A poller sending back the ETag of an unchanged page gets an empty 304.
+    response = get_conditional_response(request, etag=etag) or HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Cookie'])
+    return response